@@ -1,6 +1,13 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from .config import Config, get_db_connection
+from .config import Config, check_database
+from .database import init_db
+from .query_stats import init_query_stats
+from .compression import init_compression
+from .limits import init_limits
+from .prepared import init_prepared_statements
+from .lifecycle import register_health_routes
+from .replicas import init_replicas
 from .routes.auth_routes import auth_routes
 from .routes.artist_routes import artist_routes
 from .routes.gallery_routes import gallery_routes
@@ -12,13 +19,10 @@ from .routes.order_item_routes import order_item_routes
 from .routes.cart_routes import cart
 from .routes.shipping_routes import shipping
 from .routes.dashboard_routes import dashboard_bp
-from .utils import CustomJSONEncoder
-#customJSONEncoder is used to serialize the data into json format
-import logging
-from logging.handlers import RotatingFileHandler
-#RotatingFileHandler is used to log the data into a file
+from .utils import FastJSONProvider
+#FastJSONProvider is used to serialize the data into json format
+from .logging_setup import configure_logging
 #logging is important because it helps in debugging the code
-import os
 
 def create_app():
     app = Flask(__name__)
@@ -26,44 +30,56 @@ def create_app():
     #this is used to get the configuration from the config file
     #this is the main file that runs the application
     
+    # Configure logging
+    #records go through a queue to a background thread which writes them to stderr and, unless
+    #LOG_TO_FILE is off (as under gunicorn), to logs/picksart.log, so logging never blocks
+    #a request; see app/logging_setup.py
+    configure_logging(app)
+    app.logger.info('PicksArt startup')
+
     # Test database connection
+    #a plain connection, not the pool: gunicorn may fork workers after this and each
+    #worker must open its own pooled connections (see get_connection_pool in config.py)
     try:
-        conn = get_db_connection()
-        conn.close()
-        print("Database connection successful")
+        check_database()
+        app.logger.info("Database connection successful")
     except Exception as e:
-        print(f"Error connecting to database: {e}")
+        app.logger.error("Error connecting to database: %s", e)
         raise
     
-    # Set up JSON encoder
-    app.json_encoder = CustomJSONEncoder
+    # Compress JSON and CSV responses; registered first so its after_request hook
+    #runs last, on the final body (see app/compression.py)
+    init_compression(app)
+
+    # Rate limits and per blueprint concurrency caps, checked before a request takes a connection
+    init_limits(app)
+
+    # Request scoped connections and pool exhaustion handling
+    init_db(app)
+
+    # Per request query counts, slow query logging and per endpoint query stats
+    init_query_stats(app)
+
+    # Hot lookups run as server side prepared statements cached per pooled connection
+    init_prepared_statements(app)
+
+    # Read-only views go to the read replicas when MYSQL_REPLICA_HOSTS is set
+    init_replicas(app)
     
-    # Configure logging
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-        #this is used to create a folder called logs in the root directory
-    file_handler = RotatingFileHandler('logs/picksart.log', maxBytes=10240, backupCount=10)
-    #rotating file handler is used to log the data into a file called picksart.log
-    #maxBytes is the maximum size of the file that can be logged
-    #backupCount is the number of files that can be logged
-    #rotating file handler takes file name, maxBytes and backupCount as arguments
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    #this is used to format the data that is being logged
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.setLevel(logging.INFO)
-    app.logger.info('PicksArt startup')
+    # Set up JSON serialization
+    #app.json is what jsonify() uses, it converts Decimal and datetime values itself
+    app.json = FastJSONProvider(app)
 
     # Configure CORS
-    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
+    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True,
+         expose_headers=['X-Next-Cursor', 'X-DB-Queries', 'X-DB-Time-Ms', 'X-DB-Rows', 'X-DB-Source', 'Retry-After'])
     #CORS SETUP is done here
     #this is used to allow the frontend to access the backend
     #resources is the url that is being accessed
     #origins is the url that is allowed to access the backend
     # * signifies that all the urls are allowed to access the backend
     #supports_credentials is set to True to allow the frontend to send cookies to the backend
+    #expose_headers lets the browser read our pagination cursor, query stats and Retry-After headers
     #cors takes app and resources as arguments
     # Error handlers
     @app.errorhandler(404)
@@ -78,7 +94,7 @@ def create_app():
 
     @app.errorhandler(Exception)
     def unhandled_exception(e):
-        app.logger.error(f'Unhandled Exception: {str(e)}')
+        app.logger.exception('Unhandled Exception: %s', e)
         return jsonify({"error": "An unexpected error has occurred"}), 500
     #all these are various error handlers that are used to handle the errors that occur in the application
     #these are used to log the errors and return a json response with the error message and status code
@@ -101,6 +117,8 @@ def create_app():
             }
         })
     #front end will access the backend through these endpoints
+    # /health (liveness) and /ready (readiness) for the load balancer, see app/lifecycle.py
+    register_health_routes(app)
     #these are the various endpoints that are available in the application
     #endpoints are the urls that can be accessed by the frontend
     # Register Blueprints with URL Prefix
@@ -121,11 +139,12 @@ def create_app():
     return app
 
 if __name__ == '__main__':
-    # Run on port 8000 to match frontend expectations
+    # Development server on port 8000 to match frontend expectations
+    # production runs under gunicorn instead: gunicorn -c gunicorn.conf.py wsgi:app
+    app = create_app()
     app.run(host='0.0.0.0', port=8000, debug=app.config['ENV'] == 'development')
 #run the application on port 8000
-#these environment is still in the development stage 
 #run takes host, port and debug as arguments
 #port signifies the port number on which the application is running
 #host signifies the host on which the application is running
-#debug is set to True to enable debugging mode
\ No newline at end of file
+#debug is on only in development
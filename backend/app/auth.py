@@ -1,10 +1,77 @@
+import logging
+import time
 from functools import wraps
 #functools is a module in Python that provides functions for higher-order functions and operations on callable objects.
 #functools.wraps is a decorator that copies the attributes of the original function to the wrapper function
 #this is used to preserve the metadata of the original function
-from flask import request, jsonify
+from flask import request, jsonify, g
 import jwt
 from .config import Config, get_db_connection
+from .database import use_primary
+from .cache import TTLCache
+from .markers import get_marker_store
+from .prepared import fetch_one
+
+logger = logging.getLogger(__name__)
+
+# Principal cache: (role, user_id) -> (cached at, the current_user row token_required built last time).
+# It saves a pool checkout and a SELECT on every authenticated request.
+# Routes that change or delete those rows must call invalidate_principal(). Every worker has
+# its own cache, so the invalidation is also left as a shared marker (app/markers.py) that
+# each hit checks: an entry cached before the marker was set is loaded again.
+principal_cache = TTLCache(maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.PRINCIPAL_CACHE_TTL)
+
+def _principal_marker(role, user_id):
+    return f"principal:{role}:{user_id}"
+
+def invalidate_principal(role, user_id):
+    principal_cache.delete((role, user_id))
+    # entries older than the ttl are gone from every cache anyway, the marker can expire with them
+    try:
+        get_marker_store().set(_principal_marker(role, user_id), Config.PRINCIPAL_CACHE_TTL)
+    except Exception as e:
+        # the change is committed already, failing the request would not undo it
+        logger.error("Principal invalidation marker error, other workers keep %s:%s until it expires: %s",
+                     role, user_id, e)
+
+def _cached_principal(role, user_id):
+    entry = principal_cache.get((role, user_id))
+    if entry is None:
+        return None
+    cached_at, user = entry
+    try:
+        invalidated_at = get_marker_store().get(_principal_marker(role, user_id))
+    except Exception as e:
+        logger.error("Principal marker lookup error: %s", e)
+        # unknown, the database is always correct
+        invalidated_at = cached_at
+    if invalidated_at is not None and invalidated_at >= cached_at:
+        principal_cache.delete((role, user_id))
+        return None
+    return user
+
+def _recently_invalidated(role, user_id):
+    try:
+        return get_marker_store().get(_principal_marker(role, user_id)) is not None
+    except Exception as e:
+        logger.error("Principal marker lookup error: %s", e)
+        return True
+
+# The user lookup per role, run as server side prepared statements (see app/prepared.py)
+PRINCIPAL_QUERIES = {
+    'artist': """
+        SELECT artist_id, artist_id as user_id, name, email, 'artist' as role
+        FROM artists WHERE artist_id = %s
+    """,
+    'customer': """
+        SELECT customer_id, customer_id as user_id, name, email, 'customer' as role
+        FROM customers WHERE customer_id = %s
+    """,
+    'gallery': """
+        SELECT gallery_id, gallery_id as user_id, name, email, 'gallery' as role
+        FROM galleries WHERE gallery_id = %s
+    """,
+}
 
 def token_required(f):
     @wraps(f)
@@ -32,7 +99,9 @@ def token_required(f):
             user_id = data['user_id']
             user_role = data.get('role')
             
-            print(f"Token decoded: user_id={user_id}, role={user_role}")
+            logger.debug("Token decoded: user_id=%s, role=%s", user_id, user_role)
+            #remembered for the request, app/replicas.py uses it for read-your-writes
+            g.principal = (user_role, user_id)
 
             # Special case for admin
             if user_role == 'admin':
@@ -44,43 +113,35 @@ def token_required(f):
                 }
                 return f(current_user, *args, **kwargs)
 
-            # Get user details from the appropriate table based on role
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
+            cached_user = _cached_principal(user_role, user_id)
+            if cached_user is not None:
+                # hand out a copy so a handler cannot modify the cached entry
+                return f(dict(cached_user), *args, **kwargs)
 
-            if user_role == 'artist':
-                cursor.execute('''
-                    SELECT artist_id, artist_id as user_id, name, email, 'artist' as role 
-                    FROM artists WHERE artist_id = %s
-                ''', (user_id,))
+            # Get user details from the appropriate table based on role
             #if the user role is artist, we will fetch the artist details from the artists table
             #if the user role is customer, we will fetch the customer details from the customers table
             #if the user role is gallery, we will fetch the gallery details from the galleries table
-            elif user_role == 'customer':
-                cursor.execute('''
-                    SELECT customer_id, customer_id as user_id, name, email, 'customer' as role 
-                    FROM customers WHERE customer_id = %s
-                ''', (user_id,))
-            elif user_role == 'gallery':
-                cursor.execute('''
-                    SELECT gallery_id, gallery_id as user_id, name, email, 'gallery' as role 
-                    FROM galleries WHERE gallery_id = %s
-                ''', (user_id,))
-            else:
-                cursor.close()
-                conn.close()
+            query = PRINCIPAL_QUERIES.get(user_role)
+            if query is None:
                 return jsonify({'message': 'Invalid user role'}), 401
             #if someone not specified their roles we will return a 401 error response
             #if the user role is not one of the expected roles, we will return a 401 error response
-            current_user = cursor.fetchone()
-            cursor.close()
+            # taken before the SELECT: an invalidation that lands while it runs is newer than the entry
+            loaded_at = time.time()
+            if _recently_invalidated(user_role, user_id):
+                # a lagging replica could still return the row that was just changed or deleted
+                use_primary()
+            conn = get_db_connection()
+            current_user = fetch_one(conn, query, (user_id,))
             conn.close()
             
-            print(f"Current user from DB: {current_user}")
+            logger.debug("Current user from DB: %s", current_user)
 
             if current_user is None:
                 return jsonify({'message': 'User not found'}), 401
 
+            principal_cache.set((user_role, user_id), (loaded_at, dict(current_user)))
             return f(current_user, *args, **kwargs)
 
         except jwt.ExpiredSignatureError:
@@ -88,7 +149,7 @@ def token_required(f):
         except jwt.InvalidTokenError:
             return jsonify({'message': 'Invalid token'}), 401
         except Exception as e:
-            print(f"Token validation error: {str(e)}")
+            logger.error("Token validation error: %s", e)
             return jsonify({'message': f'Error: {str(e)}'}), 500
 
     return decorated 
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from functools import wraps
+from flask import request, make_response
+from . import compression
+from .config import Config
+from .database import use_primary
+from .markers import note_write, wrote_recently
+#OrderedDict remembers insertion order, we move entries to the end when they are used
+#so the first entry is always the least recently used one
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    A small thread safe in-process cache with a time-to-live and LRU eviction.
+    Entries older than ttl seconds are treated as missing, and once the cache
+    holds maxsize entries the least recently used one is dropped.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if isinstance(k, str) and k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# ---------------------------------------------------------------------------
+# Response cache for the public catalog endpoints
+# ---------------------------------------------------------------------------
+
+
+class MemoryBackend:
+    """Per-process backend, fine for a single worker."""
+
+    def __init__(self, maxsize=512):
+        self._cache = TTLCache(maxsize=maxsize)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, value, ttl)
+
+    def delete_prefix(self, prefix):
+        self._cache.delete_prefix(prefix)
+
+
+class SqliteBackend:
+    """
+    Backend stored in a local sqlite file so every worker process on the host
+    shares one cache and sees the same invalidations.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    value BLOB NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        # sqlite connections cannot be shared between threads, so open one per call
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT value FROM response_cache WHERE cache_key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO response_cache (cache_key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + ttl, value)
+            )
+            # opportunistically drop expired rows so the file does not grow forever
+            db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete_prefix(self, prefix):
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM response_cache WHERE substr(cache_key, 1, ?) = ?",
+                (len(prefix), prefix)
+            )
+
+
+_response_backend = None
+
+def get_response_backend():
+    """Build the backend selected by Config.RESPONSE_CACHE_BACKEND on first use."""
+    global _response_backend
+    if _response_backend is None:
+        if Config.RESPONSE_CACHE_BACKEND == 'sqlite':
+            _response_backend = SqliteBackend(Config.RESPONSE_CACHE_PATH)
+        elif Config.RESPONSE_CACHE_BACKEND == 'memory':
+            _response_backend = MemoryBackend(Config.RESPONSE_CACHE_SIZE)
+    return _response_backend
+
+# Entries are stored as a JSON header line followed by the raw body,
+# so both backends only ever deal with bytes.
+def _pack(entry, body):
+    return json.dumps(entry).encode('utf-8') + b'\n' + body
+
+def _unpack(value):
+    header, body = bytes(value).split(b'\n', 1)
+    return json.loads(header), body
+
+def _not_modified(entry):
+    # If-None-Match wins over If-Modified-Since, as in RFC 7232; it compares weakly,
+    # so the weak ETag of a compressed variant matches as well
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(entry['etag'])
+    if request.if_modified_since:
+        return entry['last_modified'] <= request.if_modified_since.timestamp()
+    return False
+
+def _encoded_body(backend, key, entry, body, ttl):
+    """
+    (encoding, body) to send for this request: the body compressed in the encoding the
+    client negotiated, or (None, body). Each compressed variant is stored next to the
+    entry under its own key and reused while the entry's ETag is unchanged.
+    """
+    encoding = compression.negotiate_encoding(len(body))
+    if encoding is None:
+        return None, body
+    # namespace first so invalidate_responses drops the variants with the entry
+    namespace, path = key.split(':', 1)
+    variant_key = f"{namespace}:{encoding}:{path}"
+    try:
+        value = backend.get(variant_key)
+    except Exception as e:
+        logger.error("Response cache read error: %s", e)
+        value = None
+    if value is not None:
+        variant, data = _unpack(value)
+        if variant['etag'] == entry['etag']:
+            return encoding, data
+    data = compression.compress(body, encoding)
+    try:
+        backend.set(variant_key, _pack({'etag': entry['etag']}, data), ttl)
+    except Exception as e:
+        logger.error("Response cache write error: %s", e)
+    return encoding, data
+
+def _build_response(entry, body, encoding=None):
+    if _not_modified(entry):
+        response = make_response('', 304)
+    else:
+        response = make_response(body, 200)
+        for name, value in entry['headers']:
+            response.headers[name] = value
+    response.set_etag(entry['etag'])
+    response.headers['Last-Modified'] = formatdate(entry['last_modified'], usegmt=True)
+    if compression.settings['enabled']:
+        response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        compression.mark_encoded(response, encoding)
+    return response
+
+def cached_response(namespace, ttl):
+    """
+    Cache successful GET responses of a public endpoint for ttl seconds.
+    The key is the namespace plus the full path with query string, so each page or
+    filter combination is cached on its own. Responses carry an ETag and Last-Modified
+    and conditional requests are answered with 304. Compressed variants are cached too.
+    Writers call invalidate_responses(namespace) to drop every cached variant.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            backend = get_response_backend()
+            if backend is None:
+                if wrote_recently(f"cache:{namespace}"):
+                    use_primary()
+                return f(*args, **kwargs)
+
+            key = f"{namespace}:{request.full_path}"
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                logger.error("Response cache read error: %s", e)
+                value = None
+            if value is not None:
+                entry, body = _unpack(value)
+                encoding, body = _encoded_body(backend, key, entry, body, ttl)
+                response = _build_response(entry, body, encoding)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            # just invalidated: a lagging replica could put the old data straight back
+            if wrote_recently(f"cache:{namespace}"):
+                use_primary()
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            body = response.get_data()
+            entry = {
+                'etag': hashlib.md5(body).hexdigest(),
+                'last_modified': int(time.time()),
+                'headers': [(name, value) for name, value in response.headers.items()
+                            if name.lower() not in ('content-length', 'etag', 'last-modified')],
+            }
+            try:
+                backend.set(key, _pack(entry, body), ttl)
+            except Exception as e:
+                logger.error("Response cache write error: %s", e)
+            encoding, body = _encoded_body(backend, key, entry, body, ttl)
+            response = _build_response(entry, body, encoding)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated
+    return decorator
+
+def invalidate_responses(*namespaces):
+    """Drop the cached responses of namespaces after a write, and keep their next reads off lagging replicas."""
+    backend = get_response_backend()
+    for namespace in namespaces:
+        # the public reads of a namespace carry no principal, the namespace is what they have
+        note_write(f"cache:{namespace}")
+        if backend is None:
+            continue
+        try:
+            backend.delete_prefix(f"{namespace}:")
+        except Exception as e:
+            logger.error("Response cache invalidation error: %s", e)
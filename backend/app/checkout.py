@@ -0,0 +1,187 @@
+# Checkout: turning a customer's pending order into a confirmed sale.
+# Artworks are one-off pieces, so confirming an order marks its artworks sold
+# in the same transaction that confirms the order and records shipping.
+# The order row and then the artwork rows (in artwork_id order) are locked with
+# SELECT ... FOR UPDATE; two buyers racing for the same piece serialize on it and
+# the second one finds it sold.
+from .prepared import fetch_one
+from .rollup import apply_order_to_rollup
+
+
+class OrderUnavailable(Exception):
+    """Some artworks of the order are no longer available. artwork_ids lists them."""
+
+    def __init__(self, artwork_ids):
+        super().__init__(f"Artworks no longer available: {artwork_ids}")
+        self.artwork_ids = artwork_ids
+
+
+class NoPendingOrder(Exception):
+    """The customer has no pending order (or it has no items)."""
+    pass
+
+
+def _item(row):
+    return {
+        'artwork_id': row['artwork_id'],
+        'title': row['title'],
+        'quantity': row['quantity'],
+        'price': float(row['price_at_time']),
+        'image_url': row['image_url'],
+        'artist_name': row['artist_name']
+    }
+
+
+def load_checkout(cursor, customer_id):
+    """
+    The customer's latest pending order with its items and the customer's saved contact
+    details, in one query. Nothing is locked, this is what the buyer reviews before paying.
+    Raises NoPendingOrder or OrderUnavailable.
+    """
+    cursor.execute(
+        """
+        SELECT
+            o.order_id,
+            o.total_amount,
+            o.created_at,
+            oi.artwork_id,
+            oi.quantity,
+            oi.price_at_time,
+            a.title,
+            a.image_url,
+            a.status AS artwork_status,
+            ar.name AS artist_name,
+            c.name AS customer_name,
+            c.address,
+            c.phone_number
+        FROM orders o
+        JOIN customers c ON o.customer_id = c.customer_id
+        JOIN order_items oi ON o.order_id = oi.order_id
+        JOIN artworks a ON oi.artwork_id = a.artwork_id
+        LEFT JOIN artists ar ON a.artist_id = ar.artist_id
+        WHERE o.order_id = (
+            SELECT order_id FROM orders
+            WHERE customer_id = %s AND status = 'pending'
+            ORDER BY created_at DESC
+            LIMIT 1
+        )
+        ORDER BY oi.order_item_id
+        """,
+        (customer_id,)
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        raise NoPendingOrder()
+    unavailable = [row['artwork_id'] for row in rows if row['artwork_status'] != 'available']
+    if unavailable:
+        raise OrderUnavailable(unavailable)
+
+    first = rows[0]
+    return {
+        'order_id': first['order_id'],
+        'total_amount': sum(float(row['price_at_time']) * row['quantity'] for row in rows),
+        'date': first['created_at'].isoformat() if first['created_at'] else None,
+        'status': 'pending',
+        'customer_name': first['customer_name'],
+        'items': [_item(row) for row in rows],
+        'customer_details': {
+            'name': first['customer_name'],
+            'address': first['address'] or '',
+            'phone_number': first['phone_number'] or ''
+        }
+    }
+
+
+def confirm_order(conn, cursor, customer, address, phone_number):
+    """
+    Confirm the customer's latest pending order: lock it and its artworks, mark the
+    artworks sold, save the shipping details (on the order and the customer profile),
+    confirm the order and count it in the sales rollups.
+    Meant to run as one transaction through database.run_in_transaction, conn is the
+    connection the transaction's cursor belongs to.
+    Raises NoPendingOrder or OrderUnavailable (the caller rolls back).
+    Returns (shipping_id, order) where order is shaped like the checkout response.
+    """
+    customer_id = customer['user_id']
+    order = fetch_one(
+        conn,
+        """
+        SELECT order_id, total_amount, created_at FROM orders
+        WHERE customer_id = %s AND status = 'pending'
+        ORDER BY created_at DESC
+        LIMIT 1
+        FOR UPDATE
+        """,
+        (customer_id,)
+    )
+    if not order:
+        raise NoPendingOrder()
+    order_id = order['order_id']
+
+    # OF a locks only the artwork rows, not the artists (shared by every buyer of their work)
+    cursor.execute(
+        """
+        SELECT
+            oi.artwork_id,
+            oi.quantity,
+            oi.price_at_time,
+            a.title,
+            a.image_url,
+            a.status AS artwork_status,
+            ar.name AS artist_name
+        FROM order_items oi
+        JOIN artworks a ON oi.artwork_id = a.artwork_id
+        LEFT JOIN artists ar ON a.artist_id = ar.artist_id
+        WHERE oi.order_id = %s
+        ORDER BY a.artwork_id
+        FOR UPDATE OF a
+        """,
+        (order_id,)
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        raise NoPendingOrder()
+    unavailable = [row['artwork_id'] for row in rows if row['artwork_status'] != 'available']
+    if unavailable:
+        raise OrderUnavailable(unavailable)
+
+    artwork_ids = sorted({row['artwork_id'] for row in rows})
+    placeholders = ', '.join(['%s'] * len(artwork_ids))
+    cursor.execute(
+        f"UPDATE artworks SET status = 'sold' WHERE artwork_id IN ({placeholders})",
+        tuple(artwork_ids)
+    )
+
+    cursor.execute(
+        "UPDATE customers SET address = %s, phone_number = %s WHERE customer_id = %s",
+        (address, phone_number, customer_id)
+    )
+
+    # a pending order only has shipping details left over from an earlier failed attempt
+    cursor.execute("SELECT shipping_id FROM shipping_details WHERE order_id = %s", (order_id,))
+    existing = cursor.fetchone()
+    if existing:
+        cursor.execute(
+            "UPDATE shipping_details SET address = %s, phone_number = %s WHERE order_id = %s",
+            (address, phone_number, order_id)
+        )
+        shipping_id = existing['shipping_id']
+    else:
+        cursor.execute(
+            "INSERT INTO shipping_details (order_id, address, phone_number) VALUES (%s, %s, %s)",
+            (order_id, address, phone_number)
+        )
+        shipping_id = cursor.lastrowid
+
+    # the order row is locked, so this is the only request confirming it
+    cursor.execute("UPDATE orders SET status = 'confirmed' WHERE order_id = %s", (order_id,))
+    apply_order_to_rollup(cursor, order_id)
+
+    return shipping_id, {
+        'order_id': order_id,
+        'total_amount': float(order['total_amount']),
+        'date': order['created_at'].isoformat() if order['created_at'] else None,
+        'status': 'confirmed',
+        'customer_name': customer['name'],
+        'items': [_item(row) for row in rows]
+    }
@@ -0,0 +1,141 @@
+# Response compression.
+# JSON, NDJSON and CSV responses are compressed with the best encoding the client accepts:
+# brotli and zstd when their packages are installed, gzip always. Bodies smaller than
+# COMPRESSION_MIN_SIZE bytes are sent as they are, streamed responses are compressed chunk
+# by chunk as they are generated, and cached responses keep their compressed variants in
+# the response cache so a hit costs no compression (see cached_response in app/cache.py).
+import gzip
+import zlib
+from flask import g, request
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Set from the app config by init_compression()
+settings = {
+    'enabled': True,
+    'min_size': 1024,
+    'gzip_level': 6,
+}
+
+# Fast settings for the optional encoders, dynamic responses are compressed on every miss
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+# In order of preference when the client accepts several equally
+ENCODINGS = tuple(
+    encoding for encoding, available in (('br', brotli), ('zstd', zstandard), ('gzip', True)) if available
+)
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+def skip_compression():
+    """Send this request's response uncompressed, whatever the client accepts."""
+    g._skip_compression = True
+
+
+def negotiate_encoding(size=None):
+    """
+    The encoding to compress this request's response with, from its Accept-Encoding,
+    or None to send it as it is (also when a body of size bytes is under the threshold).
+    """
+    if not settings['enabled'] or g.get('_skip_compression'):
+        return None
+    if size is not None and size < settings['min_size']:
+        return None
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        # handles q-values and "*"; q=0 means the client refuses that encoding
+        quality = request.accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    # mtime=0 keeps the output, and so the stored variants, identical for identical bodies
+    return gzip.compress(data, compresslevel=settings['gzip_level'], mtime=0)
+
+
+def _compressor(encoding):
+    # (compress a chunk, flush the rest) of a streaming compressor
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        return compressor.compress, compressor.flush
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(settings['gzip_level'], zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of str or bytes chunks as it is consumed, holding only the compressor's window."""
+    compress_chunk, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress_chunk(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        # a client that disconnects mid-stream must still release the generator's cursor and connection
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+def mark_encoded(response, encoding):
+    response.headers['Content-Encoding'] = encoding
+    # the compressed bytes differ from the plain ones, so a strong validator no longer holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def init_compression(app):
+    """
+    Read the compression settings and compress responses after every other after_request
+    hook ran: call it before the others are registered (Flask runs them in reverse order).
+    """
+    settings['enabled'] = app.config['RESPONSE_COMPRESSION']
+    settings['min_size'] = app.config['COMPRESSION_MIN_SIZE']
+    settings['gzip_level'] = app.config['COMPRESSION_LEVEL']
+
+    @app.after_request
+    def compress_response(response):
+        if not settings['enabled'] or response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers or response.direct_passthrough):
+            return response
+
+        if response.is_streamed:
+            # the size is unknown up front, streams are always compressed
+            encoding = negotiate_encoding()
+            if encoding is None:
+                return response
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            encoding = negotiate_encoding(len(body))
+            if encoding is None:
+                return response
+            response.set_data(compress(body, encoding))
+        mark_encoded(response, encoding)
+        return response
@@ -1,10 +1,15 @@
+import logging
 import os
 #os is used to access the environment variables
-from mysql.connector import pooling
-#pooling is used to create a connection pool to the database
+import threading
+import mysql.connector
+from .database import BoundedConnectionPool, request_connection
+#BoundedConnectionPool wraps the mysql connector pool with a wait timeout and statistics
 from dotenv import load_dotenv
 #load_dotenv is used to load the environment variables from the .env file
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -15,6 +20,94 @@ class Config:
     MYSQL_DB = os.environ.get('MYSQL_DB', 'picksart')
     SECRET_KEY = os.environ.get('SECRET_KEY', 'sudhi123')
     ENV = os.environ.get('FLASK_ENV', 'development')
+    # Number of pooled connections and how long (seconds) a request waits for a free one
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+    # How long (seconds) and how many authenticated users token_required keeps in memory.
+    # Invalidations reach the other workers of the host through the markers below; workers on
+    # other hosts keep a changed or deleted user for up to PRINCIPAL_CACHE_TTL seconds
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+    PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+    # Markers the worker processes share (app/markers.py): principal invalidations and, with read
+    # replicas, recent writes. 'sqlite' shares them through MARKER_PATH on the host, 'memory'
+    # keeps them per process and is only right for a single worker
+    MARKER_BACKEND = os.environ.get('MARKER_BACKEND', 'sqlite')
+    MARKER_PATH = os.environ.get('MARKER_PATH', 'cache/markers.sqlite3')
+    # Response cache for the public catalog: 'memory' (per worker), 'sqlite' (shared file) or 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_PATH = os.environ.get('RESPONSE_CACHE_PATH', 'cache/responses.sqlite3')
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 512))
+    ARTWORKS_CACHE_TTL = int(os.environ.get('ARTWORKS_CACHE_TTL', 30))
+    ARTISTS_CACHE_TTL = int(os.environ.get('ARTISTS_CACHE_TTL', 300))
+    GALLERIES_CACHE_TTL = int(os.environ.get('GALLERIES_CACHE_TTL', 300))
+    # Response compression (gzip, plus brotli/zstd when installed): bodies under
+    # COMPRESSION_MIN_SIZE bytes go out as they are, COMPRESSION_LEVEL is the gzip level
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', '1') == '1'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+    # bcrypt work factor and the process pool that runs it
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    HASH_WORKERS = int(os.environ.get('HASH_WORKERS', os.cpu_count() or 2))
+    HASH_QUEUE_DEPTH = int(os.environ.get('HASH_QUEUE_DEPTH', 4 * (os.cpu_count() or 2)))
+    HASH_TIMEOUT = float(os.environ.get('HASH_TIMEOUT', 10))
+    # Logging: default level, per module overrides ("app.auth=WARNING,app.routes.cart_routes=DEBUG"),
+    # the fraction of DEBUG records kept, and log file rotation. LOG_TO_FILE=0 logs to stderr only;
+    # gunicorn.conf.py turns the file off, forked workers cannot share one rotating file
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if ENV == 'development' else 'INFO').upper()
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1.0 if ENV == 'development' else 0.01))
+    LOG_TO_FILE = os.environ.get('LOG_TO_FILE', '1') == '1'
+    LOG_DIR = os.environ.get('LOG_DIR', 'logs')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+    # Query instrumentation: statements slower than SLOW_QUERY_MS are logged, X-DB-* response
+    # headers are sent when QUERY_STATS_HEADERS is on, and with QUERY_BUDGET_STRICT a view that
+    # goes over its @query_budget answers 500 instead of only logging it
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    QUERY_STATS_HEADERS = os.environ.get('QUERY_STATS_HEADERS', '1' if ENV == 'development' else '0') == '1'
+    QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', '0') == '1'
+    # Server side prepared statements for the hot lookups (app/prepared.py) and how many
+    # prepared statements each pooled connection keeps
+    PREPARED_STATEMENTS = os.environ.get('PREPARED_STATEMENTS', '1') == '1'
+    PREPARED_STATEMENT_CACHE_SIZE = int(os.environ.get('PREPARED_STATEMENT_CACHE_SIZE', 32))
+    # Admission control (app/limits.py). Token buckets per client IP and per user refill at
+    # RATE_LIMIT_IP / RATE_LIMIT_USER tokens a second up to the burst size; views spend 1 token
+    # or their @rate_cost. 'memory' keeps buckets per worker, 'sqlite' shares them between the
+    # workers of a host. RATE_LIMIT_PROXY_HOPS is the number of proxies that append to
+    # X-Forwarded-For in front of the app (0: use the peer address).
+    RATE_LIMITS_ENABLED = os.environ.get('RATE_LIMITS_ENABLED', '1') == '1'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH', 'cache/limits.sqlite3')
+    RATE_LIMIT_IP = float(os.environ.get('RATE_LIMIT_IP', 20))
+    RATE_LIMIT_IP_BURST = float(os.environ.get('RATE_LIMIT_IP_BURST', 100))
+    RATE_LIMIT_USER = float(os.environ.get('RATE_LIMIT_USER', 10))
+    RATE_LIMIT_USER_BURST = float(os.environ.get('RATE_LIMIT_USER_BURST', 50))
+    RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 0))
+    # Requests of these blueprints running at once per worker ("blueprint=limit,..."), the
+    # rest are answered 503 before they take a database connection. Off unless set: each
+    # worker runs GUNICORN_THREADS requests at once, a cap below that turns normal traffic away
+    CONCURRENCY_LIMITS = os.environ.get('CONCURRENCY_LIMITS', '')
+    # Logins are refused for LOGIN_FAILURE_WINDOW seconds once an account collected this many
+    # failed attempts from one address. The cap for an address over all accounts is much
+    # higher, many users can share one address behind a NAT or a proxy
+    LOGIN_MAX_FAILURES_PER_IP_ACCOUNT = int(os.environ.get('LOGIN_MAX_FAILURES_PER_IP_ACCOUNT', 10))
+    LOGIN_MAX_FAILURES_PER_IP = int(os.environ.get('LOGIN_MAX_FAILURES_PER_IP', 200))
+    LOGIN_FAILURE_WINDOW = int(os.environ.get('LOGIN_FAILURE_WINDOW', 900))
+    # How many times the checkout transaction is attempted when it hits a deadlock
+    CHECKOUT_RETRIES = int(os.environ.get('CHECKOUT_RETRIES', 3))
+    # Read replicas for read-only views: "host" or "host:port", comma separated, empty turns them off.
+    # A replica more than REPLICA_MAX_LAG seconds behind is skipped (checked every
+    # REPLICA_LAG_CHECK_INTERVAL seconds), and for READ_YOUR_WRITES_WINDOW seconds after a
+    # user's write their reads stay on the primary; keep the window above the max lag
+    MYSQL_REPLICA_HOSTS = os.environ.get('MYSQL_REPLICA_HOSTS', '')
+    REPLICA_POOL_SIZE = int(os.environ.get('REPLICA_POOL_SIZE', DB_POOL_SIZE))
+    REPLICA_POOL_TIMEOUT = float(os.environ.get('REPLICA_POOL_TIMEOUT', 0.1))
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 2))
+    # Seconds to wait for a new replica connection; the lag checks run in the background,
+    # requests only ever use a replica that answered the last check
+    REPLICA_CONNECT_TIMEOUT = int(os.environ.get('REPLICA_CONNECT_TIMEOUT', 2))
+    READ_YOUR_WRITES_WINDOW = int(os.environ.get('READ_YOUR_WRITES_WINDOW', 10))
 
 # Database configuration
 # The dbconfig dictionary contains the configuration parameters for the MySQL database connection.
@@ -26,29 +119,54 @@ dbconfig = {
     "password": Config.MYSQL_PASSWORD,
     "database": Config.MYSQL_DB,
     "pool_name": "mypool",
-    "pool_size": 20,  # Increase pool size from 5 to 20
-    "pool_reset_session": True  # Reset session after returning to pool
+    # Reset session after returning to pool, unless prepared statements are cached per connection:
+    # the reset deallocates them, the pool rolls back on release instead (see PooledConnection.close)
+    "pool_reset_session": not Config.PREPARED_STATEMENTS,
+    "consume_results": True  # A shared request connection must never trip over an unread result
 }
 # Create a connection pool
-# The pool_name parameter is used to identify the pool, and the pool_size parameter is used to set the number of connections in the pool.   
+# The pool_name parameter is used to identify the pool, and the pool_size parameter is used to set the number of connections in the pool.
+#the pool is created lazily, on first use in each process: when gunicorn preloads the app and forks
+#its workers, every worker opens its own connections instead of sharing the sockets of the master
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # a pool inherited through fork is dropped without closing it, its sockets belong to the parent
+            _pool = BoundedConnectionPool(Config.DB_POOL_SIZE, Config.DB_POOL_TIMEOUT, **dbconfig)
+            #The BoundedConnectionPool class is used to create a connection pool to the MySQL database.
+            #The ** operator is used to unpack the dictionary and pass the key-value pairs as keyword arguments to the pool constructor.
+            _pool_pid = os.getpid()
+        return _pool
 
+def close_connection_pool():
+    """Close the idle connections of this process's pool, on worker shutdown."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
 
-try:
-    connection_pool = pooling.MySQLConnectionPool(**dbconfig)
-    #The MySQLConnectionPool class is used to create a connection pool to the MySQL database.
-    ##dbconfig is the dictionary which contains the configuration parameters for the MySQL database connection.
-    #The ** operator is used to unpack the dictionary and pass the key-value pairs as keyword arguments to the MySQLConnectionPool constructor.
-except Exception as e:
-    print(f"Error creating connection pool: {e}")
-    connection_pool = None
-    #If an exception occurs while creating the connection pool, the connection_pool variable is set to None.
+def check_database():
+    """Open and close one unpooled connection, so startup checks leave no sockets behind to be forked."""
+    conn = mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB,
+        connection_timeout=5
+    )
+    conn.close()
 
 def get_db_connection():
+    #during a request every caller gets the same connection, see app/database.py
     try:
-        if connection_pool:
-            return connection_pool.get_connection()
-        else:
-            raise Exception("Connection pool not initialized")
+        return request_connection(get_connection_pool())
     except Exception as e:
-        print(f"Error getting database connection: {e}")
-        raise 
\ No newline at end of file
+        logger.error("Error getting database connection: %s", e)
+        raise
@@ -1,25 +1,282 @@
-from flask import current_app
-from mysql.connector import pooling
-from .config import Config, get_db_connection
+import logging
+import random
+import threading
+import time
+from flask import g, jsonify, has_request_context, request, current_app
+from mysql.connector import Error, errorcode, pooling
+from .query_stats import InstrumentedCursor, current_query_stats
 
-# This is a placeholder for the db object that routes can use
-# In our case, we'll use the get_db_connection() function directly
-db = None
+logger = logging.getLogger(__name__)
 
-def init_db(app):
+# Upper bounds (milliseconds) of the buckets in the pool wait-time histogram
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 5000)
+
+# InnoDB rolls the whole transaction back on these, running it again is safe
+RETRYABLE_ERRORS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+
+class PoolExhausted(Exception):
+    """Raised when no pooled connection became free within the wait timeout."""
+    pass
+
+
+class PooledConnection:
+    """
+    A checked out connection. Everything is delegated to the real connection,
+    cursors are instrumented (see app/query_stats.py) and close() hands the
+    connection back to the pool and frees the slot for the next waiter.
+    """
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), current_query_stats())
+
+    def physical_connection(self):
+        """The connector's own connection, which outlives checkouts (app/prepared.py caches statements on it)."""
+        # PooledMySQLConnection has no public accessor for it
+        return self._conn._cnx
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            if not self._pool.resets_session:
+                # without the session reset an open transaction would carry over to the next
+                # checkout (and its snapshot with it), end it here instead; in_transaction comes
+                # from the last server status, so an idle connection costs no round trip
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                except Error as e:
+                    logger.warning("Rollback on release failed: %s", e)
+            conn.close()
+        finally:
+            self._pool._release()
+
+
+class RequestConnection:
     """
-    Initialize the database connection pool.
-    This function is called when the application starts.
+    The connection shared by everything that runs during one request
+    (token_required and the handler). close() is a no-op here, the
+    connection is given back to the pool when the request is torn down.
     """
-    # The connection pool is already initialized in config.py
-    # We just need to make sure the app has access to the configuration
-    app.config.from_object(Config)
-    
-    # Test the connection
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        pass
+
+
+class BoundedConnectionPool:
+    """
+    Wraps MySQLConnectionPool so callers wait up to wait_timeout seconds for a free
+    connection instead of failing straight away, and keeps statistics about it.
+    """
+
+    def __init__(self, pool_size, wait_timeout, **dbconfig):
+        self._pool = pooling.MySQLConnectionPool(pool_size=pool_size, **dbconfig)
+        self.size = pool_size
+        self.resets_session = self._pool.reset_session
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiters = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def get_connection(self, timeout=None):
+        timeout = self.wait_timeout if timeout is None else timeout
+        start = time.monotonic()
+        with self._lock:
+            self._waiters += 1
+        try:
+            acquired = self._slots.acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self._waiters -= 1
+        waited = time.monotonic() - start
+
+        if not acquired:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolExhausted(f"No database connection available after {timeout}s")
+
+        try:
+            conn = self._pool.get_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            waited_ms = waited * 1000
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if waited_ms <= bound:
+                    self._histogram[i] += 1
+                    break
+            else:
+                self._histogram[-1] += 1
+        return PooledConnection(conn, self)
+
+    def _release(self):
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    def close(self):
+        # closes the idle connections, checked out ones are closed when they come back
+        # (MySQLConnectionPool has no public call for this)
+        self._pool._remove_connections()
+
+    def stats(self):
+        with self._lock:
+            buckets = {f"<={bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self._histogram)}
+            buckets[f">{WAIT_BUCKETS_MS[-1]}ms"] = self._histogram[-1]
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': self.size - self._in_use,
+                'waiters': self._waiters,
+                'acquired': self._acquired,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': round(self._total_wait * 1000 / self._acquired, 3) if self._acquired else 0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+                'wait_histogram': buckets,
+            }
+
+
+def run_in_transaction(conn, work, attempts=3, backoff=0.02):
+    """
+    Run work(cursor) as one transaction and commit it, returning what work returned.
+    On a deadlock or lock wait timeout the transaction is rolled back and run again,
+    up to attempts times, after a short randomized pause. Any other error rolls
+    back and is raised.
+    """
+    for attempt in range(1, attempts + 1):
+        cursor = conn.cursor(dictionary=True, buffered=True)
+        try:
+            result = work(cursor)
+            conn.commit()
+            return result
+        except Error as e:
+            conn.rollback()
+            if e.errno not in RETRYABLE_ERRORS or attempt == attempts:
+                raise
+            logger.warning("Transaction failed with %s, retrying (attempt %s of %s)", e.errno, attempt, attempts)
+            time.sleep(random.uniform(0, backoff * 2 ** attempt))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+# Set by app/replicas.py when read replicas are configured: a callable returning a
+# replica connection for the current request, or None to stay on the primary
+_replica_source = None
+
+def set_replica_source(source):
+    global _replica_source
+    _replica_source = source
+
+
+def read_only(view):
+    """
+    Mark a view as read-only: its queries may be served by a read replica.
+    Goes between @route and the other decorators so the registered view carries it.
+    """
+    view.read_only = True
+    return view
+
+
+def use_primary():
+    """Keep the rest of this request on the primary, even in a read-only view."""
+    g._force_primary = True
+
+
+def _wants_replica():
+    if _replica_source is None or g.get('_force_primary'):
+        return False
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'read_only', False)
+
+
+def request_connection(pool):
+    """
+    Return the connection of the current request, checking one out of the pool
+    the first time it is asked for. Read-only views get a replica connection when
+    one is available. Outside a request a plain pooled connection is returned.
+    """
+    if not has_request_context():
+        return pool.get_connection()
+    conn = g.get('_db_conn')
+    if conn is None:
+        replica = _replica_source() if _wants_replica() else None
+        if replica is not None:
+            g.db_replica = True
+            conn = RequestConnection(replica)
+        else:
+            try:
+                conn = RequestConnection(pool.get_connection())
+            except PoolExhausted:
+                g.pool_exhausted = True
+                raise
+        g._db_conn = conn
+    return conn
+
+
+def release_request_connection(exc=None):
+    conn = g.pop('_db_conn', None)
+    if conn is None:
+        return
     try:
-        conn = get_db_connection()
-        conn.close()
-        print("Database connection successful")
+        if exc is not None:
+            conn.rollback()
     except Exception as e:
-        print(f"Error connecting to database: {e}")
-        raise 
\ No newline at end of file
+        logger.error("Error rolling back request connection: %s", e)
+    finally:
+        conn._conn.close()
+
+
+def init_db(app):
+    """
+    Hook the request scoped connection into the application.
+    The connection is released when the request is torn down, and requests
+    that failed because the pool was exhausted get a 503 instead of a 500.
+    """
+    app.teardown_request(release_request_connection)
+
+    def pool_exhausted_response():
+        response = jsonify({"error": "Server is busy, please try again shortly"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+
+    @app.errorhandler(PoolExhausted)
+    def handle_pool_exhausted(error):
+        return pool_exhausted_response()
+
+    @app.after_request
+    def degrade_pool_exhaustion(response):
+        # most routes catch every exception and answer 500 themselves
+        if response.status_code == 500 and g.get('pool_exhausted'):
+            return pool_exhausted_response()
+        return response
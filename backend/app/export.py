@@ -0,0 +1,61 @@
+import csv
+import io
+from flask import Response, current_app, request, stream_with_context
+from .compression import skip_compression
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# rows are taken from the cursor in batches and written out in chunks of about this size
+FETCH_BATCH = 1000
+CHUNK_BYTES = 64 * 1024
+
+
+def _encode_rows(cursor, columns, fmt):
+    """Yield encoded chunks of the result set, never holding more than one batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    dumps = current_app.json.dumps
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH)
+        if not rows:
+            break
+        for row in rows:
+            if writer:
+                writer.writerow(row)
+            else:
+                buffer.write(dumps(dict(zip(columns, row))))
+                buffer.write('\n')
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def stream_export(conn, cursor, columns, fmt, filename):
+    """
+    Stream an executed, unbuffered cursor to the client as NDJSON or CSV.
+    Memory stays constant however many rows there are: rows are read in batches
+    straight off the socket and written out as they arrive. The cursor and
+    connection are closed when the stream ends. The stream is compressed on the way
+    out by app/compression.py; ?gzip=0 asks for it uncompressed (e.g. when piping to a tool).
+    """
+    def generate():
+        try:
+            for chunk in _encode_rows(cursor, columns, fmt):
+                yield chunk
+        finally:
+            cursor.close()
+            conn.close()
+
+    if request.args.get('gzip') in ('0', 'false'):
+        skip_compression()
+    response = Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,94 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+#bcrypt is deliberately slow and holds the CPU for the whole hash, so it runs in a
+#separate pool of processes instead of on the request thread
+import bcrypt
+from .config import Config
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing pool cannot answer in time: it already has as much work queued
+    as it is allowed to, the hash did not finish within HASH_TIMEOUT or its processes died.
+    """
+    pass
+
+
+# These run inside the worker processes, so they must be plain top level functions
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+_executor = None
+_executor_pid = None
+_slots = None
+_lock = threading.Lock()
+
+def _get_executor():
+    # The pool is created lazily and recreated after a fork, a child process
+    # must never reuse the pool of its parent
+    global _executor, _executor_pid, _slots
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=Config.HASH_WORKERS)
+            _executor_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(Config.HASH_QUEUE_DEPTH)
+        return _executor, _slots
+
+def _discard_executor(executor):
+    # a pool whose worker died is unusable, the next call starts a new one
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+def _run(fn, *args):
+    executor, slots = _get_executor()
+    # fail fast instead of queueing behind a login storm
+    if not slots.acquire(blocking=False):
+        raise HashingBusy("Password hashing is saturated, try again shortly")
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        slots.release()
+        _discard_executor(executor)
+        raise HashingBusy("Password hashing pool restarted, try again shortly")
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    #an overloaded or broken pool is a server problem, never a wrong password:
+    #callers answer 503 for it instead of treating it as a failed check
+    try:
+        return future.result(timeout=Config.HASH_TIMEOUT)
+    except FutureTimeoutError:
+        raise HashingBusy("Password hashing timed out, try again shortly")
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise HashingBusy("Password hashing pool restarted, try again shortly")
+
+def hash_password(password):
+    return _run(_hashpw, password, Config.BCRYPT_ROUNDS)
+
+def check_password(password, hashed):
+    return _run(_checkpw, password, hashed)
+
+def needs_rehash(hashed):
+    """True when a stored bcrypt hash ($2b$<cost>$...) was made with a different cost than configured."""
+    try:
+        return int(hashed.split('$')[2]) != Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError, AttributeError):
+        return False
+
+def shutdown():
+    global _executor
+    with _lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,72 @@
+# Process lifecycle for production serving (see gunicorn.conf.py).
+# Workers are forked from a master that imported the app, so anything holding
+# sockets or threads is set up again in each worker, and torn down when the
+# worker exits after finishing its in-flight requests.
+import logging
+import threading
+from flask import jsonify
+from . import config, hashing
+from .replicas import close_replica_pools, get_replica_router
+from .logging_setup import restart_logging_after_fork, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+# Set once the worker was asked to stop; /ready answers 503 from then on so the
+# load balancer stops sending new requests while the in-flight ones finish
+draining = threading.Event()
+
+
+def after_fork():
+    """Run in each worker right after the fork."""
+    restart_logging_after_fork()
+    # the pool and the hashing executor are created lazily per process, nothing is opened here;
+    # the replica lag checks start now so they are known before the first read-only request
+    get_replica_router()
+    draining.clear()
+
+
+def begin_drain():
+    draining.set()
+    logger.info("Draining, readiness reports 503 until the worker exits")
+
+
+def shutdown():
+    """Run in each worker after its last request: release connections, processes and the log thread."""
+    draining.set()
+    try:
+        config.close_connection_pool()
+        close_replica_pools()
+        hashing.shutdown()
+    except Exception as e:
+        logger.error("Error during shutdown: %s", e)
+    finally:
+        shutdown_logging()
+
+
+def register_health_routes(app):
+    @app.route('/health')
+    def health():
+        # liveness: the process answers, nothing else is checked
+        return jsonify({"status": "ok"}), 200
+
+    @app.route('/ready')
+    def ready():
+        # readiness: not draining and the database answers through this worker's pool
+        if draining.is_set():
+            return jsonify({"status": "draining"}), 503
+        conn = None
+        cursor = None
+        try:
+            conn = config.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        except Exception as e:
+            logger.warning("Readiness check failed: %s", e)
+            return jsonify({"status": "unavailable", "error": "database unreachable"}), 503
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+        return jsonify({"status": "ready", "pool": config.get_connection_pool().stats()}), 200
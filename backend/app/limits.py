@@ -0,0 +1,383 @@
+# Admission control for the expensive paths.
+# Every request spends tokens from two buckets, one per client IP and, when it carries a
+# valid token, one per user; the cost is 1 unless the view declares more with @rate_cost.
+# An empty bucket answers 429. Blueprints listed in CONCURRENCY_LIMITS admit only that many
+# requests at once per worker, the rest get a 503. Both checks run in before_request, so a
+# rejected request never takes a database connection. Logins for an account with too many
+# recent failures from the same address, or from an address with far too many, get a 429
+# before bcrypt runs.
+# Buckets and failure counters live in this process ('memory') or in a sqlite file shared by
+# every worker on the host ('sqlite'), like the response cache.
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import jwt
+from flask import g, request, jsonify, current_app
+from .cache import TTLCache
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Requests that are never limited: CORS preflights and the load balancer's probes
+EXEMPT_METHODS = ('OPTIONS',)
+EXEMPT_ENDPOINTS = ('health', 'ready')
+
+
+class MemoryLimitStore:
+    """Per-process buckets and counters."""
+
+    def __init__(self, maxsize=100000):
+        # a bucket left alone until it refilled is dropped, a missing bucket is a full one
+        self._buckets = TTLCache(maxsize=maxsize)
+        self._counters = TTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def take(self, key, cost, rate, burst):
+        """Take cost tokens from key's bucket; returns 0 when admitted, else the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            self._buckets.set(key, (tokens - cost, now), ttl=burst / rate)
+            return 0
+
+    def hit(self, key, window):
+        """Count one event for key; the count starts over window seconds after the first one."""
+        with self._lock:
+            count, expires_at = self._counters.get(key, (0, time.monotonic() + window))
+            count += 1
+            self._counters.set(key, (count, expires_at), ttl=max(expires_at - time.monotonic(), 0))
+            return count
+
+    def count(self, key):
+        with self._lock:
+            return self._counters.get(key, (0, None))[0]
+
+    def reset(self, key):
+        self._counters.delete(key)
+
+
+class SqliteLimitStore:
+    """
+    Buckets and counters in a sqlite file, so the limits hold across the worker processes
+    of a host. Each update is one IMMEDIATE transaction, serialized by sqlite's write lock.
+    """
+
+    # expired rows are swept every this many updates
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._updates = 0
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    bucket_key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS rate_counters (
+                    counter_key TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        # sqlite connections cannot be shared between threads, so open one per call;
+        # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _update(self, work):
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(db, time.time())
+                self._updates += 1
+                if self._updates % self.SWEEP_EVERY == 0:
+                    now = time.time()
+                    db.execute("DELETE FROM rate_buckets WHERE expires_at <= ?", (now,))
+                    db.execute("DELETE FROM rate_counters WHERE expires_at <= ?", (now,))
+                db.execute("COMMIT")
+                return result
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        finally:
+            db.close()
+
+    def take(self, key, cost, rate, burst):
+        def work(db, now):
+            row = db.execute(
+                "SELECT tokens, updated_at FROM rate_buckets WHERE bucket_key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            db.execute(
+                "INSERT OR REPLACE INTO rate_buckets (bucket_key, tokens, updated_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, tokens - cost, now, now + burst / rate)
+            )
+            return 0
+        return self._update(work)
+
+    def hit(self, key, window):
+        def work(db, now):
+            row = db.execute(
+                "SELECT count, expires_at FROM rate_counters WHERE counter_key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            count, expires_at = (row[0] + 1, row[1]) if row else (1, now + window)
+            db.execute(
+                "INSERT OR REPLACE INTO rate_counters (counter_key, count, expires_at) VALUES (?, ?, ?)",
+                (key, count, expires_at)
+            )
+            return count
+        return self._update(work)
+
+    def count(self, key):
+        db = self._connect()
+        try:
+            row = db.execute(
+                "SELECT count FROM rate_counters WHERE counter_key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        finally:
+            db.close()
+        return row[0] if row else 0
+
+    def reset(self, key):
+        db = self._connect()
+        try:
+            db.execute("DELETE FROM rate_counters WHERE counter_key = ?", (key,))
+        finally:
+            db.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_limit_store():
+    """Build the store selected by Config.RATE_LIMIT_BACKEND on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if Config.RATE_LIMIT_BACKEND == 'sqlite':
+                _store = SqliteLimitStore(Config.RATE_LIMIT_PATH)
+            else:
+                _store = MemoryLimitStore()
+        return _store
+
+
+class Rejections:
+    """Requests turned away since startup, per reason and endpoint, per worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def add(self, reason, endpoint):
+        with self._lock:
+            key = f"{reason}:{endpoint}"
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+rejections = Rejections()
+
+
+def rate_cost(cost):
+    """
+    Declare how many tokens a request to this view spends (default 1).
+    Goes between @route and the other decorators so the registered view carries it.
+    """
+    def decorator(view):
+        view.rate_cost = cost
+        return view
+    return decorator
+
+
+def client_ip():
+    # with RATE_LIMIT_PROXY_HOPS proxies in front, the client is the address the
+    # outermost of them saw, counted from the end of X-Forwarded-For
+    hops = Config.RATE_LIMIT_PROXY_HOPS
+    forwarded = request.headers.get('X-Forwarded-For')
+    if hops and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[max(len(addresses) - hops, 0)]
+    return request.remote_addr or 'unknown'
+
+
+def _token_user():
+    # the user for the per-user bucket, without a database lookup; an invalid token
+    # only counts against the IP, token_required rejects it later
+    auth_header = request.headers.get('Authorization', '')
+    parts = auth_header.split(' ')
+    if len(parts) != 2:
+        return None
+    try:
+        data = jwt.decode(parts[1], Config.SECRET_KEY, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return f"{data.get('role')}:{data.get('user_id')}"
+
+
+def _limited_response(status, message, retry_after):
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _check_rate(endpoint, cost):
+    store = get_limit_store()
+    buckets = [(f"ip:{client_ip()}", Config.RATE_LIMIT_IP, Config.RATE_LIMIT_IP_BURST)]
+    user = _token_user()
+    if user:
+        buckets.append((f"user:{user}", Config.RATE_LIMIT_USER, Config.RATE_LIMIT_USER_BURST))
+    for key, rate, burst in buckets:
+        # a view costing more than the burst could never run, charge it the whole bucket
+        wait = store.take(key, min(cost, burst), rate, burst)
+        if wait:
+            rejections.add('rate', endpoint)
+            logger.warning("Rate limit hit by %s on %s", key, endpoint, extra={'endpoint': endpoint})
+            return _limited_response(429, "Too many requests, please slow down", wait)
+    return None
+
+
+class ConcurrencyCap:
+    """At most limit requests of one blueprint running at once in this worker."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.in_use >= self.limit:
+                return False
+            self.in_use += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+
+
+# blueprint name -> ConcurrencyCap, from Config.CONCURRENCY_LIMITS ("dashboard=2,cart=3")
+concurrency_caps = {}
+
+def _parse_concurrency_limits(spec):
+    caps = {}
+    for entry in (e.strip() for e in spec.split(',') if e.strip()):
+        blueprint, _, limit = entry.partition('=')
+        caps[blueprint.strip()] = ConcurrencyCap(int(limit))
+    return caps
+
+
+def _login_failure_keys(email):
+    ip = client_ip()
+    return f"login-ip:{ip}", f"login-ip-account:{ip}:{email.lower()}"
+
+def login_blocked(email):
+    """True when the account had too many failed logins from this client, or the client over all accounts."""
+    if not Config.RATE_LIMITS_ENABLED:
+        return False
+    store = get_limit_store()
+    ip_key, account_key = _login_failure_keys(email)
+    try:
+        return (store.count(account_key) >= Config.LOGIN_MAX_FAILURES_PER_IP_ACCOUNT
+                or store.count(ip_key) >= Config.LOGIN_MAX_FAILURES_PER_IP)
+    except Exception as e:
+        logger.error("Failed login lookup error: %s", e)
+        return False
+
+def note_failed_login(email):
+    if not Config.RATE_LIMITS_ENABLED:
+        return
+    store = get_limit_store()
+    try:
+        for key in _login_failure_keys(email):
+            store.hit(key, Config.LOGIN_FAILURE_WINDOW)
+    except Exception as e:
+        logger.error("Failed login bookkeeping error: %s", e)
+
+def clear_failed_logins(email):
+    # only this account from this address: other accounts tried from it stay counted
+    if not Config.RATE_LIMITS_ENABLED:
+        return
+    try:
+        get_limit_store().reset(_login_failure_keys(email)[1])
+    except Exception as e:
+        logger.error("Failed login bookkeeping error: %s", e)
+
+def login_blocked_response():
+    rejections.add('login', request.endpoint)
+    logger.warning("Login refused for %s after repeated failures", client_ip())
+    return _limited_response(429, "Too many failed logins, please try again later", Config.LOGIN_FAILURE_WINDOW)
+
+
+def limit_stats():
+    return {
+        'rejected': rejections.snapshot(),
+        'concurrency': {
+            blueprint: {'in_use': cap.in_use, 'limit': cap.limit}
+            for blueprint, cap in concurrency_caps.items()
+        },
+    }
+
+
+def init_limits(app):
+    """Check the rate limits and the concurrency caps before each request runs."""
+    if not Config.RATE_LIMITS_ENABLED:
+        return
+    concurrency_caps.update(_parse_concurrency_limits(Config.CONCURRENCY_LIMITS))
+
+    @app.before_request
+    def admit():
+        endpoint = request.endpoint
+        if request.method in EXEMPT_METHODS or endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+            return None
+        view = current_app.view_functions.get(endpoint)
+        try:
+            limited = _check_rate(endpoint, getattr(view, 'rate_cost', 1))
+        except Exception as e:
+            # the limiter must not take the site down with it
+            logger.error("Rate limit check error: %s", e)
+            limited = None
+        if limited is not None:
+            return limited
+
+        cap = concurrency_caps.get(request.blueprint)
+        if cap is not None:
+            if not cap.acquire():
+                rejections.add('concurrency', endpoint)
+                return _limited_response(503, "Server is busy, please try again shortly", 1)
+            g._admission_cap = cap
+        return None
+
+    @app.teardown_request
+    def release_admission(exc=None):
+        # a streamed response keeps its slot until the stream ends (stream_with_context)
+        cap = g.pop('_admission_cap', None)
+        if cap is not None:
+            cap.release()
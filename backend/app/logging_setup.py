@@ -0,0 +1,125 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+#QueueHandler only puts the record on an in-memory queue, so the request thread never waits on disk or stdout
+#QueueListener runs a background thread that takes records off the queue and hands them to the real handlers
+from .config import Config
+
+# attributes every LogRecord has, anything else was passed through extra={...}
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, source location and any extra fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'location': f"{record.pathname}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Let through only a fraction of DEBUG records so hot path debug events stay
+    affordable when debug logging is turned on. Other levels always pass.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def parse_levels(spec):
+    """Turn 'app.auth=WARNING,app.routes.cart_routes=DEBUG' into a {logger: level} dict."""
+    levels = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        name, _, level = part.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_listener = None
+_queue_handler = None
+
+def configure_logging(app):
+    """
+    Route every 'app.*' logger (and the Flask app logger) through one queue.
+    A background listener writes the records to stderr and, with LOG_TO_FILE, to a rotating
+    JSON log file. Rotation is not safe across processes, so prefork servers log to stderr only.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    handlers = []
+    if Config.LOG_TO_FILE:
+        if not os.path.exists(Config.LOG_DIR):
+            os.makedirs(Config.LOG_DIR, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            os.path.join(Config.LOG_DIR, 'picksart.log'),
+            maxBytes=Config.LOG_MAX_BYTES,
+            backupCount=Config.LOG_BACKUP_COUNT
+        )
+        file_handler.setFormatter(JSONFormatter())
+        handlers.append(file_handler)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handlers.append(stream_handler)
+
+    log_queue = queue.Queue(-1)
+    queue_handler = _queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(Config.LOG_DEBUG_SAMPLE_RATE))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root = logging.getLogger('app')
+    root.setLevel(Config.LOG_LEVEL)
+    root.addHandler(queue_handler)
+    root.propagate = False
+    for name, level in parse_levels(Config.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    app.logger.handlers = [queue_handler]
+    app.logger.setLevel(Config.LOG_LEVEL)
+
+def restart_logging_after_fork():
+    """
+    The listener thread does not survive a fork. Give the child a fresh queue
+    (the parent's may have been locked mid-put) and a listener thread of its own
+    writing to the same handlers.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(-1)
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    # flush whatever is still queued, the listener thread is not a daemon we can just drop
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
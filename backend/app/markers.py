@@ -0,0 +1,122 @@
+# Short-lived markers shared by the worker processes of a host.
+# A marker is a key with a timestamp that expires after a ttl: "this principal was
+# invalidated at t" (app/auth.py), "this user or cache namespace was written to at t"
+# (read-your-writes, below). Workers keep their own in-process caches, a marker
+# set by one worker is how the others learn that their copy is stale.
+# 'sqlite' (the default) shares the markers through a file on the host, 'memory' keeps
+# them per process and only fits a single worker.
+import logging
+import os
+import sqlite3
+import threading
+import time
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryMarkerStore:
+    """Per-process markers."""
+
+    def __init__(self, maxsize=100000):
+        # imported here, app/cache.py imports this module for the write markers
+        from .cache import TTLCache
+        self._markers = TTLCache(maxsize=maxsize)
+
+    def set(self, key, ttl, value=None):
+        self._markers.set(key, time.time() if value is None else value, ttl=ttl)
+
+    def get(self, key):
+        return self._markers.get(key)
+
+
+class SqliteMarkerStore:
+    """Markers in a sqlite file, so every worker process on the host sees them."""
+
+    # expired rows are swept every this many writes
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS markers (
+                    marker_key TEXT PRIMARY KEY,
+                    value REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        # sqlite connections cannot be shared between threads, so open one per call
+        return sqlite3.connect(self.path, timeout=5)
+
+    def set(self, key, ttl, value=None):
+        now = time.time()
+        db = self._connect()
+        try:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO markers (marker_key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, now if value is None else value, now + ttl)
+                )
+                self._writes += 1
+                if self._writes % self.SWEEP_EVERY == 0:
+                    db.execute("DELETE FROM markers WHERE expires_at <= ?", (now,))
+        finally:
+            db.close()
+
+    def get(self, key):
+        db = self._connect()
+        try:
+            row = db.execute(
+                "SELECT value FROM markers WHERE marker_key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        finally:
+            db.close()
+        return row[0] if row else None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_marker_store():
+    """Build the store selected by Config.MARKER_BACKEND on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if Config.MARKER_BACKEND == 'memory':
+                _store = MemoryMarkerStore()
+            else:
+                _store = SqliteMarkerStore(Config.MARKER_PATH)
+        return _store
+
+
+# Recent writes, for read-your-writes when reads go to replicas (see app/replicas.py):
+# a user's own writes (keyed by principal) and every write to a cached namespace (keyed
+# by namespace, for the public reads that carry no principal)
+
+def note_write(key):
+    """Remember that key (a user, a cache namespace) was written to, for READ_YOUR_WRITES_WINDOW seconds."""
+    if not Config.MYSQL_REPLICA_HOSTS:
+        return
+    try:
+        get_marker_store().set(f"write:{key}", Config.READ_YOUR_WRITES_WINDOW)
+    except Exception as e:
+        logger.error("Recent write bookkeeping error: %s", e)
+
+def wrote_recently(key):
+    if not Config.MYSQL_REPLICA_HOSTS:
+        return False
+    try:
+        return get_marker_store().get(f"write:{key}") is not None
+    except Exception as e:
+        logger.error("Recent write lookup error: %s", e)
+        # unknown, the primary is always correct
+        return True
@@ -0,0 +1,85 @@
+from .utils import encode_cursor
+
+def load_order_history(conn, customer_id, status=None, limit=None, after=None):
+    """
+    Load a customer's orders together with their items and shipping details.
+    Always three queries (orders, items, shipping) however many orders the customer has;
+    the rows are grouped per order in Python.
+
+    status - only orders with this status
+    limit  - page size, None means every order
+    after  - decoded (created_at, order_id) cursor of the last order on the previous page
+
+    Returns (orders, next_cursor). Each order is the orders row plus an 'items' list
+    and a 'shipping' dict (or None).
+    """
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    try:
+        conditions = ["customer_id = %s"]
+        params = [customer_id]
+        if status:
+            conditions.append("status = %s")
+            params.append(status)
+        if after:
+            conditions.append("(created_at < %s OR (created_at = %s AND order_id < %s))")
+            params.extend([after[0], after[0], after[1]])
+        query = f"""
+            SELECT order_id, total_amount, status, created_at
+            FROM orders
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_at DESC, order_id DESC
+        """
+        if limit:
+            # one extra row tells us whether there is another page
+            query += " LIMIT %s"
+            params.append(limit + 1)
+        cursor.execute(query, tuple(params))
+        orders = cursor.fetchall()
+
+        next_cursor = None
+        if limit and len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = encode_cursor(orders[-1]['created_at'], orders[-1]['order_id'])
+
+        if not orders:
+            return [], None
+
+        by_id = {}
+        for order in orders:
+            order['items'] = []
+            order['shipping'] = None
+            by_id[order['order_id']] = order
+        placeholders = ', '.join(['%s'] * len(by_id))
+        order_ids = tuple(by_id)
+
+        cursor.execute(f"""
+            SELECT 
+                oi.order_id,
+                oi.artwork_id,
+                oi.quantity,
+                oi.price_at_time,
+                a.title,
+                a.image_url,
+                ar.name as artist_name
+            FROM order_items oi
+            JOIN artworks a ON oi.artwork_id = a.artwork_id
+            JOIN artists ar ON a.artist_id = ar.artist_id
+            WHERE oi.order_id IN ({placeholders})
+            ORDER BY oi.order_item_id
+        """, order_ids)
+        for item in cursor.fetchall():
+            by_id[item['order_id']]['items'].append(item)
+
+        cursor.execute(f"""
+            SELECT order_id, address, phone_number
+            FROM shipping_details
+            WHERE order_id IN ({placeholders})
+            ORDER BY shipping_id
+        """, order_ids)
+        #later rows overwrite earlier ones so each order ends up with its latest shipping details
+        for shipping in cursor.fetchall():
+            by_id[shipping['order_id']]['shipping'] = shipping
+
+        return orders, next_cursor
+    finally:
+        cursor.close()
@@ -0,0 +1,155 @@
+# Server side prepared statements for the hot lookups (principal, pending order, cart items).
+# Every physical connection keeps its prepared cursors in a small LRU cache: MySQL parses a
+# statement once per connection and later executions only send the parameters, through the
+# binary protocol. The pools do not reset the session when a connection is handed back
+# (see dbconfig in config.py), so the statements outlive the checkout. A reconnect starts a
+# new session on the server, the connection's cache then starts over.
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from decimal import Decimal
+from mysql.connector.constants import FieldType
+from .query_stats import InstrumentedCursor, current_query_stats
+
+logger = logging.getLogger(__name__)
+
+# Set from the app config by init_prepared_statements()
+settings = {
+    'enabled': True,
+    'cache_size': 32,
+}
+
+# The binary protocol of the pure Python connector hands DECIMAL columns over as text
+DECIMAL_TYPES = (FieldType.DECIMAL, FieldType.NEWDECIMAL)
+
+
+class StatementCache:
+    """The prepared cursors of one physical connection, least recently used first."""
+
+    def __init__(self):
+        self.session = None
+        self._cursors = OrderedDict()
+
+    def get(self, cnx, statement):
+        """
+        Return (statement, cursor) for statement on cnx, preparing it on first use.
+        The connector prepares again whenever it is given a different string object,
+        so the cached statement object is the one to execute.
+        """
+        if cnx.connection_id != self.session:
+            # reconnected: the server already dropped the old statements
+            if self._cursors:
+                counters.add('reconnects')
+            self._cursors.clear()
+            self.session = cnx.connection_id
+        entry = self._cursors.get(statement)
+        if entry is not None:
+            self._cursors.move_to_end(statement)
+            counters.add('hits')
+            return entry
+        counters.add('prepares')
+        while len(self._cursors) >= settings['cache_size']:
+            _, (_, evicted) = self._cursors.popitem(last=False)
+            _close_quietly(evicted)
+            counters.add('evictions')
+        entry = self._cursors[statement] = (statement, cnx.cursor(prepared=True))
+        return entry
+
+    def discard(self, statement):
+        entry = self._cursors.pop(statement, None)
+        if entry is not None:
+            _close_quietly(entry[1])
+
+
+def _close_quietly(cursor):
+    # deallocates the statement on the server, nothing to do if the connection is gone
+    try:
+        cursor.close()
+    except Exception as e:
+        logger.debug("Closing prepared statement failed: %s", e)
+
+
+class Counters:
+    """Statement cache activity since startup, per worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {'hits': 0, 'prepares': 0, 'evictions': 0, 'reconnects': 0}
+
+    def add(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['prepares']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else 0
+        return counts
+
+
+counters = Counters()
+
+# physical connection -> its StatementCache; an entry goes away with its connection
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+def _cache_for(cnx):
+    with _caches_lock:
+        cache = _caches.get(cnx)
+        if cache is None:
+            cache = _caches[cnx] = StatementCache()
+        return cache
+
+
+def _rows(cursor, dictionary):
+    rows = cursor.fetchall() if cursor.with_rows else []
+    decimals = [i for i, column in enumerate(cursor.description or ()) if column[1] in DECIMAL_TYPES]
+    if decimals:
+        rows = [
+            tuple(Decimal(value) if i in decimals and value is not None else value for i, value in enumerate(row))
+            for row in rows
+        ]
+    if dictionary:
+        names = cursor.column_names
+        rows = [dict(zip(names, row)) for row in rows]
+    return rows
+
+
+def fetch_all(conn, statement, params=(), dictionary=True):
+    """
+    Run a read statement as a server side prepared statement on conn and return all its
+    rows (dictionaries by default). Falls back to a plain buffered cursor when prepared
+    statements are turned off or conn is not a pooled connection.
+    """
+    physical = conn.physical_connection() if settings['enabled'] and hasattr(conn, 'physical_connection') else None
+    if physical is None:
+        cursor = conn.cursor(dictionary=dictionary, buffered=True)
+        try:
+            cursor.execute(statement, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    cache = _cache_for(physical)
+    statement, cursor = cache.get(physical, statement)
+    instrumented = InstrumentedCursor(cursor, current_query_stats())
+    try:
+        instrumented.execute(statement, params)
+        return _rows(instrumented, dictionary)
+    except Exception:
+        # the cursor may be left with an unread result or a stale statement, prepare it again next time
+        cache.discard(statement)
+        raise
+
+
+def fetch_one(conn, statement, params=(), dictionary=True):
+    """Like fetch_all, for statements returning at most one row; returns the row or None."""
+    rows = fetch_all(conn, statement, params, dictionary)
+    return rows[0] if rows else None
+
+
+def init_prepared_statements(app):
+    settings['enabled'] = app.config['PREPARED_STATEMENTS']
+    settings['cache_size'] = app.config['PREPARED_STATEMENT_CACHE_SIZE']
@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from flask import g, has_request_context, request, jsonify, current_app
+
+logger = logging.getLogger(__name__)
+
+# Set from the app config by init_query_stats(), cursors outside a request use them too
+settings = {
+    'slow_query_ms': 200.0,
+    'headers': False,
+    'strict_budgets': False,
+}
+
+# How many of the slowest statements are kept per request and per endpoint
+SLOWEST_KEPT = 5
+# Statements are shortened to this many characters in logs and stats
+STATEMENT_PREVIEW = 300
+
+
+def _preview(statement):
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', 'replace')
+    return ' '.join(str(statement).split())[:STATEMENT_PREVIEW]
+
+
+def _keep_slowest(slowest, duration, statement):
+    slowest.append((duration, statement))
+    slowest.sort(key=lambda entry: entry[0], reverse=True)
+    del slowest[SLOWEST_KEPT:]
+
+
+class RequestQueryStats:
+    """Queries issued, time spent in the database and rows fetched during one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.slowest = []
+
+    def record(self, statement, duration):
+        self.queries += 1
+        self.db_time += duration
+        if not self.slowest or len(self.slowest) < SLOWEST_KEPT or duration > self.slowest[-1][0]:
+            _keep_slowest(self.slowest, duration, _preview(statement))
+
+
+def current_query_stats():
+    """The stats of the current request, None outside a request."""
+    if not has_request_context():
+        return None
+    stats = g.get('_query_stats')
+    if stats is None:
+        stats = g._query_stats = RequestQueryStats()
+    return stats
+
+
+class InstrumentedCursor:
+    """
+    Wraps a mysql connector cursor: times every statement, counts fetched rows
+    into the request's stats and logs statements slower than the threshold.
+    Everything else is delegated to the real cursor.
+    """
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._count_rows(1)
+            yield row
+
+    def _timed(self, method, statement, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(statement, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            if self._stats is not None:
+                self._stats.record(statement, duration)
+            if duration * 1000 >= settings['slow_query_ms']:
+                logger.warning(
+                    "Slow query (%.1f ms): %s", duration * 1000, _preview(statement),
+                    extra={
+                        'duration_ms': round(duration * 1000, 3),
+                        'endpoint': request.endpoint if has_request_context() else None,
+                    }
+                )
+
+    def _count_rows(self, count):
+        if self._stats is not None:
+            self._stats.rows += count
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def callproc(self, procname, *args, **kwargs):
+        return self._timed(self._cursor.callproc, procname, *args, **kwargs)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count_rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count_rows(len(rows))
+        return rows
+
+
+class EndpointQueryStats:
+    """Query statistics aggregated per endpoint since startup (or the last reset), per worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def add(self, endpoint, stats, budget_exceeded):
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {
+                    'requests': 0, 'queries': 0, 'max_queries': 0, 'db_time': 0.0, 'max_db_time': 0.0,
+                    'rows': 0, 'budget_exceeded': 0, 'slowest': [],
+                }
+            entry['requests'] += 1
+            entry['queries'] += stats.queries
+            entry['max_queries'] = max(entry['max_queries'], stats.queries)
+            entry['db_time'] += stats.db_time
+            entry['max_db_time'] = max(entry['max_db_time'], stats.db_time)
+            entry['rows'] += stats.rows
+            if budget_exceeded:
+                entry['budget_exceeded'] += 1
+            for duration, statement in stats.slowest:
+                _keep_slowest(entry['slowest'], duration, statement)
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for endpoint, entry in self._endpoints.items():
+                requests = entry['requests']
+                result[endpoint] = {
+                    'requests': requests,
+                    'avg_queries': round(entry['queries'] / requests, 2),
+                    'max_queries': entry['max_queries'],
+                    'avg_db_time_ms': round(entry['db_time'] * 1000 / requests, 3),
+                    'max_db_time_ms': round(entry['max_db_time'] * 1000, 3),
+                    'total_db_time_ms': round(entry['db_time'] * 1000, 3),
+                    'avg_rows': round(entry['rows'] / requests, 2),
+                    'budget_exceeded': entry['budget_exceeded'],
+                    'slowest': [
+                        {'duration_ms': round(duration * 1000, 3), 'statement': statement}
+                        for duration, statement in entry['slowest']
+                    ],
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+endpoint_stats = EndpointQueryStats()
+
+
+def query_budget(max_queries):
+    """
+    Declare the most queries a view may issue per request. Requests over budget
+    are logged and counted; with QUERY_BUDGET_STRICT (tests) they fail with a 500.
+    Goes between @route and the other decorators so the registered view carries it.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def init_query_stats(app):
+    """Read the instrumentation settings and hook the per request bookkeeping into the app."""
+    settings['slow_query_ms'] = app.config['SLOW_QUERY_MS']
+    settings['headers'] = app.config['QUERY_STATS_HEADERS']
+    settings['strict_budgets'] = app.config['QUERY_BUDGET_STRICT']
+
+    @app.after_request
+    def record_query_stats(response):
+        stats = g.get('_query_stats')
+        if stats is None:
+            stats = RequestQueryStats()
+        endpoint = request.endpoint or 'unmatched'
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        budget_exceeded = budget is not None and stats.queries > budget
+        endpoint_stats.add(endpoint, stats, budget_exceeded)
+
+        if settings['headers']:
+            response.headers['X-DB-Queries'] = str(stats.queries)
+            response.headers['X-DB-Time-Ms'] = f"{stats.db_time * 1000:.3f}"
+            response.headers['X-DB-Rows'] = str(stats.rows)
+            response.headers['X-DB-Source'] = 'replica' if g.get('db_replica') else 'primary'
+
+        if budget_exceeded:
+            logger.warning(
+                "Query budget exceeded on %s: %s queries, budget %s", endpoint, stats.queries, budget,
+                extra={'endpoint': endpoint, 'queries': stats.queries, 'budget': budget}
+            )
+            if settings['strict_budgets']:
+                response = jsonify({
+                    "error": "Query budget exceeded",
+                    "endpoint": endpoint,
+                    "queries": stats.queries,
+                    "budget": budget,
+                })
+                response.status_code = 500
+        return response
@@ -0,0 +1,205 @@
+# Read replica routing.
+# Views marked @read_only (app/database.py) get their request connection from a
+# replica when one is configured, caught up (lag under REPLICA_MAX_LAG) and has a
+# free connection; otherwise they stay on the primary. Lag is measured by a background
+# thread of each worker, started when the worker starts (app/lifecycle.py), so a request
+# never waits on a replica that is down: until a replica is known to be caught up, reads
+# go to the primary. A user's reads stay on the
+# primary for READ_YOUR_WRITES_WINDOW seconds after each of their own writes, and so do
+# the public reads of a response cache namespace after a write to it. The write markers
+# are shared by the workers of the host (app/markers.py).
+import logging
+import os
+import random
+import threading
+from flask import g, request
+from mysql.connector import Error, errorcode
+from .markers import note_write, wrote_recently
+from .config import Config, dbconfig
+from .database import BoundedConnectionPool, PoolExhausted, set_replica_source
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class Replica:
+    """One replica: its pool (opened by the first lag check) and its last measured lag."""
+
+    def __init__(self, index, host, port):
+        self.name = f"{host}:{port}"
+        self.host = host
+        self.port = port
+        self.pool_name = f"replica{index}"
+        self.pool = None
+        self.lag = None
+        self.healthy = False
+        self.error = None
+
+
+class ReplicaRouter:
+    def __init__(self, hosts, pool_size, wait_timeout, max_lag, check_interval, connect_timeout):
+        self.replicas = []
+        for index, entry in enumerate(h.strip() for h in hosts.split(',') if h.strip()):
+            host, _, port = entry.partition(':')
+            self.replicas.append(Replica(index, host, int(port or 3306)))
+        self.pool_size = pool_size
+        self.wait_timeout = wait_timeout
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.connect_timeout = connect_timeout
+        self._stop = threading.Event()
+        self._monitor = None
+
+    def _ensure_pool(self, replica):
+        if replica.pool is None:
+            # a replica that is down fails within connect_timeout instead of the OS's TCP timeout
+            config = dict(
+                dbconfig, host=replica.host, port=replica.port, pool_name=replica.pool_name,
+                connection_timeout=self.connect_timeout
+            )
+            replica.pool = BoundedConnectionPool(self.pool_size, self.wait_timeout, **config)
+        return replica.pool
+
+    def _measure_lag(self, replica):
+        conn = self._ensure_pool(replica).get_connection(timeout=self.wait_timeout)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Error as e:
+                # before MySQL 8.0.22
+                if e.errno != errorcode.ER_PARSE_ERROR:
+                    raise
+                cursor.execute("SHOW SLAVE STATUS")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        if not rows:
+            # not replicating at all, e.g. a second standalone instance used for testing
+            return 0
+        row = rows[0]
+        return row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+
+    def _check(self, replica):
+        try:
+            replica.lag = self._measure_lag(replica)
+            replica.error = None
+        except Exception as e:
+            replica.lag = None
+            replica.error = str(e)
+        # a NULL lag means replication is stopped
+        healthy = replica.lag is not None and replica.lag <= self.max_lag
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info("Replica %s in use (lag %ss)", replica.name, replica.lag)
+            else:
+                logger.warning(
+                    "Replica %s skipped, lag %s: %s", replica.name, replica.lag, replica.error or 'too far behind'
+                )
+        replica.healthy = healthy
+
+    def _monitor_loop(self):
+        while not self._stop.is_set():
+            for replica in self.replicas:
+                self._check(replica)
+            self._stop.wait(self.check_interval)
+
+    def start(self):
+        """Measure the replicas' lag every check_interval seconds in a background thread."""
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._monitor_loop, name='replica-lag', daemon=True)
+            self._monitor.start()
+
+    def get_connection(self):
+        """A pooled connection to a caught up replica, or None when there is none free."""
+        for replica in random.sample(self.replicas, len(self.replicas)):
+            if not replica.healthy:
+                continue
+            try:
+                return replica.pool.get_connection()
+            except PoolExhausted:
+                continue
+            except Exception as e:
+                logger.error("Replica %s connection error: %s", replica.name, e)
+                replica.healthy = False
+        return None
+
+    def close(self):
+        self._stop.set()
+        if self._monitor is not None:
+            # a check in progress is bounded by connect_timeout, do not wait for it
+            self._monitor.join(timeout=0.1)
+        for replica in self.replicas:
+            if replica.pool is not None:
+                replica.pool.close()
+                replica.pool = None
+
+    def stats(self):
+        return [{
+            'replica': replica.name,
+            'healthy': replica.healthy,
+            'lag_seconds': replica.lag,
+            'error': replica.error,
+            'pool': replica.pool.stats() if replica.pool is not None else None,
+        } for replica in self.replicas]
+
+
+# Created on first use in each process, like the primary pool (see get_connection_pool in config.py)
+_router = None
+_router_pid = None
+_router_lock = threading.Lock()
+
+def get_replica_router():
+    global _router, _router_pid
+    if not Config.MYSQL_REPLICA_HOSTS:
+        return None
+    with _router_lock:
+        if _router is None or _router_pid != os.getpid():
+            _router = ReplicaRouter(
+                Config.MYSQL_REPLICA_HOSTS,
+                Config.REPLICA_POOL_SIZE,
+                Config.REPLICA_POOL_TIMEOUT,
+                Config.REPLICA_MAX_LAG,
+                Config.REPLICA_LAG_CHECK_INTERVAL,
+                Config.REPLICA_CONNECT_TIMEOUT
+            )
+            _router.start()
+            _router_pid = os.getpid()
+        return _router
+
+def close_replica_pools():
+    global _router
+    with _router_lock:
+        if _router is not None and _router_pid == os.getpid():
+            _router.close()
+        _router = None
+
+
+def _principal_key(principal):
+    role, user_id = principal
+    return f"user:{role}:{user_id}"
+
+def replica_connection():
+    """Replica connection for a read-only view, None when the request must use the primary."""
+    principal = g.get('principal')
+    if principal and wrote_recently(_principal_key(principal)):
+        return None
+    router = get_replica_router()
+    return router.get_connection() if router else None
+
+
+def init_replicas(app):
+    """Route read-only views to the replicas, if any are configured."""
+    if not Config.MYSQL_REPLICA_HOSTS:
+        return
+    set_replica_source(replica_connection)
+
+    @app.after_request
+    def remember_writes(response):
+        # start the read-your-writes window of the user who just wrote
+        principal = g.get('principal')
+        if principal and request.method in WRITE_METHODS and response.status_code < 400:
+            note_write(_principal_key(principal))
+        return response
@@ -0,0 +1,3 @@
+# Data access per entity: explicit column lists, tuple cursors read in chunks,
+# and rows mapped to compact slotted row types (see base.py).
+from . import artists, artworks, customers, galleries, order_items, orders, shipping_details
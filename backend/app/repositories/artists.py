@@ -0,0 +1,17 @@
+from .base import row_type, select
+
+
+@row_type
+class Artist:
+    artist_id: int
+    name: str
+    email: str
+    specialization: str
+
+
+def list_artists(conn):
+    return select(conn, Artist, """
+        SELECT artist_id, name, email, specialization
+        FROM artists
+        ORDER BY artist_id
+    """)
@@ -0,0 +1,173 @@
+import logging
+import time
+from datetime import datetime
+from decimal import Decimal
+from mysql.connector import Error, errorcode
+from .base import row_type, select, select_one
+from ..utils import encode_cursor, escape_like
+
+logger = logging.getLogger(__name__)
+
+ARTWORK_COLUMNS = """
+    a.artwork_id, a.title, a.artist_id, a.description, a.price, a.status,
+    a.image_url, a.created_at, a.updated_at
+"""
+
+
+@row_type
+class Artwork:
+    artwork_id: int
+    title: str
+    artist_id: int
+    description: str
+    price: Decimal
+    status: str
+    image_url: str
+    created_at: datetime
+    updated_at: datetime
+
+
+@row_type
+class ArtworkWithArtist(Artwork):
+    artist_name: str
+
+
+@row_type
+class CatalogArtwork(Artwork):
+    artist_name: str
+    artist_email: str
+
+
+@row_type
+class SearchResult(Artwork):
+    artist_name: str
+    relevance: float
+
+
+def catalog_page(conn, limit, after=None, artist_id=None, min_price=None, max_price=None, title_prefix=None):
+    """
+    One page of available artworks, newest first, for the public catalog.
+    after is the decoded (created_at, artwork_id) cursor of the previous page.
+    Returns (artworks, next_cursor), next_cursor is None on the last page.
+    """
+    conditions = ["a.status = 'available'"]
+    params = []
+    if artist_id is not None:
+        conditions.append("a.artist_id = %s")
+        params.append(artist_id)
+    if min_price is not None:
+        conditions.append("a.price >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append("a.price <= %s")
+        params.append(max_price)
+    if title_prefix:
+        conditions.append("a.title LIKE %s")
+        params.append(escape_like(title_prefix) + '%')
+    if after:
+        # keyset condition: everything strictly older than the last row of the previous page
+        conditions.append("(a.created_at < %s OR (a.created_at = %s AND a.artwork_id < %s))")
+        params.extend([after[0], after[0], after[1]])
+
+    #one extra row tells us whether there is a next page
+    #the ORDER BY matches the (status, created_at, artwork_id) index so every page is an index range scan
+    artworks = select(conn, CatalogArtwork, f"""
+        SELECT {ARTWORK_COLUMNS}, ar.name, ar.email
+        FROM artworks a
+        LEFT JOIN artists ar ON a.artist_id = ar.artist_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY a.created_at DESC, a.artwork_id DESC
+        LIMIT %s
+    """, (*params, limit + 1))
+
+    if len(artworks) <= limit:
+        return artworks, None
+    artworks = artworks[:limit]
+    return artworks, encode_cursor(artworks[-1].created_at, artworks[-1].artwork_id)
+
+
+# When MySQL reports the FULLTEXT indexes are missing, search goes straight to the LIKE
+# fallback until this monotonic time, then probes again: a migration adding the indexes
+# is picked up without restarting the workers
+FULLTEXT_RETRY_SECONDS = 300
+fulltext_missing_until = 0.0
+
+def search(conn, text, limit, offset):
+    """
+    Available artworks matching text in title, description or artist name, best matches first.
+    Uses the FULLTEXT indexes when they exist and a LIKE based ranking otherwise.
+    Returns up to limit + 1 rows so the caller can tell whether there is another page.
+    """
+    global fulltext_missing_until
+    if time.monotonic() >= fulltext_missing_until:
+        try:
+            #MATCH ... AGAINST over columns of two joined tables cannot use either index, so each
+            #index gets its own probe: artworks by title and description, artworks of the artists
+            #matching by name. The hits are added up per artwork and only the requested page is
+            #joined back for its columns
+            return select(conn, SearchResult, f"""
+                SELECT {ARTWORK_COLUMNS}, ar.name, hits.relevance
+                FROM (
+                    SELECT artwork_id, SUM(score) AS relevance
+                    FROM (
+                        SELECT aw.artwork_id,
+                               MATCH(aw.title, aw.description) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score
+                        FROM artworks aw
+                        WHERE MATCH(aw.title, aw.description) AGAINST (%s IN NATURAL LANGUAGE MODE)
+                          AND aw.status = 'available'
+                        UNION ALL
+                        SELECT aw.artwork_id,
+                               MATCH(art.name) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score
+                        FROM artists art
+                        JOIN artworks aw ON aw.artist_id = art.artist_id
+                        WHERE MATCH(art.name) AGAINST (%s IN NATURAL LANGUAGE MODE)
+                          AND aw.status = 'available'
+                    ) matches
+                    GROUP BY artwork_id
+                    ORDER BY relevance DESC, artwork_id DESC
+                    LIMIT %s OFFSET %s
+                ) hits
+                JOIN artworks a ON a.artwork_id = hits.artwork_id
+                LEFT JOIN artists ar ON a.artist_id = ar.artist_id
+                ORDER BY hits.relevance DESC, a.artwork_id DESC
+            """, (text, text, text, text, limit + 1, offset))
+        except Error as e:
+            if e.errno != errorcode.ER_FT_MATCHING_KEY_NOT_FOUND:
+                raise
+            logger.warning("FULLTEXT indexes missing, using LIKE search for %ss", FULLTEXT_RETRY_SECONDS)
+            fulltext_missing_until = time.monotonic() + FULLTEXT_RETRY_SECONDS
+
+    # LIKE fallback: title prefix ranks above a title match, which ranks above
+    # an artist or description match
+    contains = '%' + escape_like(text) + '%'
+    prefix = escape_like(text) + '%'
+    return select(conn, SearchResult, f"""
+        SELECT {ARTWORK_COLUMNS}, ar.name,
+               (a.title LIKE %s) * 4 + (a.title LIKE %s) * 2
+               + COALESCE(ar.name LIKE %s, 0) * 2 + COALESCE(a.description LIKE %s, 0) AS relevance
+        FROM artworks a
+        LEFT JOIN artists ar ON a.artist_id = ar.artist_id
+        WHERE a.status = 'available'
+          AND (a.title LIKE %s OR a.description LIKE %s OR ar.name LIKE %s)
+        ORDER BY relevance DESC, a.artwork_id DESC
+        LIMIT %s OFFSET %s
+    """, (prefix, contains, contains, contains, contains, contains, contains, limit + 1, offset))
+
+
+def list_by_artist(conn, artist_id):
+    """Every artwork of an artist, whatever its status, newest first."""
+    return select(conn, Artwork, f"""
+        SELECT {ARTWORK_COLUMNS}
+        FROM artworks a
+        WHERE a.artist_id = %s
+        ORDER BY a.created_at DESC
+    """, (artist_id,))
+
+
+def get_with_artist(conn, artwork_id):
+    return select_one(conn, ArtworkWithArtist, f"""
+        SELECT {ARTWORK_COLUMNS}, ar.name
+        FROM artworks a
+        LEFT JOIN artists ar ON a.artist_id = ar.artist_id
+        WHERE a.artwork_id = %s
+    """, (artwork_id,))
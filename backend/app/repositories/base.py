@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+# Rows are read from the server this many at a time
+FETCH_CHUNK = 500
+
+
+def row_type(cls):
+    """
+    Turn a class with annotated fields into a row type: a dataclass with __slots__,
+    so a row is a compact object without a per-instance __dict__. The fields are the
+    columns of the repository's SELECT, in the same order (inherited fields first).
+    The app's JSON provider serializes row types as objects.
+    """
+    namespace = {
+        name: value for name, value in cls.__dict__.items()
+        if name not in ('__dict__', '__weakref__')
+    }
+    namespace['__slots__'] = tuple(cls.__dict__.get('__annotations__', {}))
+    return dataclass(type(cls)(cls.__name__, cls.__bases__, namespace))
+
+
+def iter_rows(cursor, row, size=FETCH_CHUNK):
+    """Map the rows of an executed tuple cursor to row objects, fetching size rows at a time."""
+    while True:
+        chunk = cursor.fetchmany(size)
+        if not chunk:
+            return
+        for values in chunk:
+            yield row(*values)
+
+
+def select(conn, row, query, params=()):
+    """Run query and return every result as a row object."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        return list(iter_rows(cursor, row))
+    finally:
+        cursor.close()
+
+
+def select_one(conn, row, query, params=()):
+    """Run query and return its first result as a row object, or None."""
+    # buffered, so rows after the first never hold up the connection
+    cursor = conn.cursor(buffered=True)
+    try:
+        cursor.execute(query, params)
+        values = cursor.fetchone()
+        return row(*values) if values else None
+    finally:
+        cursor.close()
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
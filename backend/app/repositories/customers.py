@@ -0,0 +1,27 @@
+from .base import row_type, select, select_one
+
+
+@row_type
+class Customer:
+    customer_id: int
+    name: str
+    email: str
+    address: str
+    phone_number: str
+
+
+def list_customers(conn):
+    # never password_hash
+    return select(conn, Customer, """
+        SELECT customer_id, name, email, address, phone_number
+        FROM customers
+        ORDER BY customer_id
+    """)
+
+
+def get_customer(conn, customer_id):
+    return select_one(conn, Customer, """
+        SELECT customer_id, name, email, address, phone_number
+        FROM customers
+        WHERE customer_id = %s
+    """, (customer_id,))
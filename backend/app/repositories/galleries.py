@@ -0,0 +1,21 @@
+from datetime import datetime
+from .base import row_type, select
+
+
+@row_type
+class Gallery:
+    gallery_id: int
+    name: str
+    email: str
+    description: str
+    location: str
+    created_at: datetime
+
+
+def list_galleries(conn):
+    # never password_hash
+    return select(conn, Gallery, """
+        SELECT gallery_id, name, email, description, location, created_at
+        FROM galleries
+        ORDER BY gallery_id
+    """)
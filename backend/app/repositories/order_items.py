@@ -0,0 +1,21 @@
+from datetime import datetime
+from decimal import Decimal
+from .base import row_type, select
+
+
+@row_type
+class OrderItem:
+    order_item_id: int
+    order_id: int
+    artwork_id: int
+    quantity: int
+    price_at_time: Decimal
+    created_at: datetime
+
+
+def list_order_items(conn):
+    return select(conn, OrderItem, """
+        SELECT order_item_id, order_id, artwork_id, quantity, price_at_time, created_at
+        FROM order_items
+        ORDER BY order_item_id
+    """)
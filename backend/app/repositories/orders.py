@@ -0,0 +1,21 @@
+from datetime import datetime
+from decimal import Decimal
+from .base import row_type, select
+
+
+@row_type
+class Order:
+    order_id: int
+    customer_id: int
+    status: str
+    total_amount: Decimal
+    created_at: datetime
+    updated_at: datetime
+
+
+def list_orders(conn):
+    return select(conn, Order, """
+        SELECT order_id, customer_id, status, total_amount, created_at, updated_at
+        FROM orders
+        ORDER BY order_id
+    """)
@@ -0,0 +1,21 @@
+from datetime import datetime
+from .base import row_type, select_one
+
+
+@row_type
+class ShippingDetails:
+    shipping_id: int
+    order_id: int
+    address: str
+    phone_number: str
+    created_at: datetime
+
+
+def latest_for_order(conn, order_id):
+    return select_one(conn, ShippingDetails, """
+        SELECT shipping_id, order_id, address, phone_number, created_at
+        FROM shipping_details
+        WHERE order_id = %s
+        ORDER BY shipping_id DESC
+        LIMIT 1
+    """, (order_id,))
@@ -0,0 +1,84 @@
+# Per-artist and per-artwork sales rollups.
+# artwork_sales_rollup and artist_sales_rollup hold running totals of confirmed sales
+# so the dashboards read one row per artist instead of rescanning order_items.
+# An order counts as sold once it is confirmed (or later delivered).
+
+SOLD_STATUSES = ('confirmed', 'delivered')
+
+ROLLUP_TABLES = {
+    'artwork_sales_rollup': """
+        CREATE TABLE IF NOT EXISTS artwork_sales_rollup (
+            artwork_id INT PRIMARY KEY,
+            artist_id INT NULL,
+            sold_count INT NOT NULL DEFAULT 0,
+            quantity_sold INT NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            KEY idx_artwork_sales_rollup_artist (artist_id),
+            FOREIGN KEY (artwork_id) REFERENCES artworks(artwork_id) ON DELETE CASCADE
+        )
+    """,
+    'artist_sales_rollup': """
+        CREATE TABLE IF NOT EXISTS artist_sales_rollup (
+            artist_id INT PRIMARY KEY,
+            sold_count INT NOT NULL DEFAULT 0,
+            quantity_sold INT NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (artist_id) REFERENCES artists(artist_id) ON DELETE CASCADE
+        )
+    """,
+}
+
+def apply_order_to_rollup(cursor, order_id):
+    """
+    Add one newly confirmed order to the rollups.
+    Must run in the same transaction that confirms the order, and only once per order.
+    """
+    cursor.execute("""
+        INSERT INTO artwork_sales_rollup (artwork_id, artist_id, sold_count, quantity_sold, revenue)
+        SELECT oi.artwork_id, a.artist_id, COUNT(*), SUM(oi.quantity), SUM(oi.quantity * oi.price_at_time)
+        FROM order_items oi
+        JOIN artworks a ON oi.artwork_id = a.artwork_id
+        WHERE oi.order_id = %s
+        GROUP BY oi.artwork_id, a.artist_id
+        ON DUPLICATE KEY UPDATE
+            sold_count = sold_count + VALUES(sold_count),
+            quantity_sold = quantity_sold + VALUES(quantity_sold),
+            revenue = revenue + VALUES(revenue)
+    """, (order_id,))
+    cursor.execute("""
+        INSERT INTO artist_sales_rollup (artist_id, sold_count, quantity_sold, revenue)
+        SELECT a.artist_id, COUNT(*), SUM(oi.quantity), SUM(oi.quantity * oi.price_at_time)
+        FROM order_items oi
+        JOIN artworks a ON oi.artwork_id = a.artwork_id
+        WHERE oi.order_id = %s AND a.artist_id IS NOT NULL
+        GROUP BY a.artist_id
+        ON DUPLICATE KEY UPDATE
+            sold_count = sold_count + VALUES(sold_count),
+            quantity_sold = quantity_sold + VALUES(quantity_sold),
+            revenue = revenue + VALUES(revenue)
+    """, (order_id,))
+
+def rebuild_rollup(cursor):
+    """Recompute both rollups from the full sales history (backfills, or after manual data fixes)."""
+    placeholders = ', '.join(['%s'] * len(SOLD_STATUSES))
+    # DELETE rather than TRUNCATE so the rebuild is one transaction and readers never see empty tables
+    cursor.execute("DELETE FROM artwork_sales_rollup")
+    cursor.execute("DELETE FROM artist_sales_rollup")
+    cursor.execute(f"""
+        INSERT INTO artwork_sales_rollup (artwork_id, artist_id, sold_count, quantity_sold, revenue)
+        SELECT oi.artwork_id, a.artist_id, COUNT(*), SUM(oi.quantity), SUM(oi.quantity * oi.price_at_time)
+        FROM order_items oi
+        JOIN orders o ON oi.order_id = o.order_id
+        JOIN artworks a ON oi.artwork_id = a.artwork_id
+        WHERE o.status IN ({placeholders})
+        GROUP BY oi.artwork_id, a.artist_id
+    """, SOLD_STATUSES)
+    cursor.execute("""
+        INSERT INTO artist_sales_rollup (artist_id, sold_count, quantity_sold, revenue)
+        SELECT artist_id, SUM(sold_count), SUM(quantity_sold), SUM(revenue)
+        FROM artwork_sales_rollup
+        WHERE artist_id IS NOT NULL
+        GROUP BY artist_id
+    """)
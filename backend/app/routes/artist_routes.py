@@ -1,20 +1,23 @@
 from flask import Blueprint, request, jsonify
-from app.config import get_db_connection
+from app.config import Config, get_db_connection
+from app.database import read_only
+from app.auth import invalidate_principal
+from app.cache import cached_response, invalidate_responses
+from app.repositories import artists as repository
 
 artist_routes = Blueprint('artist_routes', __name__)
 
 # Fetch all artists
 @artist_routes.route('/artists', methods=['GET'])
+@read_only
+@cached_response('artists', Config.ARTISTS_CACHE_TTL)
 def get_artists():
     """
     Retrieve a list of all artists from the database.
     Returns a JSON array of artist objects with their details.
     """
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)  # Use dictionary=True to get results as dictionaries
-    cursor.execute("SELECT artist_id, name, email, specialization FROM artists")
-    artists = cursor.fetchall()
-    cursor.close()
+    artists = repository.list_artists(conn)
     conn.close()
     return jsonify(artists)
 
@@ -38,6 +41,7 @@ def add_artist():
     conn.commit()
     cursor.close()
     conn.close()
+    invalidate_responses('artists')
     return jsonify({"message": "Artist added successfully!"}), 201
 
 # Delete an artist
@@ -53,4 +57,8 @@ def delete_artist(artist_id):
     conn.commit()
     cursor.close()
     conn.close()
+    # a deleted artist must not keep authenticating from the principal cache
+    invalidate_principal('artist', artist_id)
+    # the artwork listing shows the artist's name, so it is stale as well
+    invalidate_responses('artists', 'artworks')
     return jsonify({"message": "Artist deleted successfully!"})
@@ -1,70 +1,129 @@
 from flask import Blueprint, request, jsonify
 
 from ..config import get_db_connection
+from ..database import read_only
 from ..auth import token_required
+from ..cache import cached_response, invalidate_responses
+from ..config import Config
+from ..query_stats import query_budget
+from ..limits import rate_cost
+from ..repositories import artworks as repository
+from ..utils import decode_cursor, parse_limit
 import logging
-from decimal import Decimal
-from mysql.connector import Error
 
 artwork_routes = Blueprint('artwork_routes', __name__)
+logger = logging.getLogger(__name__)
+
+#rows come back from the repository as row objects, the app's JSON provider
+#(FastJSONProvider in utils.py) serializes them and turns the Decimal price into a float
 
-# Helper function to serialize Decimal
-def serialize_artwork(artwork):
-    if artwork:
-        # Convert Decimal to float for JSON serialization
-        if 'price' in artwork and isinstance(artwork['price'], Decimal):
-            artwork['price'] = float(artwork['price'])
-    return artwork
-#well we are using a function serialize_artwork() to convert the price from Decimal to float
-#this is done because JSON does not support Decimal type
-#so we need to convert it to float before sending it as a response  
 @artwork_routes.route('/artworks', methods=['GET'])
+@read_only
+@query_budget(1)
+@cached_response('artworks', Config.ARTWORKS_CACHE_TTL)
 def get_artworks():
+    """
+    Return one page of available artworks, newest first.
+    Query parameters:
+      limit      - page size (default 24, max 100)
+      cursor     - opaque cursor taken from the X-Next-Cursor header of the previous page
+      artist_id  - only artworks by this artist
+      min_price / max_price - inclusive price range
+      q          - title prefix
+    The body stays a JSON array; the cursor for the next page is sent in the
+    X-Next-Cursor header (absent on the last page).
+    """
+    conn = None
     try:
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        artist_id = request.args.get('artist_id', type=int)
+        min_price = request.args.get('min_price', type=float)
+        max_price = request.args.get('max_price', type=float)
+        title_prefix = request.args.get('q', '').strip()
+
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT a.*, ar.name as artist_name, ar.email as artist_email 
-            FROM artworks a 
-            LEFT JOIN artists ar ON a.artist_id = ar.artist_id
-            WHERE a.status = 'available'
-            ORDER BY a.created_at DESC
-        """)
-        #this query will fetch all the artworks from the database
-        #it will also fetch the name and email of the artist who created the artwork
-        #it will only fetch the artworks that are available
-        #it will order the artworks by the created_at column in descending order
-        artworks = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        # Serialize each artwork
-        artworks = [serialize_artwork(artwork) for artwork in artworks]
-        return jsonify(artworks)
+        artworks, next_cursor = repository.catalog_page(
+            conn, limit, after, artist_id, min_price, max_price, title_prefix
+        )
+        #one page of the available artworks with the name and email of each artist
+
+        response = jsonify(artworks)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     except Exception as e:
-        print(f"Error fetching artworks: {str(e)}")
+        logger.error("Error fetching artworks: %s", e)
         return jsonify({"error": "Failed to fetch artworks"}), 500
+    finally:
+        if conn:
+            conn.close()
 #if anything goes wrong while fetching the artworks, we will return a 500 error response
 #otherwise we will return the artworks as a JSON response
-#we are using jsonify() function to convert the list of dictionaries into a JSON response
+#we are using jsonify() function to convert the list of row objects into a JSON response
+
+@artwork_routes.route('/artworks/search', methods=['GET'])
+@read_only
+@query_budget(2)
+@rate_cost(2)
+@cached_response('artworks', Config.ARTWORKS_CACHE_TTL)
+def search_artworks():
+    """
+    Search available artworks by title, description and artist name, best matches first.
+    Query parameters:
+      q     - search text (required)
+      limit - page size (default 24, max 100)
+      page  - 1 based page number
+    Uses the FULLTEXT indexes when they exist and a LIKE based ranking otherwise.
+    """
+    conn = None
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        page = max(request.args.get('page', 1, type=int), 1)
+        offset = (page - 1) * limit
+
+        conn = get_db_connection()
+        results = repository.search(conn, query, limit, offset)
+
+        has_more = len(results) > limit
+        return jsonify({
+            'results': results[:limit],
+            'page': page,
+            'has_more': has_more
+        })
+    except Exception as e:
+        logger.error("Error searching artworks: %s", e)
+        return jsonify({"error": "Failed to search artworks"}), 500
+    finally:
+        if conn:
+            conn.close()
+
 @artwork_routes.route('/artworks', methods=['POST'])
 @token_required
 def create_artwork(current_user):
     try:
-        print(f"Current user attempting to create artwork: {current_user}")
+        logger.debug("Current user attempting to create artwork: %s", current_user)
         data = request.get_json()
-        print(f"Artwork data received: {data}")
+        logger.debug("Artwork data received: %s", data)
         
         # Validate required fields
         required_fields = ['title', 'description', 'price', 'image_url']
         if not all(field in data for field in required_fields):
-            print(f"Missing required fields. Required: {required_fields}, Received: {data.keys()}")
+            logger.debug("Missing required fields. Required: %s, Received: %s", required_fields, data.keys())
             return jsonify({"error": "Missing required fields"}), 400
             
         # Validate that current user is an artist
         if current_user['role'] != 'artist':
-            print(f"User role not artist: {current_user['role']}")
+            logger.debug("User role not artist: %s", current_user['role'])
             return jsonify({"error": "Only artists can create artworks"}), 403
             
         conn = get_db_connection()
@@ -72,7 +131,7 @@ def create_artwork(current_user):
         
         # Use the artist_id from the current_user
         artist_id = current_user['artist_id']
-        print(f"Using artist_id: {artist_id}")
+        logger.debug("Using artist_id: %s", artist_id)
         
         cursor.execute("""
             INSERT INTO artworks (title, description, price, image_url, artist_id, status)
@@ -90,35 +149,27 @@ def create_artwork(current_user):
         conn.commit()
         artwork_id = cursor.lastrowid
         #lastrowid is used to get the ID of the last inserted row
+        invalidate_responses('artworks')
 
-        print(f"Created artwork with ID: {artwork_id}")
-        
-        # Fetch the created artwork
-        cursor.execute("""
-            SELECT a.*, ar.name as artist_name 
-            FROM artworks a 
-            LEFT JOIN artists ar ON a.artist_id = ar.artist_id
-            WHERE a.artwork_id = %s
-        """, (artwork_id,))
-        #this query will fetch the artwork that was just created
-        #it will also fetch the name of the artist who created the artwork
+        logger.info("Created artwork with ID: %s", artwork_id)
         
-        artwork = cursor.fetchone()
+        # Fetch the created artwork with the name of its artist
         cursor.close()
+        artwork = repository.get_with_artist(conn, artwork_id)
         conn.close()
         
         if artwork:
-            print(f"Returning artwork: {artwork}")
-            # Serialize the artwork before returning
-            return jsonify(serialize_artwork(artwork)), 201
+            logger.debug("Returning artwork: %s", artwork)
+            return jsonify(artwork), 201
         else:
-            print("Error: Could not retrieve created artwork")
+            logger.error("Error: Could not retrieve created artwork")
             return jsonify({"error": "Failed to retrieve created artwork"}), 500
     except Exception as e:
-        print(f"Error creating artwork: {str(e)}")
+        logger.error("Error creating artwork: %s", e)
         return jsonify({"error": f"Failed to create artwork: {str(e)}"}), 500
 
 @artwork_routes.route('/artworks/artist/<int:artist_id>', methods=['GET'])
+@read_only
 @token_required
 #this route will be used to fetch all the artworks created by a specific artist
 #methods=['GET'] will allow only GET requests to this route
@@ -132,10 +183,6 @@ def create_artwork(current_user):
 #only the artist can fetch their own artworks
 #other users will receive an unauthorized error
 #the route will return a JSON response containing the artworks created by the artist
-#the artworks will be serialized before returning the response
-#this is done to convert the Decimal price to float
-#this is necessary because JSON does not support Decimal type
-#so we need to convert it to float before sending it as a response
 #the route will return a 500 error response if an error occurs while fetching the artworks
 def get_artist_artworks(current_user, artist_id):
     try:
@@ -144,23 +191,11 @@ def get_artist_artworks(current_user, artist_id):
             return jsonify({"error": "Unauthorized"}), 403
             
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT * FROM artworks 
-            WHERE artist_id = %s 
-            ORDER BY created_at DESC
-        """, (artist_id,))
-        #this query will fetch all the artworks created by the artist
-        #it will order the artworks by the created_at column in descending order
-        
-        artworks = cursor.fetchall()
-        cursor.close()
+        artworks = repository.list_by_artist(conn, artist_id)
+        #all the artworks created by the artist, newest first
         conn.close()
         
-        # Serialize each artwork
-        artworks = [serialize_artwork(artwork) for artwork in artworks]
         return jsonify(artworks)
     except Exception as e:
-        print(f"Error fetching artist artworks: {str(e)}")
+        logger.error("Error fetching artist artworks: %s", e)
         return jsonify({"error": "Failed to fetch artworks"}), 500
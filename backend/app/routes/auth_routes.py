@@ -1,34 +1,46 @@
 from flask import Blueprint, request, jsonify
 from app.config import get_db_connection
-import bcrypt
-#bcrypt is a library that is used to hash passwords
+from app.database import release_request_connection
+from app import hashing
+#hashing wraps bcrypt, a library that is used to hash passwords
 #it is used to hash the passwords before storing them in the database
 import jwt
 #jwt is a library that is used to generate and verify JSON Web Tokens
 #it is used to generate a token when a user logs in
 from datetime import datetime, timedelta
 from app.config import Config
+from app.limits import rate_cost, login_blocked, login_blocked_response, note_failed_login, clear_failed_logins
+from mysql.connector import IntegrityError, errorcode
 import logging
 #logging is a module that is used to log messages
 
 auth_routes = Blueprint('auth_routes', __name__)
+logger = logging.getLogger(__name__)
 
 def hash_password(password):
-    salt = bcrypt.gensalt()
-    #gensalt() function will generate a random salt
-    #salt is a random value that is added to the password before hashing
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')  # Store as string
+    return hashing.hash_password(password)
 #hash_password() function will hash the password using bcrypt
+#the hashing itself runs in the bounded process pool in app/hashing.py
+#so a burst of signups cannot pin every request thread
 #it will return the hashed password as a string
 
 def check_password(password, hashed):
     try:
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-    except Exception as e:
-        print(f"Password check error: {str(e)}")
+        return hashing.check_password(password, hashed)
+    except ValueError as e:
+        # bcrypt rejects a malformed stored hash, no password can match it
+        logger.error("Password check error: %s", e)
         return False
 #check_password() function will check if the password matches the hashed password
 #it will return True if the password matches the hashed password
+#False means a real mismatch: HashingBusy and any other error propagate,
+#so an overloaded server is never counted as a failed login
+
+def hashing_busy_response():
+    response = jsonify({"error": "Server is busy, please try again shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 def generate_token(user_id, role):
     return jwt.encode({
         'user_id': user_id,
@@ -39,11 +51,11 @@ def generate_token(user_id, role):
 #it will contain the user_id, role, and expiration time
 #it will return the token as a string
 @auth_routes.route('/auth/signup', methods=['POST'])
+@rate_cost(10)
 def signup():
     try:
-        print("Received signup request")
+        logger.debug("Received signup request")
         data = request.get_json()
-        print(f"Signup data: {data}")
         
         if not data or 'email' not in data or 'password' not in data or 'name' not in data or 'role' not in data:
             return jsonify({"error": "Name, email, password, and role are required"}), 400
@@ -54,38 +66,50 @@ def signup():
             return jsonify({"error": "Invalid role"}), 400
         #the variety of roles provided in our website is specified here.
             
+        # Hash password
+        #hashing happens before we touch the database so no lock is held while bcrypt runs
+        try:
+            hashed_password = hash_password(data['password'])
+        except hashing.HashingBusy:
+            return hashing_busy_response()
+
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         #dictionary=True will return the rows as dictionaries
-        # Check if email exists in any table
-        tables = ['customers', 'artists', 'galleries']
-        for table in tables:
-            cursor.execute(f"SELECT * FROM {table} WHERE email = %s", (data['email'],))
+        # Serialize signups for the same email across all three tables.
+        # The unique index on each table only guards its own table, the named lock
+        # makes "check all tables, then insert" atomic against a concurrent signup.
+        lock_name = f"picksart_signup:{data['email'].lower()}"[:64]
+        cursor.execute("SELECT GET_LOCK(%s, 5) AS acquired", (lock_name,))
+        if not cursor.fetchone()['acquired']:
+            return jsonify({"error": "Server is busy, please try again shortly"}), 503
+        try:
+            # Check if email exists in any table with one indexed lookup
+            cursor.execute("""
+                SELECT 1 FROM customers WHERE email = %s
+                UNION ALL
+                SELECT 1 FROM artists WHERE email = %s
+                UNION ALL
+                SELECT 1 FROM galleries WHERE email = %s
+                LIMIT 1
+            """, (data['email'], data['email'], data['email']))
             if cursor.fetchone():
-                cursor.close()
-                conn.close()
                 return jsonify({"error": "Email already exists"}), 400
-        #this will check if the email already exists in any of the tables
-        # Hash password
-        hashed_password = hash_password(data['password'])
-        #this is a try catch block where i will shuffle between the roles such as customer artist and gallery.
-        try:
+            #this will check if the email already exists in any of the tables
+
+            #this is a try catch block where i will shuffle between the roles such as customer artist and gallery.
             if role == 'customer':
                 cursor.execute("""
                     INSERT INTO customers (name, email, password_hash, address, phone_number)
                     VALUES (%s, %s, %s, %s, %s)
                 """, (data['name'], data['email'], hashed_password, 
                       data.get('address', ''), data.get('phone_number', '')))
-                table_name = 'customers'
-                id_field = 'customer_id'
                 
             elif role == 'artist':
                 cursor.execute("""
                     INSERT INTO artists (name, email, password_hash)
                     VALUES (%s, %s, %s)
                 """, (data['name'], data['email'], hashed_password))
-                table_name = 'artists'
-                id_field = 'artist_id'
                 
             elif role == 'gallery':
                 cursor.execute("""
@@ -93,37 +117,42 @@ def signup():
                     VALUES (%s, %s, %s, %s, %s)
                 """, (data['name'], data['email'], hashed_password,
                      data.get('description', ''), data.get('location', '')))
-                table_name = 'galleries'
-                id_field = 'gallery_id'
 
             conn.commit()
             user_id = cursor.lastrowid
 
-            # Fetch the created user
-            cursor.execute(f"SELECT * FROM {table_name} WHERE {id_field} = %s", (user_id,))
-            user = cursor.fetchone()
-
-            print(f"Successfully created {role}: {user}")
+            logger.info("Successfully created %s: %s", role, user_id)
 
+            # Everything we return was just written, no need to read the row back
             return jsonify({
                 "message": f"{role.capitalize()} account created successfully",
                 "user": {
-                    "id": user[id_field],
-                    "name": user['name'],
-                    "email": user['email'],
+                    "id": user_id,
+                    "name": data['name'],
+                    "email": data['email'],
                     "role": role,
-                    **({"address": user.get('address', ''), 
-                        "phone_number": user.get('phone_number', '')} if role == 'customer' else {})
+                    **({"address": data.get('address', ''), 
+                        "phone_number": data.get('phone_number', '')} if role == 'customer' else {})
                 }
             }), 201
 
+        except IntegrityError as e:
+            conn.rollback()
+            if e.errno == errorcode.ER_DUP_ENTRY:
+                #the unique email index caught a signup that slipped past the check
+                return jsonify({"error": "Email already exists"}), 400
+            logger.error("Database error: %s", e)
+            return jsonify({"error": "Database error occurred"}), 500
         except Exception as e:
-            print(f"Database error: {str(e)}")
+            logger.error("Database error: %s", e)
             conn.rollback()
             return jsonify({"error": "Database error occurred"}), 500
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+            cursor.fetchall()
 #if we are having some error in the database then we will rollback the changes and return a 500 error
     except Exception as e:
-        print(f"Signup error: {str(e)}")
+        logger.error("Signup error: %s", e)
         return jsonify({"error": "Failed to create account"}), 500
 #this is if we are facing a problem while creating the account then we will return a 500 error
     finally:
@@ -137,11 +166,11 @@ def signup():
 #this is used to close the cursor and connection
 #by these we will be done with our signup part.
 @auth_routes.route('/auth/login', methods=['POST'])
+@rate_cost(10)
 def login():
     try:
-        print("Received login request")
+        logger.debug("Received login request")
         data = request.get_json()
-        print(f"Login request data: {data}")
         
         if not data or 'email' not in data or 'password' not in data or 'role' not in data:
             return jsonify({"error": "Email, password, and role are required"}), 400
@@ -150,8 +179,10 @@ def login():
         if role not in ['customer', 'artist', 'gallery']:
             return jsonify({"error": "Invalid role"}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        # an account guessed at from this address, or an address guessing at many accounts,
+        # is turned away before bcrypt and the database
+        if login_blocked(data['email']):
+            return login_blocked_response()
 
         # Get user by email from appropriate table
         if role == 'customer':
@@ -164,29 +195,60 @@ def login():
             table_name = 'galleries'
             id_field = 'gallery_id'
 
-        # Debug: Print the query being executed
-        query = f"SELECT * FROM {table_name} WHERE email = %s"
-        print(f"Executing query: {query} with email: {data['email']}")
-        
-        cursor.execute(query, (data['email'],))
-        user = cursor.fetchone()
-        
+        # only the columns the login needs, customers also get their contact details back
+        columns = f"{id_field}, name, email, password_hash"
+        if role == 'customer':
+            columns += ", address, phone_number"
+        query = f"SELECT {columns} FROM {table_name} WHERE email = %s"
+
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, (data['email'],))
+            user = cursor.fetchone()
+        finally:
+            cursor.close()
+        # bcrypt can wait in the hashing pool for up to HASH_TIMEOUT, the pooled
+        # connection goes back first so a slow login does not hold one of its slots
+        release_request_connection()
+
+        password_match = False
         if user:
-            print(f"Found user: {user['email']}")  # Debug log
-            # Debug password check
-            password_match = check_password(data['password'], user['password_hash'])
-            print(f"Password check result: {password_match}")  # Debug log
+            logger.debug("Found user: %s", user['email'])
+            try:
+                password_match = check_password(data['password'], user['password_hash'])
+            except hashing.HashingBusy:
+                return hashing_busy_response()
+            logger.debug("Password check result: %s", password_match)
+            if password_match and hashing.needs_rehash(user['password_hash']):
+                # the stored hash uses an old work factor, upgrade it while we have the password
+                #this is best effort, a failure here must not fail the login
+                #the connection is taken again only for the UPDATE, after the new hash is ready
+                try:
+                    new_hash = hash_password(data['password'])
+                    conn = get_db_connection()
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute(
+                            f"UPDATE {table_name} SET password_hash = %s WHERE {id_field} = %s",
+                            (new_hash, user[id_field])
+                        )
+                        conn.commit()
+                    finally:
+                        cursor.close()
+                except Exception as e:
+                    logger.warning("Password rehash skipped: %s", e)
         else:
-            print(f"No user found with email: {data['email']}")  # Debug log
-
-        cursor.close()
-        conn.close()
+            logger.debug("No user found with email: %s", data['email'])
 
         if not user:
+            note_failed_login(data['email'])
             return jsonify({"error": "User not found"}), 401
             
         if not password_match:
+            note_failed_login(data['email'])
             return jsonify({"error": "Invalid password"}), 401
+        clear_failed_logins(data['email'])
 
         # Generate token
         token = generate_token(user[id_field], role)
@@ -215,27 +277,31 @@ def login():
         }), 200
 
     except Exception as e:
-        print(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         return jsonify({"error": "Login failed"}), 500 
     
     #at here we are done with our login part.
 
 @auth_routes.route('/auth/admin-login', methods=['POST'])
+@rate_cost(10)
 def admin_login():
     try:
-        print("Received admin login request")
+        logger.debug("Received admin login request")
         data = request.get_json()
-        print(f"Admin login data: {data}")
         
         if not data or 'admin_id' not in data or 'password' not in data:
             return jsonify({"error": "Admin ID and password are required"}), 400
+        if login_blocked(data['admin_id']):
+            return login_blocked_response()
 
         # Hardcoded admin credentials (you should change these in production)
         ADMIN_ID = "admin123"
         ADMIN_PASSWORD = "admin@123"  # In production, use environment variables
         
         if data['admin_id'] != ADMIN_ID or data['password'] != ADMIN_PASSWORD:
+            note_failed_login(data['admin_id'])
             return jsonify({"error": "Invalid admin credentials"}), 401
+        clear_failed_logins(data['admin_id'])
         
         # Generate admin token
         token = generate_token(ADMIN_ID, 'admin')
@@ -251,5 +317,5 @@ def admin_login():
         }), 200
 
     except Exception as e:
-        print(f"Admin login error: {str(e)}")
+        logger.error("Admin login error: %s", e)
         return jsonify({"error": "Admin login failed"}), 500 
\ No newline at end of file
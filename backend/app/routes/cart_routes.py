@@ -1,14 +1,25 @@
+import logging
 from flask import Blueprint, request, jsonify
 from ..config import get_db_connection
+from ..database import read_only
 from ..auth import token_required
+from ..order_history import load_order_history
+from ..checkout import load_checkout, NoPendingOrder, OrderUnavailable
+from ..query_stats import query_budget
+from ..limits import rate_cost
+from ..prepared import fetch_one, fetch_all
+from ..utils import decode_cursor, parse_limit
 #token_required is a decorator that we created in the auth.py file
 #it is used to check if the user is authenticated before accessing the cart functionality
 from mysql.connector import Error
 from decimal import Decimal
 
 cart = Blueprint('cart', __name__)
+logger = logging.getLogger(__name__)
 
 @cart.route('/cart/sync', methods=['POST'])
+@query_budget(7)
+@rate_cost(3)
 @token_required
 def sync_cart(current_user):
     conn = None
@@ -18,66 +29,124 @@ def sync_cart(current_user):
 
     try:
         data = request.get_json()
-        print(f"Received cart data: {data}")
         cart_items = data.get('items', [])
-        print(f"Cart items: {cart_items}")
+        logger.debug("Received %s cart items", len(cart_items))
         
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True, buffered=True)  # Use buffered cursor
 
         # Check if user has a pending order
-        cursor.execute(
-            "SELECT order_id FROM orders WHERE customer_id = %s AND status = 'pending'",
+        existing_order = fetch_one(
+            conn,
+            """
+            SELECT order_id FROM orders
+            WHERE customer_id = %s AND status = 'pending'
+            ORDER BY created_at DESC
+            LIMIT 1
+            FOR UPDATE
+            """,
             (current_user['user_id'],)
         )
-        existing_order = cursor.fetchone()
         #this query will check if the user has a pending order
         #if the user has a pending order, the order_id will be returned
-        print(f"Existing order: {existing_order}")
+        #FOR UPDATE locks the order so two syncs from the same customer apply one after the other
+        logger.debug("Existing order: %s", existing_order)
 
+        # Collapse the incoming cart to one entry per artwork
+        incoming = {}
+        for item in cart_items:
+            artwork_id = int(item['artwork_id'])
+            if artwork_id in incoming:
+                incoming[artwork_id]['quantity'] += int(item['quantity'])
+            else:
+                incoming[artwork_id] = {'quantity': int(item['quantity']), 'price': Decimal(str(item['price']))}
+
+        stored = {}
+        duplicate_item_ids = []
         if existing_order:
             order_id = existing_order['order_id']
-            print(f"Using existing order: {order_id}")
-            # Clear existing items
+            logger.debug("Using existing order: %s", order_id)
             cursor.execute(
-                "DELETE FROM order_items WHERE order_id = %s",
+                "SELECT order_item_id, artwork_id, quantity, price_at_time FROM order_items WHERE order_id = %s",
                 (order_id,)
             )
+            for row in cursor.fetchall():
+                if row['artwork_id'] in stored:
+                    # older syncs could leave several rows for one artwork, keep only the first
+                    duplicate_item_ids.append(row['order_item_id'])
+                else:
+                    stored[row['artwork_id']] = row
         else:
-            print(f"Creating new order for customer: {current_user['user_id']}")
+            logger.debug("Creating new order for customer: %s", current_user['user_id'])
             # Create new order with NULL shipping_address
             cursor.execute(
                 "INSERT INTO orders (customer_id, total_amount, status) VALUES (%s, 0, 'pending')",
                 (current_user['user_id'],)
             )
             order_id = cursor.lastrowid
-            print(f"Created new order: {order_id}")
+            logger.debug("Created new order: %s", order_id)
 
-        # Add new items
-        total_amount = 0
-        for item in cart_items:
-            print(f"Processing item: {item}")
-            try:
-                cursor.execute(
-                    """
-                    INSERT INTO order_items 
-                    (order_id, artwork_id, quantity, price_at_time) 
-                    VALUES (%s, %s, %s, %s)
-                    """,
-                    (order_id, item['artwork_id'], item['quantity'], item['price'])
-                )
-                #this query will insert the items into the order_items table
-                #the order_id will be the ID of the order that was created or found
-                total_amount += float(item['price']) * int(item['quantity'])
-            except Exception as item_error:
-                print(f"Error inserting item: {str(item_error)}")
-                raise
+        # Work out what actually changed between the stored cart and the incoming one
+        to_insert = []
+        to_update = []
+        for artwork_id, item in incoming.items():
+            row = stored.get(artwork_id)
+            if row is None:
+                to_insert.append((order_id, artwork_id, item['quantity'], item['price']))
+            elif row['quantity'] != item['quantity'] or row['price_at_time'] != item['price']:
+                to_update.append((row['order_item_id'], item['quantity'], item['price']))
+        to_delete = duplicate_item_ids + [
+            row['order_item_id'] for artwork_id, row in stored.items() if artwork_id not in incoming
+        ]
 
-        # Update order total
-        cursor.execute(
-            "UPDATE orders SET total_amount = %s WHERE order_id = %s",
-            (total_amount, order_id)
-        )
+        if to_delete:
+            placeholders = ', '.join(['%s'] * len(to_delete))
+            cursor.execute(
+                f"DELETE FROM order_items WHERE order_item_id IN ({placeholders})",
+                tuple(to_delete)
+            )
+        if to_update:
+            # executemany would send one UPDATE per row, a CASE on the id changes them all in one statement
+            cases = ' '.join(['WHEN %s THEN %s'] * len(to_update))
+            placeholders = ', '.join(['%s'] * len(to_update))
+            quantities, prices, item_ids = [], [], []
+            for item_id, quantity, price in to_update:
+                quantities += [item_id, quantity]
+                prices += [item_id, price]
+                item_ids.append(item_id)
+            cursor.execute(
+                f"""
+                UPDATE order_items
+                SET quantity = CASE order_item_id {cases} END,
+                    price_at_time = CASE order_item_id {cases} END
+                WHERE order_item_id IN ({placeholders})
+                """,
+                (*quantities, *prices, *item_ids)
+            )
+        if to_insert:
+            # executemany turns an INSERT ... VALUES into a single multi-row statement
+            cursor.executemany(
+                """
+                INSERT INTO order_items 
+                (order_id, artwork_id, quantity, price_at_time) 
+                VALUES (%s, %s, %s, %s)
+                """,
+                to_insert
+            )
+
+        # Recompute the order total from the stored rows in the same transaction
+        if to_insert or to_update or to_delete:
+            cursor.execute(
+                """
+                UPDATE orders
+                SET total_amount = (
+                    SELECT COALESCE(SUM(quantity * price_at_time), 0)
+                    FROM order_items WHERE order_id = %s
+                )
+                WHERE order_id = %s
+                """,
+                (order_id, order_id)
+            )
 
         conn.commit()
         return jsonify({
@@ -86,12 +155,12 @@ def sync_cart(current_user):
         }), 200
 
     except Exception as e:
-        print(f"Cart sync error: {str(e)}")
+        logger.error("Cart sync error: %s", e)
         if conn:
             try:
                 conn.rollback()
             except Exception as rollback_error:
-                print(f"Error during rollback: {str(rollback_error)}")
+                logger.error("Error during rollback: %s", rollback_error)
         return jsonify({'message': f'Database error occurred: {str(e)}'}), 500
     finally:
         try:
@@ -99,25 +168,25 @@ def sync_cart(current_user):
                 cursor.close()
             if conn:
                 conn.close()
-                print("Database connection closed successfully")
         except Exception as e:
-            print(f"Error closing database connection: {str(e)}")
+            logger.error("Error closing database connection: %s", e)
 
 @cart.route('/cart', methods=['GET'])
+@query_budget(3)
 @token_required
 def get_cart(current_user):
     conn = None
-    cursor = None
     if not current_user or current_user['role'] != 'customer':
         return jsonify({'message': 'Only customers can access cart functionality'}), 403
 
     try:
-        print(f"Getting cart for customer: {current_user['user_id']}")
+        logger.debug("Getting cart for customer: %s", current_user['user_id'])
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True, buffered=True)
 
         # First, get the pending order ID
-        cursor.execute(
+        #both lookups run on every cart view, they are prepared once per pooled connection
+        order = fetch_one(
+            conn,
             """
             SELECT order_id, total_amount
             FROM orders
@@ -130,12 +199,12 @@ def get_cart(current_user):
         #this query will get the pending order for the customer
         #the order_id and total_amount will be returned
         
-        order = cursor.fetchone()
         if not order:
             return jsonify({'items': [], 'total': 0}), 200
 
         # Then get all items for this order
-        cursor.execute(
+        items = fetch_all(
+            conn,
             """
             SELECT 
                 oi.artwork_id,
@@ -153,12 +222,11 @@ def get_cart(current_user):
         )
         #this query will get all the items in the order_items table
         #the items will be joined with the artworks table to get the title and image_url
-        items = cursor.fetchall()
-        print(f"Found {len(items)} cart items")
+        logger.debug("Found %s cart items", len(items))
 
         cart_items = []
         for item in items:
-            print(f"Processing cart item: {item}")
+            logger.debug("Processing cart item: %s", item)
             cart_items.append({
                 'artwork_id': item['artwork_id'],
                 'title': item['title'],
@@ -174,19 +242,17 @@ def get_cart(current_user):
         }), 200
 
     except Exception as e:
-        print(f"Error getting cart: {str(e)}")
+        logger.error("Error getting cart: %s", e)
         return jsonify({'message': f'Database error occurred: {str(e)}'}), 500
     finally:
         try:
-            if cursor:
-                cursor.close()
             if conn:
                 conn.close()
-                print("Database connection closed successfully")
         except Exception as e:
-            print(f"Error closing database connection: {str(e)}")
+            logger.error("Error closing database connection: %s", e)
 
 @cart.route('/cart/checkout', methods=['POST'])
+@query_budget(2)
 @token_required
 def checkout(current_user):
     conn = None
@@ -195,91 +261,31 @@ def checkout(current_user):
         return jsonify({'message': 'Only customers can access cart functionality'}), 403
 
     try:
-        print(f"Processing checkout for customer: {current_user}")
+        logger.debug("Processing checkout for customer: %s", current_user['user_id'])
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True, buffered=True)
 
-        # Get pending order with items
-        cursor.execute(
-            """
-            SELECT 
-                o.order_id, 
-                o.total_amount,
-                o.created_at,
-                oi.artwork_id,
-                oi.quantity,
-                oi.price_at_time,
-                a.title,
-                a.image_url,
-                ar.name as artist_name
-            FROM orders o
-            JOIN order_items oi ON o.order_id = oi.order_id
-            JOIN artworks a ON oi.artwork_id = a.artwork_id
-            JOIN artists ar ON a.artist_id = ar.artist_id
-            WHERE o.customer_id = %s AND o.status = 'pending'
-            ORDER BY o.order_id DESC
-            """,
-            (current_user['user_id'],)
-        )
-        items = cursor.fetchall()
-        print(f"Found order items: {items}")
-
-        if not items:
+        # The order stays 'pending' here, it is confirmed (and its artworks marked sold)
+        # in one transaction when the shipping details are posted, see app/checkout.py
+        try:
+            order = load_checkout(cursor, current_user['user_id'])
+        except NoPendingOrder:
             return jsonify({'message': 'No pending order found'}), 404
+        except OrderUnavailable as e:
+            return jsonify({
+                'message': 'Some artworks in your cart have already been sold',
+                'unavailable': e.artwork_ids
+            }), 409
+        logger.debug("Checkout ready for order: %s", order['order_id'])
 
-        order_id = items[0]['order_id']
-        order_items = []
-        total_amount = 0
-
-        for item in items:
-            order_items.append({
-                'artwork_id': item['artwork_id'],
-                'title': item['title'],
-                'quantity': item['quantity'],
-                'price': float(item['price_at_time']),
-                'image_url': item['image_url'],
-                'artist_name': item['artist_name']
-            })
-            total_amount += float(item['price_at_time']) * item['quantity']
-        
-        # The order remains in 'pending' status until shipping details are added
-        # It will be updated to 'confirmed' after shipping information is provided
-
-        conn.commit()
-        print(f"Successfully processed checkout for order: {order_id}")
-        
-        # Fetch customer details for address
-        cursor.execute(
-            "SELECT name, address, phone_number FROM customers WHERE customer_id = %s",
-            (current_user['user_id'],)
-        )
-        customer = cursor.fetchone()
-        
         # Return order details for shipping page
         return jsonify({
             'message': 'Order processed successfully',
-            'order': {
-                'order_id': order_id,
-                'total_amount': total_amount,
-                'date': items[0]['created_at'].isoformat() if items[0]['created_at'] else None,
-                'status': 'pending',
-                'customer_name': current_user['name'],
-                'items': order_items,
-                'customer_details': {
-                    'name': customer['name'],
-                    'address': customer.get('address', ''),
-                    'phone_number': customer.get('phone_number', '')
-                }
-            }
+            'order': order
         }), 200
 
     except Exception as e:
-        print(f"Checkout error: {str(e)}")
-        if conn:
-            try:
-                conn.rollback()
-            except Exception as rollback_error:
-                print(f"Error during rollback: {str(rollback_error)}")
+        logger.error("Checkout error: %s", e)
         return jsonify({'message': f'Database error occurred: {str(e)}'}), 500
     finally:
         try:
@@ -287,39 +293,32 @@ def checkout(current_user):
                 cursor.close()
             if conn:
                 conn.close()
-                print("Database connection closed successfully")
         except Exception as e:
-            print(f"Error closing database connection: {str(e)}")
+            logger.error("Error closing database connection: %s", e)
 
 @cart.route('/orders', methods=['GET'])
+@read_only
+@query_budget(4)
 @token_required
 def get_orders(current_user):
     conn = None
-    cursor = None
     if not current_user or current_user['role'] != 'customer':
         return jsonify({'message': 'Only customers can access orders'}), 403
 
     try:
+        # Pagination is opt-in: without limit/cursor every confirmed order is returned
+        try:
+            after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+            limit = parse_limit(request.args.get('limit'), default=20) if request.args.get('limit') or after else None
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True, buffered=True)
 
-        # Get all confirmed orders for the customer
-        cursor.execute(
-            """
-            SELECT DISTINCT
-                o.order_id,
-                o.total_amount,
-                o.status,
-                o.created_at
-            FROM orders o
-            WHERE o.customer_id = %s AND o.status = 'confirmed'
-            ORDER BY o.created_at DESC
-            """,
-            (current_user['user_id'],)
+        # Get the confirmed orders for the customer with their items
+        orders, next_cursor = load_order_history(
+            conn, current_user['user_id'], status='confirmed', limit=limit, after=after
         )
-        #this query will get all the confirmed orders for the customer
-        #the order_id, total_amount, status, and created_at will be returned            
-        orders = cursor.fetchall()
         
         if not orders:
             return jsonify({
@@ -327,61 +326,39 @@ def get_orders(current_user):
                 'message': 'No orders found'
             }), 200
 
-        # Get items for each order
         order_list = []
         for order in orders:
-            cursor.execute(
-                """
-                SELECT 
-                    oi.artwork_id,
-                    oi.quantity,
-                    oi.price_at_time,
-                    a.title,
-                    a.image_url,
-                    ar.name as artist_name
-                FROM order_items oi
-                JOIN artworks a ON oi.artwork_id = a.artwork_id
-                JOIN artists ar ON a.artist_id = ar.artist_id
-                WHERE oi.order_id = %s
-                """,
-                (order['order_id'],)
-            )
-            #this query will get all the items in the order_items table
-        #the items will be joined with the artworks table to get the title and image_url
-            items = cursor.fetchall()
-            
             order_data = {
                 'order_id': order['order_id'],
-                'total_amount': order['total_amount'],  # CustomJSONEncoder will handle conversion
+                'total_amount': order['total_amount'],  # FastJSONProvider serializes it (app/utils.py)
                 'status': order['status'],
-                'date': order['created_at'],  # CustomJSONEncoder will handle conversion
+                'date': order['created_at'],  # FastJSONProvider serializes it (app/utils.py)
                 'items': [{
                     'artwork_id': item['artwork_id'],
                     'title': item['title'],
                     'quantity': item['quantity'],
-                    'price': item['price_at_time'],  # CustomJSONEncoder will handle conversion
+                    'price': item['price_at_time'],  # FastJSONProvider serializes it (app/utils.py)
                     'image_url': item['image_url'],
                     'artist_name': item['artist_name']
-                } for item in items]
+                } for item in order['items']]
             }
             order_list.append(order_data)
        #we are creating a list of dictionaries for each order
         #each dictionary will contain the order_id, total_amount, status, and created_at
         return jsonify({
-            'orders': order_list
+            'orders': order_list,
+            'next_cursor': next_cursor
         }), 200
 
     except Exception as e:
-        print(f"Error getting orders: {str(e)}")
+        logger.error("Error getting orders: %s", e)
         return jsonify({
             'message': 'Failed to fetch orders',
             'error': str(e)
         }), 500
     finally:
         try:
-            if cursor:
-                cursor.close()
             if conn:
                 conn.close()
         except Exception as e:
-            print(f"Error closing database connection: {str(e)}") 
\ No newline at end of file
+            logger.error("Error closing database connection: %s", e)
\ No newline at end of file
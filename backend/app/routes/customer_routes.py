@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from app.config import get_db_connection
-from app.auth import token_required
+from app.auth import token_required, invalidate_principal
+from app.repositories import customers as repository
 
 customer_routes = Blueprint('customer_routes', __name__)
 
@@ -8,10 +9,7 @@ customer_routes = Blueprint('customer_routes', __name__)
 @customer_routes.route('/customers', methods=['GET'])
 def get_customers():
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM customers")
-    customers = cursor.fetchall()
-    cursor.close()
+    customers = repository.list_customers(conn)
     conn.close()
     return jsonify(customers)
 
@@ -23,13 +21,7 @@ def get_customer_profile(current_user):
         return jsonify({'message': 'Unauthorized'}), 403
         
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT customer_id, name, email, address, phone_number FROM customers WHERE customer_id = %s",
-        (current_user['user_id'],)
-    )
-    customer = cursor.fetchone()
-    cursor.close()
+    customer = repository.get_customer(conn, current_user['user_id'])
     conn.close()
     
     if not customer:
@@ -68,6 +60,8 @@ def update_customer_profile(current_user):
         conn.commit()
         cursor.close()
         conn.close()
+        # the cached principal still carries the old name
+        invalidate_principal('customer', current_user['user_id'])
         
         return jsonify({'message': 'Profile updated successfully'}), 200
     except Exception as e:
@@ -1,107 +1,146 @@
-from flask import Blueprint, jsonify, request
+import logging
+from flask import Blueprint, jsonify, request, Response, stream_with_context, current_app
+from mysql.connector import Error, errorcode
 from app.auth import token_required, admin_required
+from app import config
 from app.config import get_db_connection
-from datetime import datetime
+from app.database import read_only
+from app.order_history import load_order_history
+from app.prepared import counters as prepared_counters
+from app.query_stats import endpoint_stats, query_budget
+from app.limits import limit_stats, rate_cost
+from app.replicas import get_replica_router
+from app.export import EXPORT_FORMATS, stream_export
+from app.rollup import SOLD_STATUSES
+from app.utils import encode_cursor, decode_cursor, parse_limit, parse_date_range
+import json
 
 dashboard_bp = Blueprint('dashboard', __name__)
+logger = logging.getLogger(__name__)
+
+ORDER_STATUSES = ('pending', 'confirmed', 'delivered', 'cancelled')
 
 @dashboard_bp.route('/dashboard/admin/transactions', methods=['GET'])
+@read_only
+@query_budget(2)
+@rate_cost(5)
 @token_required
 @admin_required
 def get_all_transactions(current_user):
+    """
+    One row per order item (or one 'N/A' row for an order without items), newest orders first.
+    Query parameters:
+      limit  - number of orders per page (default 50, max 200)
+      cursor - next_cursor value from the previous page
+      from / to - order date range (YYYY-MM-DD, 'to' is inclusive)
+      status - one of pending, confirmed, delivered, cancelled
+    The page is fetched with a single query and streamed to the client row by row.
+    """
     conn = None
     cursor = None
     try:
+        try:
+            limit = parse_limit(request.args.get('limit'), default=50, maximum=200)
+            after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+            start, end = parse_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        status = request.args.get('status')
+        if status and status not in ORDER_STATUSES:
+            return jsonify({'error': f"status must be one of {', '.join(ORDER_STATUSES)}"}), 400
+
+        conditions = []
+        params = []
+        if status:
+            conditions.append("status = %s")
+            params.append(status)
+        if start:
+            conditions.append("created_at >= %s")
+            params.append(start)
+        if end:
+            conditions.append("created_at < %s")
+            params.append(end)
+        if after:
+            conditions.append("(created_at < %s OR (created_at = %s AND order_id < %s))")
+            params.extend([after[0], after[0], after[1]])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        
-        # Check if orders table exists without using SHOW TABLES
+        cursor = conn.cursor(dictionary=True)
+
+        # The derived table picks the page of orders (plus one to detect a next page),
+        # then everything the report needs is joined onto it in the same round trip.
+        # Items are joined as a group so an order without items still yields one row.
         try:
-            cursor.execute("SELECT 1 FROM orders LIMIT 1")
-            result = cursor.fetchall()  # Consume the result
-            orders_table_exists = True
-        except Exception as e:
-            print(f"Orders table check error: {e}")
-            orders_table_exists = False
-        
-        if not orders_table_exists:
-            return jsonify({'transactions': [], 'message': 'No orders table found'}), 200
-        
-        # Get ALL orders - not just limited to 5
-        query = """
-        SELECT * FROM orders
-        """
-        cursor.execute(query)
-        orders = cursor.fetchall()
-        
-        # If we have orders, construct proper transactions response
-        if orders:
-            transactions = []
-            for order in orders:
-                # Create a new cursor for each sub-query to avoid unread result issues
-                item_cursor = conn.cursor(dictionary=True, buffered=True)
-                customer_cursor = conn.cursor(dictionary=True, buffered=True)
-                
-                # Get order items for this order
-                try:
-                    item_cursor.execute("""
-                        SELECT oi.*, a.title as artwork_title, ar.name as artist_name 
-                        FROM order_items oi 
-                        JOIN artworks a ON oi.artwork_id = a.artwork_id
-                        JOIN artists ar ON a.artist_id = ar.artist_id
-                        WHERE oi.order_id = %s
-                    """, (order['order_id'],))
-                    items = item_cursor.fetchall()
-                except Exception as e:
-                    print(f"Error getting order items: {e}")
-                    items = []
-                finally:
-                    item_cursor.close()
-                
-                # Get customer details
-                try:
-                    customer_cursor.execute("""
-                        SELECT name as customer_name 
-                        FROM customers 
-                        WHERE customer_id = %s
-                    """, (order['customer_id'],))
-                    customer = customer_cursor.fetchone()
-                except Exception as e:
-                    print(f"Error getting customer details: {e}")
-                    customer = None
-                finally:
-                    customer_cursor.close()
-                
-                # Create transaction entry for each order item
-                if items:
-                    for item in items:
-                        transaction = {
-                            'order_id': order['order_id'],
-                            'status': order.get('status', 'Unknown'),
-                            'customer_name': customer['customer_name'] if customer else 'Unknown',
-                            'artwork_title': item.get('artwork_title', 'Unknown'),
-                            'artist_name': item.get('artist_name', 'Unknown'),
-                            'quantity': item.get('quantity', 0)
-                        }
-                        transactions.append(transaction)
-                else:
-                    # If no items, add basic transaction info
+            cursor.execute(f"""
+                SELECT o.order_id, o.status, o.created_at, o.total_amount,
+                       c.name as customer_name,
+                       a.title as artwork_title, ar.name as artist_name,
+                       oi.order_item_id, oi.quantity, oi.price_at_time
+                FROM (
+                    SELECT order_id, customer_id, status, created_at, total_amount
+                    FROM orders
+                    {where}
+                    ORDER BY created_at DESC, order_id DESC
+                    LIMIT %s
+                ) o
+                LEFT JOIN customers c ON o.customer_id = c.customer_id
+                LEFT JOIN (order_items oi
+                           JOIN artworks a ON oi.artwork_id = a.artwork_id
+                           JOIN artists ar ON a.artist_id = ar.artist_id)
+                       ON oi.order_id = o.order_id
+                ORDER BY o.created_at DESC, o.order_id DESC, oi.order_item_id
+            """, (*params, limit + 1))
+        except Error as e:
+            if e.errno == errorcode.ER_NO_SUCH_TABLE:
+                return jsonify({'transactions': [], 'message': 'No orders table found'}), 200
+            raise
+
+        def generate(conn, cursor):
+            try:
+                yield '{"transactions": ['
+                seen_orders = 0
+                last_order = None
+                first = True
+                for row in cursor:
+                    if last_order is None or row['order_id'] != last_order['order_id']:
+                        seen_orders += 1
+                        if seen_orders > limit:
+                            # This row belongs to the look-ahead order; drain what is left of it
+                            cursor.fetchall()
+                            break
+                        last_order = row
                     transaction = {
-                        'order_id': order['order_id'],
-                        'status': order.get('status', 'Unknown'),
-                        'customer_name': customer['customer_name'] if customer else 'Unknown',
-                        'artwork_title': 'N/A',
-                        'artist_name': 'N/A',
-                        'quantity': 0
-                    }                   
-                    transactions.append(transaction)
-        else:
-            # If no orders found, return empty list
-            transactions = []
-        
-        return jsonify({'transactions': transactions}), 200
+                        'order_id': row['order_id'],
+                        'status': row['status'] or 'Unknown',
+                        'date': row['created_at'].isoformat() if row['created_at'] else None,
+                        'total_amount': float(row['total_amount'] or 0),
+                        'customer_name': row['customer_name'] or 'Unknown',
+                        'artwork_title': row['artwork_title'] if row['order_item_id'] else 'N/A',
+                        'artist_name': row['artist_name'] if row['order_item_id'] else 'N/A',
+                        'quantity': row['quantity'] or 0,
+                        'price': float(row['price_at_time'] or 0)
+                    }
+                    yield ('' if first else ',') + current_app.json.dumps(transaction)
+                    first = False
+                next_cursor = None
+                if seen_orders > limit:
+                    next_cursor = encode_cursor(last_order['created_at'], last_order['order_id'])
+                yield '], "next_cursor": ' + json.dumps(next_cursor) + '}'
+            except Exception as e:
+                logger.error("Error streaming admin transactions: %s", e)
+                raise
+            finally:
+                cursor.close()
+                conn.close()
+
+        # the generator owns the connection from here on
+        response = Response(stream_with_context(generate(conn, cursor)), mimetype='application/json')
+        conn = None
+        cursor = None
+        return response, 200
     except Exception as e:
-        print(f"Error in admin transactions: {str(e)}")
+        logger.error("Error in admin transactions: %s", e)
         return jsonify({'error': str(e)}), 500
     finally:
         if cursor:
@@ -109,82 +148,82 @@ def get_all_transactions(current_user):
         if conn:
             conn.close()
 
+# sort keys accepted by the artist leaderboard, mapped to the column they order by
+ARTIST_SORT_COLUMNS = {
+    'sales': 'sold_artworks',
+    'artworks': 'total_artworks',
+    'revenue': 'revenue',
+}
+
 @dashboard_bp.route('/dashboard/admin/artists', methods=['GET'])
+@read_only
+@query_budget(2)
+@rate_cost(5)
 @token_required
 @admin_required
 def get_artists_stats(current_user):
+    """
+    Artist leaderboard computed with one grouped query.
+    Query parameters:
+      sort  - sales (default), artworks or revenue; always descending
+      limit - only return the top N artists
+    """
     conn = None
     cursor = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        
-        # Check if artists table exists
+        sort = request.args.get('sort', 'sales')
+        if sort not in ARTIST_SORT_COLUMNS:
+            return jsonify({'error': f"sort must be one of {', '.join(ARTIST_SORT_COLUMNS)}"}), 400
         try:
-            cursor.execute("SELECT 1 FROM artists LIMIT 1")
-            result = cursor.fetchall()  # Consume the result
-            artists_table_exists = True
-        except Exception as e:
-            print(f"Artists table check error: {e}")
-            return jsonify({'artists_stats': [], 'message': 'No artists table found'}), 200
-        
-        # First get all artists
+            limit = parse_limit(request.args.get('limit'), maximum=1000) if request.args.get('limit') else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        # Sales come from the precomputed rollup (one row per artist), only the
+        # artwork counts are aggregated here, from the artist_id index
+        query = f"""
+            SELECT ar.artist_id, ar.name as artist_name,
+                   COALESCE(aw.total_artworks, 0) as total_artworks,
+                   COALESCE(s.sold_count, 0) as sold_artworks,
+                   COALESCE(s.revenue, 0) as revenue
+            FROM artists ar
+            LEFT JOIN (
+                SELECT artist_id, COUNT(*) as total_artworks
+                FROM artworks
+                GROUP BY artist_id
+            ) aw ON aw.artist_id = ar.artist_id
+            LEFT JOIN artist_sales_rollup s ON s.artist_id = ar.artist_id
+            ORDER BY {ARTIST_SORT_COLUMNS[sort]} DESC, ar.artist_id
+        """
+        params = ()
+        if limit:
+            query += " LIMIT %s"
+            params = (limit,)
         try:
-            cursor.execute("SELECT * FROM artists")
-            artists = cursor.fetchall()  # Consume the result
-        except Exception as e:
-            print(f"Error getting artists: {e}")
-            return jsonify({'artists_stats': [], 'message': 'Error retrieving artists'}), 500
-        
-        if not artists:
+            cursor.execute(query, params)
+        except Error as e:
+            if e.errno == errorcode.ER_NO_SUCH_TABLE:
+                return jsonify({'artists_stats': [], 'message': 'No artists table found'}), 200
+            raise
+        rows = cursor.fetchall()
+
+        if not rows:
             return jsonify({'artists_stats': [], 'message': 'No artists found'}), 200
-        
-        stats = []
-        for artist in artists:
-            # Use new cursors for each query
-            artworks_cursor = conn.cursor(dictionary=True, buffered=True)
-            sales_cursor = conn.cursor(dictionary=True, buffered=True)
-            
-            # Count artworks for this artist
-            try:
-                artworks_cursor.execute("""
-                    SELECT COUNT(*) as total_artworks
-                    FROM artworks
-                    WHERE artist_id = %s
-                """, (artist['artist_id'],))
-                total_result = artworks_cursor.fetchone()
-                total_artworks = total_result['total_artworks'] if total_result else 0
-            except Exception as e:
-                print(f"Error counting artworks for artist {artist['artist_id']}: {e}")
-                total_artworks = 0
-            finally:
-                artworks_cursor.close()
-                
-            # Count sold artworks
-            try:
-                sales_cursor.execute("""
-                    SELECT COUNT(DISTINCT oi.order_item_id) as sold_artworks
-                    FROM artworks a
-                    JOIN order_items oi ON a.artwork_id = oi.artwork_id
-                    WHERE a.artist_id = %s
-                """, (artist['artist_id'],))
-                sales_result = sales_cursor.fetchone()
-                sold_artworks = sales_result['sold_artworks'] if sales_result else 0
-            except Exception as e:
-                print(f"Error counting sold artworks for artist {artist['artist_id']}: {e}")
-                sold_artworks = 0
-            finally:
-                sales_cursor.close()
-                
-            stats.append({
-                'artist_name': artist['name'],
-                'total_artworks': total_artworks,
-                'sold_artworks': sold_artworks
-            })
-        
+
+        stats = [{
+            'artist_id': row['artist_id'],
+            'artist_name': row['artist_name'],
+            'total_artworks': int(row['total_artworks']),
+            'sold_artworks': int(row['sold_artworks']),
+            'revenue': float(row['revenue'])
+        } for row in rows]
+
         return jsonify({'artists_stats': stats}), 200
     except Exception as e:
-        print(f"Error in admin artists stats: {str(e)}")
+        logger.error("Error in admin artists stats: %s", e)
         return jsonify({'error': str(e)}), 500
     finally:
         if cursor:
@@ -193,6 +232,9 @@ def get_artists_stats(current_user):
             conn.close()
 
 @dashboard_bp.route('/dashboard/artist/stats', methods=['GET'])
+@read_only
+@query_budget(4)
+@rate_cost(3)
 @token_required
 def get_artist_stats(current_user):
     conn = None
@@ -201,77 +243,69 @@ def get_artist_stats(current_user):
         if current_user['role'] != 'artist':
             return jsonify({'error': 'Unauthorized'}), 403
             
-        print(f"Getting stats for artist: {current_user}")
+        logger.debug("Getting stats for artist: %s", current_user)
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True, buffered=True)
         
-        # Get artist's total artworks
+        # Artwork count plus the artist's row of the sales rollup
         cursor.execute("""
-            SELECT COUNT(*) as total_artworks
-            FROM artworks
-            WHERE artist_id = %s
-        """, (current_user['user_id'],))
-        total_result = cursor.fetchone()
-        total_artworks = total_result['total_artworks'] if total_result else 0
-        
-        print(f"Found {total_artworks} artworks for artist {current_user['user_id']}")
+            SELECT
+                (SELECT COUNT(*) FROM artworks WHERE artist_id = %s) as total_artworks,
+                COALESCE(s.sold_count, 0) as sold_count,
+                COALESCE(s.quantity_sold, 0) as quantity_sold,
+                COALESCE(s.revenue, 0) as revenue
+            FROM (SELECT 1) d
+            LEFT JOIN artist_sales_rollup s ON s.artist_id = %s
+        """, (current_user['user_id'], current_user['user_id']))
+        totals = cursor.fetchone()
+        total_artworks = totals['total_artworks']
         
-        # Use a new cursor for each query
-        sales_count_cursor = conn.cursor(dictionary=True, buffered=True)
-        sales_details_cursor = conn.cursor(dictionary=True, buffered=True)
+        logger.debug("Found %s artworks for artist %s", total_artworks, current_user['user_id'])
         
-        # Check if there are any sales
+        by_artwork = []
+        if totals['sold_count'] > 0:
+            # Per-artwork totals, also from the rollup
+            cursor.execute("""
+                SELECT r.artwork_id, a.title, r.sold_count, r.quantity_sold, r.revenue
+                FROM artwork_sales_rollup r
+                JOIN artworks a ON r.artwork_id = a.artwork_id
+                WHERE r.artist_id = %s
+                ORDER BY r.revenue DESC
+            """, (current_user['user_id'],))
+            by_artwork = cursor.fetchall()
+
+        # Get artist's ordered artworks
+        # the list keeps every order status, as it always has (pending carts included);
+        # each sale carries its status, only the sales_summary totals are limited to SOLD_STATUSES
         try:
-            sales_count_cursor.execute("""
-                SELECT COUNT(*) as sale_count
+            cursor.execute("""
+                SELECT a.title, oi.quantity, c.name as customer_name, o.created_at as date, o.status
                 FROM artworks a
                 JOIN order_items oi ON a.artwork_id = oi.artwork_id
                 JOIN orders o ON oi.order_id = o.order_id
+                JOIN customers c ON o.customer_id = c.customer_id
                 WHERE a.artist_id = %s
+                ORDER BY o.created_at DESC
             """, (current_user['user_id'],))
-            sale_result = sales_count_cursor.fetchone()
-            sale_count = sale_result['sale_count'] if sale_result else 0
+            sales_results = cursor.fetchall()
         except Exception as e:
-            print(f"Error counting sales: {e}")
-            sale_count = 0
-        finally:
-            sales_count_cursor.close()
-            
-        sales_results = []
-        
-        if sale_count > 0:
-            # Get artist's sold artworks
-            try:
-                sales_details_cursor.execute("""
-                    SELECT a.title, oi.quantity, c.name as customer_name, o.date
-                    FROM artworks a
-                    JOIN order_items oi ON a.artwork_id = oi.artwork_id
-                    JOIN orders o ON oi.order_id = o.order_id
-                    JOIN customers c ON o.customer_id = c.customer_id
-                    WHERE a.artist_id = %s
-                """, (current_user['user_id'],))
-                sales_results = sales_details_cursor.fetchall()
-                
-                # Convert datetime objects to ISO format strings
-                for sale in sales_results:
-                    if isinstance(sale.get('date'), datetime):
-                        sale['date'] = sale['date'].isoformat()
-                    elif sale.get('date'):
-                        sale['date'] = str(sale['date'])
-                    else:
-                        sale['date'] = 'N/A'
-            except Exception as e:
-                print(f"Error getting sales details: {e}")
-                sales_results = []
-            finally:
-                sales_details_cursor.close()
-        
+            logger.error("Error getting sales details: %s", e)
+            sales_results = []
+
         return jsonify({
             'total_artworks': total_artworks,
-            'sales': sales_results
+            'sales': sales_results,
+            'sales_summary': {
+                'sold_count': int(totals['sold_count']),
+                'quantity_sold': int(totals['quantity_sold']),
+                'revenue': totals['revenue'],
+                'by_artwork': by_artwork,
+                # the order statuses the summary counts as sold
+                'statuses': list(SOLD_STATUSES)
+            }
         }), 200
     except Exception as e:
-        print(f"Error in artist stats: {str(e)}")
+        logger.error("Error in artist stats: %s", e)
         return jsonify({'error': str(e)}), 500
     finally:
         if cursor:
@@ -280,107 +314,219 @@ def get_artist_stats(current_user):
             conn.close()
 
 @dashboard_bp.route('/dashboard/customer/orders', methods=['GET'])
+@read_only
+@query_budget(4)
+@rate_cost(2)
 @token_required
 def get_customer_orders(current_user):
     conn = None
-    cursor = None
     try:
         if current_user['role'] != 'customer':
             return jsonify({'error': 'Unauthorized'}), 403
             
-        print(f"Getting orders for customer: {current_user}")
+        # Pagination is opt-in: without limit/cursor every order is returned
+        try:
+            after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+            limit = parse_limit(request.args.get('limit'), default=20) if request.args.get('limit') or after else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        logger.debug("Getting orders for customer: %s", current_user['user_id'])
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True, buffered=True)
-        
-        # Check if orders table exists and has data for this customer
-        cursor.execute("""
-            SELECT COUNT(*) as order_count 
-            FROM orders 
-            WHERE customer_id = %s
-        """, (current_user['user_id'],))
-        order_count_result = cursor.fetchone()
-        order_count = order_count_result['order_count'] if order_count_result else 0
-        
-        print(f"Found {order_count} orders for customer {current_user['user_id']}")
-        
-        if order_count == 0:
-            return jsonify({'orders': []}), 200
-        
-        # Create a new cursor for orders query
-        orders_cursor = conn.cursor(dictionary=True, buffered=True)
         
-        # Get customer's orders with items and shipping details
-        orders_cursor.execute("""
-            SELECT * FROM orders 
-            WHERE customer_id = %s 
-            ORDER BY date DESC
-        """, (current_user['user_id'],))
-        orders = orders_cursor.fetchall()
-        orders_cursor.close()
+        # Orders, items and shipping details in a fixed number of queries
+        orders, next_cursor = load_order_history(conn, current_user['user_id'], limit=limit, after=after)
         
         order_results = []
         for order in orders:
-            # Create new cursors for each sub-query
-            items_cursor = conn.cursor(dictionary=True, buffered=True)
-            shipping_cursor = conn.cursor(dictionary=True, buffered=True)
-            
-            # Get order items
-            try:
-                items_cursor.execute("""
-                    SELECT oi.*, a.title as artwork_title, ar.name as artist_name
-                    FROM order_items oi
-                    JOIN artworks a ON oi.artwork_id = a.artwork_id
-                    JOIN artists ar ON a.artist_id = ar.artist_id
-                    WHERE oi.order_id = %s
-                """, (order['order_id'],))
-                items = items_cursor.fetchall()
-            except Exception as e:
-                print(f"Error getting order items: {e}")
-                items = []
-            finally:
-                items_cursor.close()
-            
-            # Get shipping details if available
-            try:
-                shipping_cursor.execute("""
-                    SELECT * FROM shipping_details
-                    WHERE order_id = %s
-                """, (order['order_id'],))
-                shipping = shipping_cursor.fetchone()
-            except Exception as e:
-                print(f"Error getting shipping details: {e}")
-                shipping = None
-            finally:
-                shipping_cursor.close()
+            shipping = order['shipping']
             
             # Create order entries
-            for item in items:
+            for item in order['items']:
                 order_entry = {
                     'order_id': order['order_id'],
-                    'date': order['date'].isoformat() if hasattr(order.get('date', None), 'isoformat') else str(order.get('date', 'N/A')),
-                    'total_amount': order.get('total_amount', 0),
-                    'status': order.get('status', 'Unknown'),
-                    'artwork_title': item.get('artwork_title', 'Unknown'),
-                    'artist_name': item.get('artist_name', 'Unknown'),
-                    'quantity': item.get('quantity', 0),
-                    'price': item.get('price', 0)
+                    'date': order['created_at'].isoformat() if order['created_at'] else 'N/A',
+                    'total_amount': order['total_amount'] or 0,
+                    'status': order['status'] or 'Unknown',
+                    'artwork_title': item['title'] or 'Unknown',
+                    'artist_name': item['artist_name'] or 'Unknown',
+                    'quantity': item['quantity'] or 0,
+                    'price': item['price_at_time'] or 0
                 }
                 
                 if shipping:
-                    order_entry['shipping_address'] = shipping.get('address', 'N/A')
-                    order_entry['shipping_phone'] = shipping.get('phone_number', 'N/A')
+                    order_entry['shipping_address'] = shipping['address'] or 'N/A'
+                    order_entry['shipping_phone'] = shipping['phone_number'] or 'N/A'
                 else:
                     order_entry['shipping_address'] = 'N/A'
                     order_entry['shipping_phone'] = 'N/A'
                 
                 order_results.append(order_entry)
         
-        return jsonify({'orders': order_results}), 200
+        return jsonify({'orders': order_results, 'next_cursor': next_cursor}), 200
+    except Exception as e:
+        logger.error("Error in customer orders: %s", e)
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if conn:
+            conn.close() 
+
+@dashboard_bp.route('/dashboard/admin/pool', methods=['GET'])
+@token_required
+@admin_required
+def get_pool_stats(current_user):
+    """
+    Connection pool statistics: slots in use, waiters and the wait-time histogram,
+    plus replica lag, the prepared statement cache activity and the requests turned
+    away by admission control in this worker.
+    """
+    try:
+        pool = config.get_connection_pool()
+    except Exception as e:
+        logger.error("Connection pool not available: %s", e)
+        return jsonify({'error': 'Connection pool not initialized'}), 503
+    router = get_replica_router()
+    return jsonify({
+        'pool': pool.stats(),
+        'replicas': router.stats() if router else [],
+        'prepared_statements': prepared_counters.snapshot(),
+        'admission': limit_stats(),
+    }), 200
+
+@dashboard_bp.route('/dashboard/admin/queries', methods=['GET', 'DELETE'])
+@token_required
+@admin_required
+def get_query_stats(current_user):
+    """
+    Query counts, database time, rows and slowest statements per endpoint for this
+    worker, most total database time first. DELETE starts the counters over.
+    """
+    if request.method == 'DELETE':
+        endpoint_stats.reset()
+        return jsonify({'message': 'Query statistics reset'}), 200
+    endpoints = sorted(endpoint_stats.snapshot().items(), key=lambda item: item[1]['total_db_time_ms'], reverse=True)
+    return jsonify({'endpoints': [{'endpoint': endpoint, **stats} for endpoint, stats in endpoints]}), 200
+
+def _export_args():
+    """Read format, from and to for the export endpoints, raising ValueError on bad input."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    start, end = parse_date_range(request.args)
+    conditions = []
+    params = []
+    if start:
+        conditions.append("o.created_at >= %s")
+        params.append(start)
+    if end:
+        conditions.append("o.created_at < %s")
+        params.append(end)
+    return fmt, conditions, params
+
+TRANSACTION_EXPORT_COLUMNS = [
+    'order_id', 'date', 'status', 'customer_name', 'artwork_title', 'artist_name', 'quantity', 'price'
+]
+
+@dashboard_bp.route('/dashboard/admin/transactions/export', methods=['GET'])
+@read_only
+@rate_cost(20)
+@token_required
+@admin_required
+def export_transactions(current_user):
+    """
+    Stream every transaction as NDJSON (default) or CSV, oldest first.
+    Query parameters: format=ndjson|csv, from / to (YYYY-MM-DD), status.
+    The response is compressed when the client accepts it (see app/compression.py), ?gzip=0 turns that off.
+    """
+    conn = None
+    cursor = None
+    try:
+        try:
+            fmt, conditions, params = _export_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        status = request.args.get('status')
+        if status:
+            if status not in ORDER_STATUSES:
+                return jsonify({'error': f"status must be one of {', '.join(ORDER_STATUSES)}"}), 400
+            conditions.append("o.status = %s")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = get_db_connection()
+        # a plain (unbuffered, tuple) cursor streams rows off the socket instead of loading them all
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT o.order_id, o.created_at, o.status, c.name,
+                   a.title, ar.name, oi.quantity, oi.price_at_time
+            FROM orders o
+            LEFT JOIN customers c ON o.customer_id = c.customer_id
+            LEFT JOIN (order_items oi
+                       JOIN artworks a ON oi.artwork_id = a.artwork_id
+                       JOIN artists ar ON a.artist_id = ar.artist_id)
+                   ON oi.order_id = o.order_id
+            {where}
+            ORDER BY o.created_at, o.order_id, oi.order_item_id
+        """, tuple(params))
+
+        # the stream owns the cursor and connection from here on
+        response = stream_export(conn, cursor, TRANSACTION_EXPORT_COLUMNS, fmt, 'transactions')
+        conn = None
+        cursor = None
+        return response
+    except Exception as e:
+        logger.error("Error exporting transactions: %s", e)
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+SALES_EXPORT_COLUMNS = ['order_id', 'date', 'status', 'title', 'quantity', 'price', 'customer_name']
+
+@dashboard_bp.route('/dashboard/artist/sales/export', methods=['GET'])
+@read_only
+@rate_cost(20)
+@token_required
+def export_artist_sales(current_user):
+    """
+    Stream the current artist's sales as NDJSON (default) or CSV, oldest first.
+    Query parameters: format=ndjson|csv, from / to (YYYY-MM-DD).
+    """
+    conn = None
+    cursor = None
+    try:
+        if current_user['role'] != 'artist':
+            return jsonify({'error': 'Unauthorized'}), 403
+        try:
+            fmt, conditions, params = _export_args()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        conditions.insert(0, "a.artist_id = %s")
+        params.insert(0, current_user['user_id'])
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT o.order_id, o.created_at, o.status, a.title, oi.quantity, oi.price_at_time, c.name
+            FROM artworks a
+            JOIN order_items oi ON a.artwork_id = oi.artwork_id
+            JOIN orders o ON oi.order_id = o.order_id
+            JOIN customers c ON o.customer_id = c.customer_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY o.created_at, o.order_id
+        """, tuple(params))
+
+        response = stream_export(conn, cursor, SALES_EXPORT_COLUMNS, fmt, 'sales')
+        conn = None
+        cursor = None
+        return response
     except Exception as e:
-        print(f"Error in customer orders: {str(e)}")
+        logger.error("Error exporting artist sales: %s", e)
         return jsonify({'error': str(e)}), 500
     finally:
         if cursor:
             cursor.close()
         if conn:
-            conn.close() 
\ No newline at end of file
+            conn.close()
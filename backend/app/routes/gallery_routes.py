@@ -1,17 +1,19 @@
  
 from flask import Blueprint, request, jsonify
-from app.config import get_db_connection
+from app.config import Config, get_db_connection
+from app.database import read_only
+from app.cache import cached_response, invalidate_responses
+from app.repositories import galleries as repository
 
 gallery_routes = Blueprint('gallery_routes', __name__)
 
 # Fetch all galleries
 @gallery_routes.route('/galleries', methods=['GET'])
+@read_only
+@cached_response('galleries', Config.GALLERIES_CACHE_TTL)
 def get_galleries():
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM galleries")
-    galleries = cursor.fetchall()
-    cursor.close()
+    galleries = repository.list_galleries(conn)
     conn.close()
     return jsonify(galleries)
 
@@ -30,4 +32,5 @@ def add_gallery():
     conn.commit()
     cursor.close()
     conn.close()
+    invalidate_responses('galleries')
     return jsonify({"message": "Gallery added successfully!"}), 201
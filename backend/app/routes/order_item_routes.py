@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.config import get_db_connection
+from app.repositories import order_items as repository
 
 order_item_routes = Blueprint('order_item_routes', __name__)
 
@@ -7,10 +8,7 @@ order_item_routes = Blueprint('order_item_routes', __name__)
 @order_item_routes.route('/order_items', methods=['GET'])
 def get_order_items():
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM order_item")
-    order_items = cursor.fetchall()
-    cursor.close()
+    order_items = repository.list_order_items(conn)
     conn.close()
     return jsonify(order_items)
 
@@ -1,6 +1,7 @@
  
 from flask import Blueprint, request, jsonify
 from app.config import get_db_connection
+from app.repositories import orders as repository
 
 order_routes = Blueprint('order_routes', __name__)
 
@@ -8,10 +9,7 @@ order_routes = Blueprint('order_routes', __name__)
 @order_routes.route('/orders', methods=['GET'])
 def get_orders():
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM orders")
-    orders = cursor.fetchall()
-    cursor.close()
+    orders = repository.list_orders(conn)
     conn.close()
     return jsonify(orders)
 
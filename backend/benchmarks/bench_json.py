@@ -0,0 +1,113 @@
+"""
+Compare JSON serialization of API responses.
+
+  current  - the old path: a per-row pass converting Decimal to float, then Flask's default provider
+  stdlib   - FastJSONProvider without orjson (standard library json with json_default)
+  orjson   - FastJSONProvider with orjson, when it is installed
+
+Run from the backend directory:
+    python -m benchmarks.bench_json --rows 20000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app import utils
+from app.utils import FastJSONProvider
+
+
+def catalog_rows(n):
+    base = datetime(2024, 1, 1)
+    return [{
+        'artwork_id': i,
+        'title': f'Artwork {i}',
+        'description': 'A vibrant abstract composition ' * 3,
+        'price': Decimal('1200.00') + i,
+        'image_url': f'https://example.com/images/{i}.jpg',
+        'artist_id': i % 500,
+        'status': 'available',
+        'created_at': base + timedelta(minutes=i),
+        'updated_at': base + timedelta(minutes=i),
+        'artist_name': f'Artist {i % 500}',
+        'artist_email': f'artist{i % 500}@example.com',
+    } for i in range(n)]
+
+
+def transaction_rows(n):
+    base = datetime(2024, 1, 1)
+    return {'transactions': [{
+        'order_id': i // 3,
+        'status': 'confirmed',
+        'date': base + timedelta(hours=i),
+        'total_amount': Decimal('3600.00'),
+        'customer_name': f'Customer {i % 1000}',
+        'artwork_title': f'Artwork {i}',
+        'artist_name': f'Artist {i % 500}',
+        'quantity': 1,
+        'price': Decimal('1200.00'),
+    } for i in range(n)]}
+
+
+def serialize_artwork(artwork):
+    # the per-row conversion the routes used to do
+    if 'price' in artwork and isinstance(artwork['price'], Decimal):
+        artwork['price'] = float(artwork['price'])
+    return artwork
+
+
+def time_it(build, serialize, repeat):
+    # rows are rebuilt before every run (outside the timed section) because
+    # the old per-row pass mutates them
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        data = build()
+        start = time.perf_counter()
+        size = len(serialize(data).get_data())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+    orjson = utils.orjson
+
+    def current_catalog(rows):
+        return default_provider.response([serialize_artwork(row) for row in rows])
+
+    payloads = [
+        ('catalog', lambda: catalog_rows(args.rows), current_catalog),
+        ('transactions', lambda: transaction_rows(args.rows), default_provider.response),
+    ]
+
+    print(f"{'payload':<14}{'path':<10}{'best (ms)':>12}{'bytes':>12}{'speedup':>10}")
+    with app.app_context():
+        for name, build, current in payloads:
+            results = [('current', time_it(build, current, args.repeat))]
+            utils.orjson = None
+            results.append(('stdlib', time_it(build, fast_provider.response, args.repeat)))
+            utils.orjson = orjson
+            if orjson is not None:
+                results.append(('orjson', time_it(build, fast_provider.response, args.repeat)))
+
+            baseline = results[0][1][0]
+            for path, (seconds, size) in results:
+                print(f"{name:<14}{path:<10}{seconds * 1000:>12.1f}{size:>12}{baseline / seconds:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
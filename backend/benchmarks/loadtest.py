@@ -0,0 +1,366 @@
+"""
+Concurrent load test of the core API flows.
+
+Virtual users run a weighted mix of scenarios against the API:
+
+  browse     - GET /api/artworks, sometimes followed by the next page
+  search     - GET /api/artworks/search
+  purchase   - POST /api/cart/sync, POST /api/cart/checkout, POST /api/shipping
+  orders     - GET /api/dashboard/customer/orders
+  artist     - GET /api/dashboard/artist/stats
+  admin      - GET /api/dashboard/admin/transactions and /api/dashboard/admin/artists
+  login      - POST /api/auth/login
+
+and latency percentiles, throughput, errors and database queries per request
+are reported per endpoint. Query counts come from the X-DB-Queries response
+header, which the server sends only with QUERY_STATS_HEADERS=1 (the default in
+development, off under gunicorn.conf.py). The run checks for it before it starts
+and stops when it is missing, --no-query-counts runs without the counts instead
+(the table then shows '-' and --baseline compares latencies only).
+
+Seed the dataset first (python -m benchmarks.seed), then run from the backend directory:
+    python -m benchmarks.loadtest --url http://localhost:8000 --users 20 --duration 60
+    python -m benchmarks.loadtest --in-process --users 8 --duration 30
+
+--in-process drives the Flask app through its test client, no server needed (MySQL still is).
+Every virtual user comes from the same address, so start the server under test with
+RATE_LIMITS_ENABLED=0 (or a RATE_LIMIT_IP well above the target rate), otherwise the
+per-IP bucket answers most requests with 429; --in-process turns the limits off and
+the query headers on itself.
+--save writes the results as JSON, --baseline compares against a saved run and exits
+with status 1 when an endpoint's p95 regressed by more than --max-regression.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.seed import EMAIL_DOMAIN, PASSWORD, WORDS
+
+QUERY_COUNT_HEADER = 'X-DB-Queries'
+ADMIN_CREDENTIALS = {'admin_id': 'admin123', 'password': 'admin@123'}
+
+DEFAULT_MIX = {
+    'browse': 45,
+    'search': 10,
+    'purchase': 10,
+    'orders': 10,
+    'artist': 10,
+    'admin': 5,
+    'login': 10,
+}
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self.session.request(method, self.base_url + path, json=body, headers=headers, timeout=30)
+        return response.status_code, response.headers, response.content
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers, response.get_data()
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.recording = False
+
+    def add(self, label, elapsed, ok, queries):
+        if not self.recording:
+            return
+        with self.lock:
+            entry = self.samples.setdefault(label, {'latencies': [], 'errors': 0, 'queries': []})
+            entry['latencies'].append(elapsed)
+            if not ok:
+                entry['errors'] += 1
+            if queries is not None:
+                entry['queries'].append(queries)
+
+
+def percentile(sorted_values, pct):
+    # nearest rank
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values), max(1, math.ceil(pct / 100 * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+class VirtualUser:
+    def __init__(self, index, client, recorder, customers, artists, rng):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        # one customer per virtual user, two users sharing a cart would only measure lock waits
+        self.customer_email = f'customer{index % customers}@{EMAIL_DOMAIN}'
+        self.artist_email = f'artist{rng.randrange(artists)}@{EMAIL_DOMAIN}'
+        self.tokens = {}
+        self.seen_artworks = []
+
+    def call(self, label, method, path, body=None, token=None, expect=(200,)):
+        start = time.perf_counter()
+        try:
+            status, headers, content = self.client.request(method, path, body, token)
+        except Exception:
+            self.recorder.add(label, time.perf_counter() - start, False, None)
+            return None, {}, None
+        elapsed = time.perf_counter() - start
+        queries = headers.get(QUERY_COUNT_HEADER)
+        self.recorder.add(label, elapsed, status in expect, int(queries) if queries is not None else None)
+        try:
+            data = json.loads(content) if content else None
+        except ValueError:
+            data = None
+        return status, headers, data
+
+    def login(self, role):
+        if role == 'admin':
+            status, _, data = self.call('POST /api/auth/admin-login', 'POST', '/api/auth/admin-login', ADMIN_CREDENTIALS)
+        else:
+            email = self.customer_email if role == 'customer' else self.artist_email
+            status, _, data = self.call(
+                'POST /api/auth/login', 'POST', '/api/auth/login',
+                {'email': email, 'password': PASSWORD, 'role': role}
+            )
+        if status == 200 and data:
+            self.tokens[role] = data['token']
+        return self.tokens.get(role)
+
+    def token(self, role):
+        return self.tokens.get(role) or self.login(role)
+
+    def browse(self):
+        status, headers, data = self.call('GET /api/artworks', 'GET', '/api/artworks?limit=24')
+        if status != 200 or not data:
+            return
+        self.seen_artworks = [a for a in data if a.get('status') == 'available'] or self.seen_artworks
+        next_cursor = headers.get('X-Next-Cursor')
+        if next_cursor and self.rng.random() < 0.3:
+            self.call('GET /api/artworks (next page)', 'GET', f'/api/artworks?limit=24&cursor={next_cursor}')
+
+    def search(self):
+        self.call('GET /api/artworks/search', 'GET', f'/api/artworks/search?q={self.rng.choice(WORDS)}')
+
+    def purchase(self):
+        token = self.token('customer')
+        if not token:
+            return
+        if not self.seen_artworks:
+            self.browse()
+        if not self.seen_artworks:
+            return
+        picked = self.rng.sample(self.seen_artworks, min(len(self.seen_artworks), self.rng.randint(1, 2)))
+        items = [{'artwork_id': a['artwork_id'], 'quantity': 1, 'price': a['price']} for a in picked]
+        status, _, _ = self.call('POST /api/cart/sync', 'POST', '/api/cart/sync', {'items': items}, token)
+        if status != 200:
+            return
+        # a sold artwork is an expected outcome of concurrent buyers, not a server error
+        status, _, _ = self.call('POST /api/cart/checkout', 'POST', '/api/cart/checkout', {}, token, expect=(200, 409))
+        if status != 200:
+            return
+        self.call(
+            'POST /api/shipping', 'POST', '/api/shipping',
+            {'address': '1 Load Test Street', 'phone_number': '5550000000'}, token, expect=(200, 201, 409)
+        )
+        # what was bought is no longer for sale, browse again before the next purchase
+        self.seen_artworks = []
+
+    def orders(self):
+        token = self.token('customer')
+        if token:
+            self.call('GET /api/dashboard/customer/orders', 'GET', '/api/dashboard/customer/orders', token=token)
+
+    def artist(self):
+        token = self.token('artist')
+        if token:
+            self.call('GET /api/dashboard/artist/stats', 'GET', '/api/dashboard/artist/stats', token=token)
+
+    def admin(self):
+        token = self.token('admin')
+        if token:
+            self.call(
+                'GET /api/dashboard/admin/transactions', 'GET', '/api/dashboard/admin/transactions?limit=50', token=token
+            )
+            self.call('GET /api/dashboard/admin/artists', 'GET', '/api/dashboard/admin/artists?limit=20', token=token)
+
+    def run(self, mix, deadline, think_time):
+        scenarios = list(mix)
+        weights = [mix[name] for name in scenarios]
+        while time.monotonic() < deadline:
+            name = self.rng.choices(scenarios, weights=weights)[0]
+            if name == 'login':
+                self.login(self.rng.choice(['customer', 'artist']))
+            else:
+                getattr(self, name)()
+            if think_time:
+                time.sleep(self.rng.uniform(0, think_time))
+
+
+def summarize(samples, elapsed):
+    results = {}
+    for label, entry in sorted(samples.items()):
+        latencies = sorted(entry['latencies'])
+        queries = entry['queries']
+        results[label] = {
+            'requests': len(latencies),
+            'errors': entry['errors'],
+            'rps': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+            'queries': sum(queries) / len(queries) if queries else None,
+        }
+    return results
+
+
+def print_report(results, elapsed, users):
+    total = sum(r['requests'] for r in results.values())
+    errors = sum(r['errors'] for r in results.values())
+    print(f"\n{total} requests in {elapsed:.1f}s with {users} users: {total / elapsed:.1f} req/s, {errors} errors\n")
+    width = max([len(label) for label in results] + [8])
+    print(f"{'endpoint':<{width}} {'reqs':>7} {'errs':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'queries':>8}")
+    for label, r in results.items():
+        queries = f"{r['queries']:.1f}" if r['queries'] is not None else '-'
+        print(
+            f"{label:<{width}} {r['requests']:>7} {r['errors']:>5} {r['rps']:>7.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {queries:>8}"
+        )
+
+
+def compare(results, baseline, max_regression):
+    regressions = []
+    for label, r in results.items():
+        before = baseline.get(label)
+        if not before or not before['p95_ms']:
+            continue
+        change = r['p95_ms'] / before['p95_ms'] - 1
+        if change > max_regression:
+            regressions.append(f"{label}: p95 {before['p95_ms']:.1f}ms -> {r['p95_ms']:.1f}ms (+{change:.0%})")
+        if before.get('queries') is not None and r['queries'] is not None and r['queries'] > before['queries']:
+            regressions.append(f"{label}: queries per request {before['queries']:.1f} -> {r['queries']:.1f}")
+    return regressions
+
+
+def check_query_header(client):
+    """Exit with an explanation when the server does not send the query count header."""
+    try:
+        status, headers, _ = client.request('GET', '/api/artworks?limit=1')
+    except Exception as e:
+        sys.exit(f"Cannot reach the server under test: {e}")
+    if headers.get(QUERY_COUNT_HEADER) is None:
+        sys.exit(
+            f"The server did not send {QUERY_COUNT_HEADER} (GET /api/artworks answered {status}): "
+            "start it with QUERY_STATS_HEADERS=1 to count queries, or pass --no-query-counts"
+        )
+
+
+def parse_mix(value):
+    mix = dict(DEFAULT_MIX)
+    if value:
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            if name not in DEFAULT_MIX:
+                raise argparse.ArgumentTypeError(f"unknown scenario '{name}'")
+            mix[name] = int(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://localhost:8000', help='base URL of a running server')
+    target.add_argument('--in-process', action='store_true', help='drive the app through the Flask test client')
+    parser.add_argument('--users', type=int, default=10, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before the run')
+    parser.add_argument('--think-time', type=float, default=0.0, help='max random pause between scenarios (s)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(None),
+                        help='scenario weights, e.g. browse=60,purchase=5 (unlisted keep their defaults)')
+    parser.add_argument('--customers', type=int, default=1000, help='seeded customers to log in as')
+    parser.add_argument('--artists', type=int, default=200, help='seeded artists to log in as')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved by --save')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed p95 increase (0.2 = 20%%)')
+    parser.add_argument('--no-query-counts', action='store_true',
+                        help='run against a server that does not send X-DB-Queries')
+    args = parser.parse_args()
+
+    if args.in_process:
+        from app.app import create_app
+        from app.config import Config
+        Config.RATE_LIMITS_ENABLED = False
+        Config.QUERY_STATS_HEADERS = True
+        app = create_app()
+        make_client = lambda: InProcessClient(app)
+    else:
+        make_client = lambda: HttpClient(args.url)
+
+    if not args.no_query_counts:
+        check_query_header(make_client())
+
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    users = [
+        VirtualUser(i, make_client(), recorder, args.customers, args.artists, random.Random(rng.random()))
+        for i in range(args.users)
+    ]
+    started = time.monotonic()
+    deadline = started + args.warmup + args.duration
+    threads = [
+        threading.Thread(target=user.run, args=(args.mix, deadline, args.think_time), daemon=True)
+        for user in users
+    ]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(args.warmup)
+    recorder.recording = True
+    measure_start = time.monotonic()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - measure_start
+
+    results = summarize(recorder.samples, elapsed)
+    print_report(results, elapsed, args.users)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'users': args.users, 'duration': elapsed, 'mix': args.mix, 'results': results}, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
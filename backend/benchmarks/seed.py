@@ -0,0 +1,201 @@
+"""
+Seed a synthetic dataset for the load test.
+
+All seeded accounts share one password and use @loadtest.local emails, so a
+later run can find them (and --reset can remove them) without touching real data.
+Rows go in with bulk inserts straight into MySQL; creating thousands of accounts
+through /api/auth/signup would mostly measure bcrypt.
+
+Run from the backend directory:
+    python -m benchmarks.seed --artists 200 --artworks 5000 --customers 1000 --orders 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+import mysql.connector
+
+from app.config import Config
+from app.rollup import rebuild_rollup
+
+PASSWORD = 'loadtest-password'
+EMAIL_DOMAIN = 'loadtest.local'
+BATCH_SIZE = 1000
+
+WORDS = [
+    'blue', 'silent', 'harbor', 'morning', 'abstract', 'portrait', 'river', 'golden',
+    'city', 'garden', 'storm', 'quiet', 'red', 'mountain', 'study', 'light',
+    'shadow', 'field', 'night', 'dream', 'window', 'ocean', 'forest', 'figure',
+]
+SPECIALIZATIONS = ['Painting', 'Sculpture', 'Photography', 'Digital', 'Printmaking', 'Mixed media']
+
+
+def connect():
+    return mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB
+    )
+
+
+def email(kind, i):
+    return f'{kind}{i}@{EMAIL_DOMAIN}'
+
+
+def phrase(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def insert_batches(cursor, sql, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+
+
+def ids_for(cursor, table, id_field):
+    cursor.execute(f"SELECT {id_field} FROM {table} WHERE email LIKE %s ORDER BY {id_field}", (f'%@{EMAIL_DOMAIN}',))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def reset(cursor):
+    # children first, the foreign keys are ON DELETE RESTRICT
+    customer_filter = f"SELECT customer_id FROM customers WHERE email LIKE '%@{EMAIL_DOMAIN}'"
+    artist_filter = f"SELECT artist_id FROM artists WHERE email LIKE '%@{EMAIL_DOMAIN}'"
+    order_filter = f"SELECT order_id FROM orders WHERE customer_id IN ({customer_filter})"
+    artwork_filter = f"SELECT artwork_id FROM artworks WHERE artist_id IN ({artist_filter})"
+    cursor.execute(f"DELETE FROM shipping_details WHERE order_id IN ({order_filter})")
+    cursor.execute(
+        f"DELETE FROM order_items WHERE order_id IN ({order_filter}) OR artwork_id IN ({artwork_filter})"
+    )
+    cursor.execute(f"DELETE FROM orders WHERE customer_id IN ({customer_filter})")
+    cursor.execute(f"DELETE FROM artworks WHERE artist_id IN ({artist_filter})")
+    for table in ('customers', 'artists', 'galleries'):
+        cursor.execute(f"DELETE FROM {table} WHERE email LIKE %s", (f'%@{EMAIL_DOMAIN}',))
+
+
+def seed(conn, artists, artworks, customers, galleries, orders, seed_value=42):
+    rng = random.Random(seed_value)
+    cursor = conn.cursor()
+    # hashed once at the configured cost, so logins neither skip bcrypt nor trigger a rehash
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)).decode('utf-8')
+    now = datetime.now().replace(microsecond=0)
+
+    insert_batches(
+        cursor,
+        "INSERT INTO artists (name, email, password_hash, specialization) VALUES (%s, %s, %s, %s)",
+        [(f'Artist {phrase(rng, 2).title()} {i}', email('artist', i), password_hash, rng.choice(SPECIALIZATIONS))
+         for i in range(artists)]
+    )
+    insert_batches(
+        cursor,
+        "INSERT INTO customers (name, email, password_hash, address, phone_number) VALUES (%s, %s, %s, %s, %s)",
+        [(f'Customer {i}', email('customer', i), password_hash, f'{i} {phrase(rng, 1).title()} Street', f'555{i:07d}')
+         for i in range(customers)]
+    )
+    insert_batches(
+        cursor,
+        "INSERT INTO galleries (name, email, password_hash, description, location) VALUES (%s, %s, %s, %s, %s)",
+        [(f'Gallery {i}', email('gallery', i), password_hash, phrase(rng, 12), phrase(rng, 1).title())
+         for i in range(galleries)]
+    )
+    artist_ids = ids_for(cursor, 'artists', 'artist_id')
+    customer_ids = ids_for(cursor, 'customers', 'customer_id')
+
+    # spread created_at over the last year so keyset pages and date filters see realistic data
+    insert_batches(
+        cursor,
+        """
+        INSERT INTO artworks (title, artist_id, description, price, status, image_url, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+        [(phrase(rng, 3).title(), rng.choice(artist_ids), phrase(rng, 25),
+          round(rng.uniform(50, 5000), 2), 'sold' if rng.random() < 0.2 else 'available',
+          f'https://picsum.photos/seed/loadtest{i}/600/400', now - timedelta(minutes=rng.randrange(525600)))
+         for i in range(artworks)]
+    )
+    cursor.execute(
+        "SELECT artwork_id, price FROM artworks WHERE artist_id IN (SELECT artist_id FROM artists WHERE email LIKE %s)",
+        (f'%@{EMAIL_DOMAIN}',)
+    )
+    catalog = cursor.fetchall()
+
+    # historical orders, inserted with explicit ids so the items can be built without a read back
+    cursor.execute("SELECT COALESCE(MAX(order_id), 0) FROM orders")
+    next_order_id = cursor.fetchone()[0] + 1
+    order_rows, item_rows, shipping_rows = [], [], []
+    for order_id in range(next_order_id, next_order_id + orders):
+        picked = rng.sample(catalog, rng.randint(1, min(3, len(catalog))))
+        status = rng.choices(['confirmed', 'delivered', 'cancelled'], weights=[60, 30, 10])[0]
+        created_at = now - timedelta(minutes=rng.randrange(525600))
+        order_rows.append((order_id, rng.choice(customer_ids), status, sum(price for _, price in picked), created_at))
+        item_rows.extend((order_id, artwork_id, 1, price, created_at) for artwork_id, price in picked)
+        shipping_rows.append((order_id, f'{order_id} {phrase(rng, 1).title()} Avenue', f'555{order_id % 10000000:07d}'))
+    insert_batches(
+        cursor,
+        "INSERT INTO orders (order_id, customer_id, status, total_amount, created_at) VALUES (%s, %s, %s, %s, %s)",
+        order_rows
+    )
+    insert_batches(
+        cursor,
+        "INSERT INTO order_items (order_id, artwork_id, quantity, price_at_time, created_at) VALUES (%s, %s, %s, %s, %s)",
+        item_rows
+    )
+    insert_batches(
+        cursor,
+        "INSERT INTO shipping_details (order_id, address, phone_number) VALUES (%s, %s, %s)",
+        shipping_rows
+    )
+    conn.commit()
+
+    # the dashboards read the rollups, bring them in line with the new orders
+    rebuild_rollup(cursor)
+    conn.commit()
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--artists', type=int, default=200)
+    parser.add_argument('--artworks', type=int, default=5000)
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--galleries', type=int, default=20)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42, help='random seed, the same seed gives the same dataset')
+    parser.add_argument('--reset', action='store_true', help='remove previously seeded rows first')
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        start = time.perf_counter()
+        if args.reset:
+            cursor = conn.cursor()
+            reset(cursor)
+            conn.commit()
+            cursor.close()
+            print(f"Removed previous load test data in {time.perf_counter() - start:.1f}s")
+        cursor = conn.cursor()
+        existing = ids_for(cursor, 'customers', 'customer_id')
+        cursor.close()
+        if existing:
+            print("Load test data already present, use --reset to replace it")
+            return
+
+        start = time.perf_counter()
+        seed(conn, args.artists, args.artworks, args.customers, args.galleries, args.orders, args.seed)
+        print(
+            f"Seeded {args.artists} artists, {args.artworks} artworks, {args.customers} customers, "
+            f"{args.galleries} galleries and {args.orders} orders in {time.perf_counter() - start:.1f}s"
+        )
+        print(f"All accounts use *@{EMAIL_DOMAIN} emails and the password '{PASSWORD}'")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+# pytest puts this directory on sys.path, so the tests import the application as the 'app'
+# package like wsgi.py does. app/test_db.py is a manual check against a live database.
+collect_ignore = ['app/test_db.py']
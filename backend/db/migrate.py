@@ -0,0 +1,271 @@
+"""
+Versioned schema migrations.
+
+Migrations live in db/migrations as NNNN_description.sql or NNNN_description.py and
+are applied in version order. Each applied migration is recorded in the
+schema_migrations table together with a checksum of its file, so a migration that
+was edited after it ran is reported instead of silently skipped.
+
+    python db/migrate.py              apply every pending migration
+    python db/migrate.py --dry-run    show what would run, change nothing
+    python db/migrate.py --status     list applied and pending migrations
+    python db/migrate.py --target 3   stop after version 3
+
+.sql files may hold several statements; they are split on ';' outside of quotes
+and comments. .py files define upgrade(cursor). MySQL commits DDL implicitly, so
+migrations are written to be re-runnable: "already exists" errors from a
+statement are treated as that statement having been applied.
+"""
+import argparse
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+import time
+
+# Add parent directory to path so we can import from config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from mysql.connector import errorcode
+
+try:
+    from app.config import Config
+except ImportError:
+    # Fallback if the import doesn't work
+    class Config:
+        MYSQL_HOST = 'localhost'
+        MYSQL_USER = 'root'
+        MYSQL_PASSWORD = ''
+        MYSQL_DB = 'picksart'
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_([\w-]+)\.(sql|py)$')
+
+# errors meaning the object a statement creates is already there
+ALREADY_APPLIED_ERRORS = {
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+}
+
+def get_db_connection():
+    return mysql.connector.connect(
+        host=Config.MYSQL_HOST,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        database=Config.MYSQL_DB
+    )
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'rb') as f:
+            self.source = f.read()
+        self.checksum = hashlib.sha256(self.source).hexdigest()
+
+    @property
+    def is_python(self):
+        return self.path.endswith('.py')
+
+    def statements(self):
+        return split_sql(self.source.decode('utf-8'))
+
+    def load_module(self):
+        spec = importlib.util.spec_from_file_location(f"migration_{self.version:04d}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def __str__(self):
+        return f"{self.version:04d}_{self.name}"
+
+
+def split_sql(sql):
+    """
+    Split a script into statements on ';', ignoring semicolons inside quoted
+    strings, identifiers and comments. Comments are dropped.
+    """
+    statements = []
+    current = []
+    i = 0
+    length = len(sql)
+    while i < length:
+        c = sql[i]
+        if c in ("'", '"', '`'):
+            # copy the quoted section verbatim, a doubled quote or a backslash escapes it
+            j = i + 1
+            while j < length:
+                if sql[j] == '\\' and c != '`':
+                    j += 2
+                    continue
+                if sql[j] == c:
+                    if j + 1 < length and sql[j + 1] == c:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            current.append(sql[i:j + 1])
+            i = j + 1
+        elif sql.startswith('--', i) or c == '#':
+            end = sql.find('\n', i)
+            i = length if end == -1 else end
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+        elif c == ';':
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+        else:
+            current.append(c)
+            i += 1
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    migrations = []
+    seen = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise RuntimeError(f"Duplicate migration version {version}: {seen[version]} and {filename}")
+        seen[version] = filename
+        migrations.append(Migration(version, match.group(2), os.path.join(directory, filename)))
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def ensure_history_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            execution_ms INT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_migrations(cursor):
+    cursor.execute("SHOW TABLES LIKE 'schema_migrations'")
+    if cursor.fetchone() is None:
+        return {}
+    cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row[0]: row for row in cursor.fetchall()}
+
+
+def execute_statement(cursor, statement):
+    try:
+        cursor.execute(statement)
+        if cursor.with_rows:
+            cursor.fetchall()
+        print(f"  Executed: {statement.splitlines()[0][:100]}")
+    except mysql.connector.Error as err:
+        if err.errno in ALREADY_APPLIED_ERRORS:
+            print(f"  Already applied, skipping: {err.msg}")
+        else:
+            raise
+
+
+def apply_migration(conn, cursor, migration):
+    start = time.monotonic()
+    if migration.is_python:
+        migration.load_module().upgrade(cursor)
+    else:
+        for statement in migration.statements():
+            execute_statement(cursor, statement)
+    elapsed_ms = int((time.monotonic() - start) * 1000)
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum, execution_ms) VALUES (%s, %s, %s, %s)",
+        (migration.version, migration.name, migration.checksum, elapsed_ms)
+    )
+    conn.commit()
+    return elapsed_ms
+
+
+def migrate(dry_run=False, target=None, status=False):
+    """Apply pending migrations in order. Returns False if anything went wrong."""
+    conn = None
+    cursor = None
+    try:
+        migrations = discover_migrations()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # only one runner at a time, e.g. when several app hosts deploy together
+        cursor.execute("SELECT GET_LOCK('picksart_schema_migrations', 60)")
+        if not cursor.fetchone()[0]:
+            print("Error: another migration run holds the lock")
+            return False
+
+        applied = applied_migrations(cursor)
+
+        changed = [m for m in migrations if m.version in applied and applied[m.version][2] != m.checksum]
+        for migration in changed:
+            print(f"Error: {migration} was modified after it was applied (checksum mismatch)")
+
+        pending = [m for m in migrations if m.version not in applied
+                   and (target is None or m.version <= target)]
+
+        if status:
+            for migration in migrations:
+                if migration.version in applied:
+                    print(f"  applied  {migration}  ({applied[migration.version][3]})")
+                else:
+                    print(f"  pending  {migration}")
+            return not changed
+
+        if changed:
+            return False
+
+        if not pending:
+            print("Schema is up to date")
+            return True
+
+        if not dry_run:
+            ensure_history_table(cursor)
+
+        for migration in pending:
+            print(f"{'Would apply' if dry_run else 'Applying'} {migration}")
+            if dry_run:
+                if migration.is_python:
+                    print(f"  (python migration, upgrade() in {os.path.basename(migration.path)})")
+                else:
+                    for statement in migration.statements():
+                        print(f"  {statement.splitlines()[0][:100]}")
+                continue
+            elapsed_ms = apply_migration(conn, cursor, migration)
+            print(f"Applied {migration} in {elapsed_ms} ms")
+
+        return True
+
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument('--dry-run', action='store_true', help="show pending migrations without applying them")
+    parser.add_argument('--status', action='store_true', help="list applied and pending migrations")
+    parser.add_argument('--target', type=int, help="only apply migrations up to this version")
+    args = parser.parse_args()
+    sys.exit(0 if migrate(dry_run=args.dry_run, target=args.target, status=args.status) else 1)
@@ -0,0 +1,4 @@
+-- Contact columns used for shipping (was db/update_customers_table.sql).
+-- On databases that already have them the duplicate column error is skipped.
+ALTER TABLE customers ADD COLUMN address VARCHAR(255);
+ALTER TABLE customers ADD COLUMN phone_number VARCHAR(20);
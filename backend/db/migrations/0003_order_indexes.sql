@@ -0,0 +1,22 @@
+-- Secondary indexes for the order, cart, dashboard and shipping lookups.
+-- ALGORITHM=INPLACE, LOCK=NONE builds them online, reads and writes keep going meanwhile.
+
+-- pending order lookup in sync_cart / get_cart / add_shipping_info and customer order history
+CREATE INDEX idx_orders_customer_status_created ON orders (customer_id, status, created_at)
+    ALGORITHM=INPLACE LOCK=NONE;
+
+-- admin transactions report and exports, with and without a status filter
+CREATE INDEX idx_orders_status_created ON orders (status, created_at, order_id)
+    ALGORITHM=INPLACE LOCK=NONE;
+CREATE INDEX idx_orders_created ON orders (created_at, order_id)
+    ALGORITHM=INPLACE LOCK=NONE;
+
+-- items of an order, and sales of an artwork
+CREATE INDEX idx_order_items_order ON order_items (order_id, order_item_id)
+    ALGORITHM=INPLACE LOCK=NONE;
+CREATE INDEX idx_order_items_artwork ON order_items (artwork_id)
+    ALGORITHM=INPLACE LOCK=NONE;
+
+-- shipping details of an order, latest first
+CREATE INDEX idx_shipping_details_order ON shipping_details (order_id, shipping_id)
+    ALGORITHM=INPLACE LOCK=NONE;
@@ -0,0 +1,15 @@
+-- Composite indexes backing the keyset paginated artwork catalog (GET /api/artworks).
+-- Every filter combination leads with status and ends with (created_at, artwork_id)
+-- so the ORDER BY is served straight from the index, whatever page the client is on.
+CREATE INDEX idx_artworks_status_created ON artworks (status, created_at, artwork_id)
+    ALGORITHM=INPLACE LOCK=NONE;
+CREATE INDEX idx_artworks_artist_status_created ON artworks (artist_id, status, created_at, artwork_id)
+    ALGORITHM=INPLACE LOCK=NONE;
+CREATE INDEX idx_artworks_status_price ON artworks (status, price)
+    ALGORITHM=INPLACE LOCK=NONE;
+CREATE INDEX idx_artworks_status_title ON artworks (status, title)
+    ALGORITHM=INPLACE LOCK=NONE;
+
+-- an artist's own artworks, newest first, whatever their status
+CREATE INDEX idx_artworks_artist_created ON artworks (artist_id, created_at)
+    ALGORITHM=INPLACE LOCK=NONE;
@@ -0,0 +1,6 @@
+-- FULLTEXT indexes for GET /api/artworks/search.
+-- InnoDB can build these in place but not without a shared lock, writes wait while they build.
+CREATE FULLTEXT INDEX ft_artworks_title_description ON artworks (title, description)
+    ALGORITHM=INPLACE LOCK=SHARED;
+CREATE FULLTEXT INDEX ft_artists_name ON artists (name)
+    ALGORITHM=INPLACE LOCK=SHARED;
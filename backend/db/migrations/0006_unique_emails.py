@@ -0,0 +1,25 @@
+# Signup checks an email against all three account tables, each lookup must be an index probe
+# and the unique constraint is what makes a duplicate insert fail atomically.
+# Tables created from database_setup.sql already have an unnamed unique index on email,
+# so one is only added where no unique index on the column exists.
+
+EMAIL_UNIQUE_INDEXES = [
+    ("customers", "uq_customers_email", "email"),
+    ("artists", "uq_artists_email", "email"),
+    ("galleries", "uq_galleries_email", "email"),
+]
+
+def unique_index_on(cursor, table, column):
+    cursor.execute(
+        f"SHOW INDEX FROM {table} WHERE Column_name = %s AND Non_unique = 0 AND Seq_in_index = 1",
+        (column,)
+    )
+    return len(cursor.fetchall()) > 0
+
+def upgrade(cursor):
+    for table, index_name, column in EMAIL_UNIQUE_INDEXES:
+        if unique_index_on(cursor, table, column):
+            print(f"  Unique index on {table}.{column} already exists")
+        else:
+            cursor.execute(f"CREATE UNIQUE INDEX {index_name} ON {table} ({column}) ALGORITHM=INPLACE LOCK=NONE")
+            print(f"  Created unique index {index_name}")
@@ -0,0 +1,10 @@
+# Sales rollup tables read by the dashboards (see app/rollup.py), backfilled from the
+# existing order history so the dashboards are right from the first request.
+from app.rollup import ROLLUP_TABLES, rebuild_rollup
+
+def upgrade(cursor):
+    for table, ddl in ROLLUP_TABLES.items():
+        cursor.execute(ddl)
+        print(f"  Created table {table}")
+    rebuild_rollup(cursor)
+    print("  Backfilled sales rollup")
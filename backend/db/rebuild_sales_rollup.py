@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Add parent directory to path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from migrate import get_db_connection
+from app.rollup import rebuild_rollup
+
+def rebuild_sales_rollup():
+    conn = None
+    cursor = None
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        rebuild_rollup(cursor)
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM artist_sales_rollup")
+        artists = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM artwork_sales_rollup")
+        artworks = cursor.fetchone()[0]
+        print(f"Sales rollup rebuilt: {artists} artists, {artworks} artworks")
+
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+        if conn:
+            conn.rollback()
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    rebuild_sales_rollup()
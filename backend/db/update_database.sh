@@ -5,6 +5,6 @@ cd "$(dirname "$0")"
 
 # Run the Python script
 echo "Running database schema update script..."
-python apply_schema_changes.py
+python migrate.py "$@"
 
 echo "Update complete." 
\ No newline at end of file
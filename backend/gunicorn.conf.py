@@ -0,0 +1,71 @@
+# Production serving profile: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Prefork workers with a few threads each. The app is imported once in the
+# master (preload_app) and forked; each worker then opens its own MySQL pool,
+# hashing processes and log thread (app/lifecycle.py), so no database socket
+# is ever shared between processes. Every worker holds up to DB_POOL_SIZE
+# connections, keep WEB_CONCURRENCY * DB_POOL_SIZE under MySQL's max_connections:
+# without WEB_CONCURRENCY the worker count is capped so the pools fit in
+# MYSQL_MAX_CONNECTIONS, less MYSQL_RESERVED_CONNECTIONS for migrations and admin sessions.
+#
+# On SIGTERM a worker reports 503 on /ready, stops accepting, finishes its
+# in-flight requests (up to graceful_timeout) and closes its pool before exiting.
+import multiprocessing
+import os
+import signal
+
+# Runs before gunicorn imports the app, so Config (app/config.py) picks up the production
+# defaults: INFO logging, sampled debug records and no X-DB-* headers on responses
+os.environ.setdefault('FLASK_ENV', 'production')
+# Every forked worker would rotate the same log file and lose or interleave records,
+# so the app logs to stderr and gunicorn's errorlog collects it
+os.environ.setdefault('LOG_TO_FILE', '0')
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+
+def default_workers():
+    # DB_POOL_SIZE defaults to 20 like Config.DB_POOL_SIZE, the app is not imported yet here
+    pool_size = int(os.environ.get('DB_POOL_SIZE', 20))
+    max_connections = int(os.environ.get('MYSQL_MAX_CONNECTIONS', 151))
+    reserved = int(os.environ.get('MYSQL_RESERVED_CONNECTIONS', 31))
+    fits = max(1, (max_connections - reserved) // max(pool_size, 1))
+    return min(multiprocessing.cpu_count() * 2 + 1, fits)
+
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# recycle workers now and then so slow leaks cannot build up; the jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    from app import lifecycle
+    lifecycle.after_fork()
+
+
+def post_worker_init(worker):
+    # gunicorn installed its SIGTERM handler already, run ours first so /ready
+    # starts failing as soon as the drain begins
+    from app import lifecycle
+    handle_exit = worker.handle_exit
+
+    def drain_then_exit(sig, frame):
+        lifecycle.begin_drain()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, drain_then_exit)
+
+
+def worker_exit(server, worker):
+    from app import lifecycle
+    lifecycle.shutdown()
@@ -0,0 +1,129 @@
+import pytest
+from app import app as app_module, config as config_module, markers
+from app.config import Config
+from app.database import PooledConnection
+
+
+class FakeCursor:
+    """Answers every statement with no rows."""
+
+    with_rows = True
+    description = ()
+    column_names = ()
+
+    def execute(self, operation, params=None):
+        pass
+
+    def fetchone(self):
+        return None
+
+    def fetchmany(self, size=1):
+        return []
+
+    def fetchall(self):
+        return []
+
+    def __iter__(self):
+        return iter(())
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    in_transaction = False
+    connection_id = 1
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """Stands in for BoundedConnectionPool: hands out instrumented connections to a FakeConnection."""
+
+    resets_session = True
+
+    def get_connection(self, timeout=None):
+        return PooledConnection(FakeConnection(), self)
+
+    def _release(self):
+        pass
+
+
+class ScriptedCursor(FakeCursor):
+    """
+    Answers a statement with the rows of the first (text, rows) script entry whose text
+    appears in it, no rows otherwise. Every statement is recorded in executed.
+    """
+
+    lastrowid = 1
+
+    def __init__(self, script, executed):
+        self.script = script
+        self.executed = executed
+        self._rows = []
+
+    def execute(self, operation, params=None):
+        self.executed.append((' '.join(operation.split()), params))
+        self._rows = next((list(rows) for text, rows in self.script if text in operation), [])
+
+    def executemany(self, operation, seq_params):
+        self.executed.append((' '.join(operation.split()), list(seq_params)))
+        self._rows = []
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+
+class ScriptedConnection(FakeConnection):
+    def __init__(self, script, executed):
+        self.script = script
+        self.executed = executed
+
+    def cursor(self, *args, **kwargs):
+        return ScriptedCursor(self.script, self.executed)
+
+
+class ScriptedPool(FakePool):
+    """A FakePool whose connections answer from a script, see ScriptedCursor."""
+
+    def __init__(self, script):
+        self.script = script
+        self.executed = []
+
+    def get_connection(self, timeout=None):
+        return PooledConnection(ScriptedConnection(self.script, self.executed), self)
+
+
+@pytest.fixture
+def make_app(monkeypatch):
+    """
+    create_app() without a database: the startup check is skipped and every request
+    connection comes from a FakePool. Keyword arguments override Config for the app.
+    """
+    def make(**overrides):
+        monkeypatch.setattr(app_module, 'check_database', lambda: None)
+        monkeypatch.setattr(config_module, 'get_connection_pool', lambda: FakePool())
+        monkeypatch.setattr(Config, 'LOG_TO_FILE', False)
+        monkeypatch.setattr(Config, 'RATE_LIMITS_ENABLED', False)
+        monkeypatch.setattr(Config, 'RESPONSE_CACHE_BACKEND', 'none')
+        monkeypatch.setattr(Config, 'PREPARED_STATEMENTS', False)
+        monkeypatch.setattr(Config, 'MARKER_BACKEND', 'memory')
+        monkeypatch.setattr(markers, '_store', None)
+        for name, value in overrides.items():
+            monkeypatch.setattr(Config, name, value)
+        return app_module.create_app()
+    return make
@@ -0,0 +1,72 @@
+from decimal import Decimal
+from app import auth, config as config_module
+from app.routes.auth_routes import generate_token
+from tests.conftest import ScriptedPool
+
+CUSTOMER = {'customer_id': 4, 'user_id': 4, 'name': 'C', 'email': 'c@x', 'role': 'customer'}
+
+
+def item(order_item_id, artwork_id, quantity, price):
+    return {'order_item_id': order_item_id, 'artwork_id': artwork_id,
+            'quantity': quantity, 'price_at_time': Decimal(price)}
+
+
+def sync(make_app, monkeypatch, stored, items, pending=True):
+    """POST items to /api/cart/sync over a stored cart; returns the response and the statements that ran."""
+    app = make_app()
+    pool = ScriptedPool([
+        ('FROM customers', [CUSTOMER]),
+        ("status = 'pending'", [{'order_id': 9}] if pending else []),
+        ('FROM order_items', stored),
+    ])
+    monkeypatch.setattr(config_module, 'get_connection_pool', lambda: pool)
+    auth.principal_cache.clear()
+    response = app.test_client().post(
+        '/api/cart/sync', json={'items': items},
+        headers={'Authorization': f"Bearer {generate_token(4, 'customer')}"},
+    )
+    writes = [(sql.split()[0], params) for sql, params in pool.executed if not sql.startswith('SELECT')]
+    return response, writes
+
+
+def test_only_the_differences_are_written(make_app, monkeypatch):
+    stored = [
+        item(1, 10, 1, '5.00'),   # quantity changes
+        item(2, 11, 1, '7.00'),   # removed from the cart
+        item(3, 12, 1, '3.00'),   # unchanged
+        item(4, 10, 1, '5.00'),   # duplicate row for artwork 10 left by an older sync
+    ]
+    response, writes = sync(make_app, monkeypatch, stored, [
+        {'artwork_id': 10, 'quantity': 2, 'price': '5.00'},
+        {'artwork_id': 12, 'quantity': 1, 'price': '3.00'},
+        {'artwork_id': 13, 'quantity': 1, 'price': '9.50'},
+    ])
+
+    assert response.status_code == 200
+    assert writes == [
+        ('DELETE', (4, 2)),
+        ('UPDATE', (1, 2, 1, Decimal('5.00'), 1)),
+        ('INSERT', [(9, 13, 1, Decimal('9.50'))]),
+        ('UPDATE', (9, 9)),
+    ]
+
+
+def test_unchanged_cart_writes_nothing(make_app, monkeypatch):
+    response, writes = sync(make_app, monkeypatch, [item(1, 10, 2, '5.00')], [
+        {'artwork_id': 10, 'quantity': 1, 'price': '5.00'},
+        {'artwork_id': 10, 'quantity': 1, 'price': '5.00'},
+    ])
+
+    # the two entries for artwork 10 collapse into the stored quantity of 2
+    assert response.status_code == 200
+    assert writes == []
+
+
+def test_first_sync_creates_the_order(make_app, monkeypatch):
+    response, writes = sync(make_app, monkeypatch, [], [
+        {'artwork_id': 10, 'quantity': 1, 'price': '5.00'},
+    ], pending=False)
+
+    assert response.get_json()['order_id'] == 1
+    assert [statement for statement, _ in writes] == ['INSERT', 'INSERT', 'UPDATE']
+    assert writes[1][1] == [(1, 10, 1, Decimal('5.00'))]
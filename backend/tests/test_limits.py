@@ -0,0 +1,105 @@
+import pytest
+from flask import Flask
+from app import limits
+from app.config import Config
+
+
+@pytest.fixture
+def limits_on(monkeypatch):
+    monkeypatch.setattr(Config, 'RATE_LIMITS_ENABLED', True)
+    monkeypatch.setattr(Config, 'RATE_LIMIT_PROXY_HOPS', 0)
+    monkeypatch.setattr(Config, 'LOGIN_MAX_FAILURES_PER_IP_ACCOUNT', 3)
+    monkeypatch.setattr(Config, 'LOGIN_MAX_FAILURES_PER_IP', 5)
+    monkeypatch.setattr(limits, '_store', limits.MemoryLimitStore())
+    return Flask(__name__)
+
+
+def fail_logins(app, ip, email, times):
+    with app.test_request_context(environ_base={'REMOTE_ADDR': ip}):
+        for _ in range(times):
+            limits.note_failed_login(email)
+
+
+def blocked(app, ip, email):
+    with app.test_request_context(environ_base={'REMOTE_ADDR': ip}):
+        return limits.login_blocked(email)
+
+
+def test_account_is_locked_only_for_the_failing_address(limits_on):
+    app = limits_on
+    fail_logins(app, '10.0.0.1', 'victim@x', 3)
+
+    assert blocked(app, '10.0.0.1', 'Victim@x')
+    # the owner of the account, or another user behind the same NAT, can still log in
+    assert not blocked(app, '10.0.0.2', 'victim@x')
+    assert not blocked(app, '10.0.0.1', 'other@x')
+
+
+def test_address_guessing_at_many_accounts_is_locked(limits_on):
+    app = limits_on
+    for n in range(5):
+        fail_logins(app, '10.0.0.1', f"user{n}@x", 1)
+
+    assert blocked(app, '10.0.0.1', 'fresh@x')
+    assert not blocked(app, '10.0.0.2', 'fresh@x')
+
+
+def test_successful_login_clears_the_account_failures_from_that_address(limits_on):
+    app = limits_on
+    fail_logins(app, '10.0.0.1', 'user@x', 3)
+
+    with app.test_request_context(environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        limits.clear_failed_logins('user@x')
+
+    assert not blocked(app, '10.0.0.1', 'user@x')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_admits_a_burst_then_refills_at_the_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limits.time, 'monotonic', clock)
+    store = limits.MemoryLimitStore()
+
+    assert [store.take('ip:a', 1, rate=2, burst=3) for _ in range(3)] == [0, 0, 0]
+    # empty: one token comes back every half second
+    assert store.take('ip:a', 1, rate=2, burst=3) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert store.take('ip:a', 1, rate=2, burst=3) == 0
+    # other keys have buckets of their own
+    assert store.take('ip:b', 3, rate=2, burst=3) == 0
+
+
+def test_bucket_never_holds_more_than_the_burst(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limits.time, 'monotonic', clock)
+    store = limits.MemoryLimitStore()
+    store.take('ip:a', 1, rate=2, burst=3)
+
+    clock.now += 60
+
+    assert store.take('ip:a', 3, rate=2, burst=3) == 0
+    assert store.take('ip:a', 1, rate=2, burst=3) > 0
+
+
+@pytest.mark.parametrize('hops, forwarded, expected', [
+    (0, '1.1.1.1', '10.0.0.9'),
+    (1, '1.1.1.1', '1.1.1.1'),
+    # a client can prepend whatever it likes, only the hops our proxies added count
+    (1, 'spoofed, 1.1.1.1', '1.1.1.1'),
+    (2, 'spoofed, 1.1.1.1, 172.16.0.2', '1.1.1.1'),
+    (3, '1.1.1.1', '1.1.1.1'),
+    (1, None, '10.0.0.9'),
+])
+def test_client_ip_with_proxy_hops(monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(Config, 'RATE_LIMIT_PROXY_HOPS', hops)
+    headers = {'X-Forwarded-For': forwarded} if forwarded else {}
+
+    with Flask(__name__).test_request_context(headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.9'}):
+        assert limits.client_ip() == expected
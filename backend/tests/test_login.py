@@ -0,0 +1,75 @@
+from app import config as config_module, hashing
+from tests.conftest import FakeConnection, FakeCursor, FakePool
+
+USER = {
+    'customer_id': 5, 'name': 'C', 'email': 'c@example.com',
+    'password_hash': '$2b$12$stored', 'address': '', 'phone_number': '',
+}
+
+
+class UserCursor(FakeCursor):
+    def __init__(self, statements):
+        self.statements = statements
+
+    def execute(self, operation, params=None):
+        self.statements.append(operation.split()[0])
+
+    def fetchone(self):
+        return dict(USER)
+
+
+class CountingPool(FakePool):
+    """Keeps track of how many connections are checked out."""
+
+    def __init__(self):
+        self.checked_out = 0
+        self.statements = []
+
+    def get_connection(self, timeout=None):
+        self.checked_out += 1
+        conn = super().get_connection(timeout)
+        conn._conn.cursor = lambda *args, **kwargs: UserCursor(self.statements)
+        return conn
+
+    def _release(self):
+        self.checked_out -= 1
+
+
+def login_app(make_app, monkeypatch, pool):
+    app = make_app()
+    monkeypatch.setattr(config_module, 'get_connection_pool', lambda: pool)
+    return app
+
+
+def test_connection_is_released_while_bcrypt_runs(make_app, monkeypatch):
+    pool = CountingPool()
+    app = login_app(make_app, monkeypatch, pool)
+    during_check = []
+
+    def check_password(password, hashed):
+        during_check.append(pool.checked_out)
+        return True
+    monkeypatch.setattr(hashing, 'check_password', check_password)
+    monkeypatch.setattr(hashing, 'needs_rehash', lambda hashed: False)
+
+    response = app.test_client().post('/api/auth/login', json={
+        'email': 'c@example.com', 'password': 'pw', 'role': 'customer'})
+
+    assert response.status_code == 200
+    assert during_check == [0]
+    assert pool.statements == ['SELECT']
+
+
+def test_rehash_takes_a_connection_again(make_app, monkeypatch):
+    pool = CountingPool()
+    app = login_app(make_app, monkeypatch, pool)
+    monkeypatch.setattr(hashing, 'check_password', lambda password, hashed: True)
+    monkeypatch.setattr(hashing, 'needs_rehash', lambda hashed: True)
+    monkeypatch.setattr(hashing, 'hash_password', lambda password: '$2b$12$new')
+
+    response = app.test_client().post('/api/auth/login', json={
+        'email': 'c@example.com', 'password': 'pw', 'role': 'customer'})
+
+    assert response.status_code == 200
+    assert pool.statements == ['SELECT', 'UPDATE']
+    assert pool.checked_out == 0
@@ -0,0 +1,104 @@
+import hashlib
+import pytest
+from db import migrate
+from tests.conftest import ScriptedCursor
+
+
+def test_split_sql_on_semicolons_outside_quotes_and_comments():
+    sql = """
+        -- a comment; not a statement
+        CREATE TABLE t (a VARCHAR(10) DEFAULT ';');
+        /* block; comment */
+        INSERT INTO t VALUES ('it''s; fine'), ("a\\"; b");  # trailing; comment
+        ALTER TABLE `odd;name` ADD INDEX i (a)
+    """
+
+    assert migrate.split_sql(sql) == [
+        "CREATE TABLE t (a VARCHAR(10) DEFAULT ';')",
+        "INSERT INTO t VALUES ('it''s; fine'), (\"a\\\"; b\")",
+        "ALTER TABLE `odd;name` ADD INDEX i (a)",
+    ]
+
+
+def test_split_sql_skips_empty_statements():
+    assert migrate.split_sql(";;\n-- only a comment\n;") == []
+
+
+def test_shipped_migrations_are_ordered_and_split():
+    migrations = migrate.discover_migrations()
+
+    assert [m.version for m in migrations] == list(range(1, len(migrations) + 1))
+    for migration in migrations:
+        assert migration.is_python or migration.statements()
+
+
+def write(directory, filename, text):
+    (directory / filename).write_text(text)
+
+
+def test_duplicate_versions_are_refused(tmp_path):
+    write(tmp_path, '0001_a.sql', 'SELECT 1;')
+    write(tmp_path, '0001_b.sql', 'SELECT 2;')
+
+    with pytest.raises(RuntimeError, match='Duplicate migration version 1'):
+        migrate.discover_migrations(str(tmp_path))
+
+
+class MigrationConnection:
+    def __init__(self, script):
+        self.script = script
+        self.executed = []
+
+    def cursor(self):
+        return ScriptedCursor(self.script, self.executed)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def run(monkeypatch, directory, history):
+    """migrate() over the migrations in directory, with history as the schema_migrations rows."""
+    conn = MigrationConnection([
+        ('GET_LOCK', [(1,)]),
+        ('SHOW TABLES', [('schema_migrations',)]),
+        ('FROM schema_migrations', history),
+    ])
+    discover = migrate.discover_migrations
+    monkeypatch.setattr(migrate, 'get_db_connection', lambda: conn)
+    monkeypatch.setattr(migrate, 'discover_migrations', lambda: discover(str(directory)))
+    return migrate.migrate(), conn.executed
+
+
+def test_checksum_is_the_sha256_of_the_file(tmp_path):
+    write(tmp_path, '0001_a.sql', 'SELECT 1;')
+    migration = migrate.discover_migrations(str(tmp_path))[0]
+
+    assert migration.checksum == hashlib.sha256(b'SELECT 1;').hexdigest()
+
+
+def test_pending_migrations_run_and_are_recorded_with_their_checksum(tmp_path, monkeypatch):
+    write(tmp_path, '0001_a.sql', 'CREATE TABLE a (id INT);')
+    write(tmp_path, '0002_b.sql', 'CREATE TABLE b (id INT);')
+    applied, pending = migrate.discover_migrations(str(tmp_path))
+
+    ok, executed = run(monkeypatch, tmp_path, [(1, 'a', applied.checksum, '2024-01-01')])
+
+    assert ok
+    statements = [sql for sql, _ in executed]
+    assert 'CREATE TABLE a (id INT)' not in statements
+    assert 'CREATE TABLE b (id INT)' in statements
+    recorded = [params for sql, params in executed if sql.startswith('INSERT INTO schema_migrations')]
+    assert [params[:3] for params in recorded] == [(2, 'b', pending.checksum)]
+
+
+def test_edited_migration_stops_the_run(tmp_path, monkeypatch):
+    write(tmp_path, '0001_a.sql', 'CREATE TABLE a (id INT, name TEXT);')
+    write(tmp_path, '0002_b.sql', 'CREATE TABLE b (id INT);')
+
+    ok, executed = run(monkeypatch, tmp_path, [(1, 'a', 'checksum of the file as it was applied', '2024-01-01')])
+
+    assert not ok
+    assert not any(sql.startswith('CREATE') or sql.startswith('INSERT') for sql, _ in executed)
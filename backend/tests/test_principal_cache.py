@@ -0,0 +1,39 @@
+import time
+import pytest
+from app import auth, markers
+
+
+@pytest.fixture
+def shared_markers(tmp_path, monkeypatch):
+    """One sqlite marker file, as the workers of a host share it."""
+    store = markers.SqliteMarkerStore(str(tmp_path / 'markers.sqlite3'))
+    monkeypatch.setattr(markers, '_store', store)
+    auth.principal_cache.clear()
+    yield store
+    auth.principal_cache.clear()
+
+
+def test_cached_principal_is_used_until_invalidated(shared_markers):
+    user = {'user_id': 7, 'role': 'artist', 'name': 'A', 'email': 'a@example.com'}
+    auth.principal_cache.set(('artist', 7), (time.time(), user))
+
+    assert auth._cached_principal('artist', 7) == user
+
+
+def test_invalidation_by_another_worker_drops_the_entry(shared_markers):
+    user = {'user_id': 7, 'role': 'artist', 'name': 'A', 'email': 'a@example.com'}
+    auth.principal_cache.set(('artist', 7), (time.time() - 1, user))
+
+    # another worker deleted the artist: only the shared marker reaches this process
+    markers.SqliteMarkerStore(shared_markers.path).set('principal:artist:7', 60)
+
+    assert auth._cached_principal('artist', 7) is None
+    assert auth.principal_cache.get(('artist', 7)) is None
+
+
+def test_entry_loaded_after_the_invalidation_is_kept(shared_markers):
+    auth.invalidate_principal('customer', 3)
+    user = {'user_id': 3, 'role': 'customer', 'name': 'C', 'email': 'c@example.com'}
+    auth.principal_cache.set(('customer', 3), (time.time() + 1, user))
+
+    assert auth._cached_principal('customer', 3) == user
@@ -0,0 +1,113 @@
+from decimal import Decimal
+from flask import jsonify
+from app import auth, config as config_module
+from app.config import get_db_connection
+from app.query_stats import query_budget
+from app.routes.auth_routes import generate_token
+from tests.conftest import ScriptedPool
+
+
+def add_view(app, path, budget, queries):
+    """Register a view that runs queries statements against the request connection."""
+    def view():
+        cursor = get_db_connection().cursor()
+        try:
+            for _ in range(queries):
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+        finally:
+            cursor.close()
+        return jsonify({'ok': True})
+    view.__name__ = path.strip('/').replace('/', '_')
+    app.route(path)(query_budget(budget)(view))
+
+
+def test_over_budget_view_fails_in_strict_mode(make_app):
+    app = make_app(QUERY_BUDGET_STRICT=True, QUERY_STATS_HEADERS=False)
+    add_view(app, '/test/over-budget', budget=2, queries=3)
+
+    response = app.test_client().get('/test/over-budget')
+
+    assert response.status_code == 500
+    assert response.get_json() == {
+        'error': 'Query budget exceeded',
+        'endpoint': 'test_over-budget',
+        'queries': 3,
+        'budget': 2,
+    }
+
+
+def test_within_budget_view_passes_in_strict_mode(make_app):
+    app = make_app(QUERY_BUDGET_STRICT=True, QUERY_STATS_HEADERS=False)
+    add_view(app, '/test/within-budget', budget=2, queries=2)
+
+    response = app.test_client().get('/test/within-budget')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'ok': True}
+
+
+def test_over_budget_view_only_logged_without_strict_mode(make_app):
+    app = make_app(QUERY_BUDGET_STRICT=False, QUERY_STATS_HEADERS=False)
+    add_view(app, '/test/lenient', budget=1, queries=2)
+
+    assert app.test_client().get('/test/lenient').status_code == 200
+
+
+def test_catalog_stays_within_its_budget(make_app):
+    app = make_app(QUERY_BUDGET_STRICT=True, QUERY_STATS_HEADERS=True)
+
+    response = app.test_client().get('/api/artworks?limit=5')
+
+    assert response.status_code == 200
+    assert response.headers['X-DB-Queries'] == '1'
+
+
+def test_query_stats_headers_when_enabled(make_app):
+    app = make_app(QUERY_BUDGET_STRICT=True, QUERY_STATS_HEADERS=True)
+    add_view(app, '/test/headers', budget=2, queries=2)
+
+    response = app.test_client().get('/test/headers')
+
+    assert response.headers['X-DB-Queries'] == '2'
+    assert response.headers['X-DB-Rows'] == '0'
+    assert response.headers['X-DB-Source'] == 'primary'
+    assert float(response.headers['X-DB-Time-Ms']) >= 0
+
+
+def test_no_query_stats_headers_when_disabled(make_app):
+    app = make_app(QUERY_BUDGET_STRICT=True, QUERY_STATS_HEADERS=False)
+    add_view(app, '/test/no-headers', budget=2, queries=2)
+
+    response = app.test_client().get('/test/no-headers')
+
+    assert response.status_code == 200
+    for header in ('X-DB-Queries', 'X-DB-Time-Ms', 'X-DB-Rows', 'X-DB-Source'):
+        assert header not in response.headers
+
+
+def test_cart_sync_with_every_kind_of_change_stays_within_its_budget(make_app, monkeypatch):
+    app = make_app(QUERY_BUDGET_STRICT=True, QUERY_STATS_HEADERS=True)
+    pool = ScriptedPool([
+        ('FROM customers', [{'customer_id': 4, 'user_id': 4, 'name': 'C', 'email': 'c@x', 'role': 'customer'}]),
+        ("status = 'pending'", [{'order_id': 9}]),
+        ('FROM order_items', [
+            {'order_item_id': 1, 'artwork_id': 10, 'quantity': 1, 'price_at_time': Decimal('5.00')},
+            {'order_item_id': 2, 'artwork_id': 11, 'quantity': 1, 'price_at_time': Decimal('7.00')},
+        ]),
+    ])
+    monkeypatch.setattr(config_module, 'get_connection_pool', lambda: pool)
+    auth.principal_cache.clear()
+
+    # artwork 10 changes, 11 is removed, 12 is added; the principal is not cached
+    response = app.test_client().post(
+        '/api/cart/sync',
+        json={'items': [
+            {'artwork_id': 10, 'quantity': 2, 'price': '5.00'},
+            {'artwork_id': 12, 'quantity': 1, 'price': '3.00'},
+        ]},
+        headers={'Authorization': f"Bearer {generate_token(4, 'customer')}"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers['X-DB-Queries'] == '7'
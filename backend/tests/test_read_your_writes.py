@@ -0,0 +1,49 @@
+import pytest
+from flask import Flask, g, jsonify
+from app import markers
+from app.cache import cached_response, invalidate_responses
+from app.config import Config
+
+
+@pytest.fixture
+def replicas_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'MYSQL_REPLICA_HOSTS', 'replica1')
+    monkeypatch.setattr(Config, 'RESPONSE_CACHE_BACKEND', 'none')
+    monkeypatch.setattr(markers, '_store', markers.SqliteMarkerStore(str(tmp_path / 'markers.sqlite3')))
+
+
+def catalog_app():
+    app = Flask(__name__)
+
+    @app.route('/catalog')
+    @cached_response('artworks', 30)
+    def catalog():
+        return jsonify({'primary': bool(g.get('_force_primary'))})
+
+    return app
+
+
+def test_public_read_after_a_write_stays_on_the_primary(replicas_configured):
+    client = catalog_app().test_client()
+    assert client.get('/catalog').get_json() == {'primary': False}
+
+    # the write was handled by another worker, the marker file is all they share
+    invalidate_responses('artworks')
+
+    assert client.get('/catalog').get_json() == {'primary': True}
+
+
+def test_write_markers_are_kept_apart_from_other_namespaces(replicas_configured):
+    invalidate_responses('galleries')
+
+    assert markers.wrote_recently('cache:galleries')
+    assert not markers.wrote_recently('cache:artworks')
+
+
+def test_no_markers_without_replicas(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'MYSQL_REPLICA_HOSTS', '')
+    monkeypatch.setattr(markers, '_store', markers.SqliteMarkerStore(str(tmp_path / 'markers.sqlite3')))
+
+    markers.note_write('cache:artworks')
+
+    assert not markers.wrote_recently('cache:artworks')
@@ -0,0 +1,74 @@
+import gzip
+import pytest
+from flask import Flask, jsonify
+from app import cache, compression
+from app.cache import cached_response, invalidate_responses
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """A one-view app behind cached_response, with a fresh memory backend; returns (client, calls)."""
+    monkeypatch.setattr(cache, '_response_backend', cache.MemoryBackend(16))
+    monkeypatch.setitem(compression.settings, 'enabled', True)
+    monkeypatch.setitem(compression.settings, 'min_size', 0)
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/catalog')
+    @cached_response('artworks', 30)
+    def view():
+        calls.append(1)
+        return jsonify({'artworks': ['a'] * 50})
+
+    return app.test_client(), calls
+
+
+def test_second_request_is_served_from_the_cache(catalog):
+    client, calls = catalog
+
+    first = client.get('/catalog')
+    second = client.get('/catalog')
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert len(calls) == 1
+
+
+def test_matching_etag_is_answered_with_304(catalog):
+    client, _ = catalog
+    etag = client.get('/catalog').headers['ETag']
+
+    response = client.get('/catalog', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_compressed_variant_has_a_weak_etag_and_the_same_body(catalog):
+    client, calls = catalog
+    plain = client.get('/catalog')
+
+    compressed = client.get('/catalog', headers={'Accept-Encoding': 'gzip'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert compressed.headers['ETag'] == 'W/' + plain.headers['ETag']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    # the weak ETag of the variant revalidates too
+    revalidated = client.get('/catalog', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert len(calls) == 1
+
+
+def test_invalidation_drops_the_entry_and_its_variants(catalog):
+    client, calls = catalog
+    client.get('/catalog')
+    client.get('/catalog', headers={'Accept-Encoding': 'gzip'})
+
+    invalidate_responses('artworks')
+
+    assert client.get('/catalog', headers={'Accept-Encoding': 'gzip'}).headers['X-Cache'] == 'MISS'
+    assert len(calls) == 2
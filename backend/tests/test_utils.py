@@ -0,0 +1,29 @@
+from datetime import datetime
+import pytest
+from app.utils import decode_cursor, encode_cursor, parse_limit
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 3, 1, 12, 30, 5)
+
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not base64!', 'bm90IGpzb24=', encode_cursor(None, 1)])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor)
+
+
+def test_parse_limit_defaults_and_clamps():
+    assert parse_limit(None) == 24
+    assert parse_limit(None, default=20) == 20
+    assert parse_limit('5') == 5
+    assert parse_limit('1000') == 100
+    assert parse_limit('1000', maximum=50) == 50
+
+
+@pytest.mark.parametrize('value, message', [('abc', 'integer'), ('2.5', 'integer'), ('0', 'positive'), ('-3', 'positive')])
+def test_parse_limit_rejects_bad_values(value, message):
+    with pytest.raises(ValueError, match=message):
+        parse_limit(value)
@@ -1,6 +1,9 @@
+# WSGI entry point.
+# Production: gunicorn -c gunicorn.conf.py wsgi:app  (workers, threads and shutdown are set up there)
+# Development: python wsgi.py
 from app.app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000, debug=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8000, debug=app.config['ENV'] == 'development')
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { Box, Container, Typography, Paper, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Grid, Card, CardContent } from '@mui/material';
+import { Box, Button, Container, Typography, Paper, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Grid, Card, CardContent } from '@mui/material';
 import PageLayout from '../components/PageLayout';
 import api from '../services/api';
 
@@ -24,6 +24,8 @@ interface ArtistStats {
 
 interface TransactionsResponse {
   transactions: Transaction[];
+  // Cursor for the next page of orders, null on the last page
+  next_cursor: string | null;
 }
 
 interface ArtistsStatsResponse {
@@ -33,6 +35,8 @@ interface ArtistsStatsResponse {
 const AdminDashboard = () => {
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [artistsStats, setArtistsStats] = useState<ArtistStats[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchData = async () => {
@@ -42,6 +46,7 @@ const AdminDashboard = () => {
           api.get<ArtistsStatsResponse>('/dashboard/admin/artists')
         ]);
         setTransactions(transactionsRes.data.transactions);
+        setNextCursor(transactionsRes.data.next_cursor);
         setArtistsStats(artistsRes.data.artists_stats);
       } catch (error) {
         console.error('Error fetching dashboard data:', error);
@@ -51,6 +56,23 @@ const AdminDashboard = () => {
     fetchData();
   }, []);
 
+  // The report comes one page of orders at a time, older orders are appended
+  const loadMoreTransactions = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get<TransactionsResponse>('/dashboard/admin/transactions', {
+        params: { cursor: nextCursor }
+      });
+      setTransactions(previous => [...previous, ...response.data.transactions]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching more transactions:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <PageLayout>
       <Container maxWidth="lg" sx={{ mt: 4, mb: 4 }}>
@@ -120,6 +142,13 @@ const AdminDashboard = () => {
                   </TableBody>
                 </Table>
               </TableContainer>
+              {nextCursor && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                  <Button variant="outlined" onClick={loadMoreTransactions} disabled={loadingMore}>
+                    {loadingMore ? 'Loading...' : 'Load older transactions'}
+                  </Button>
+                </Box>
+              )}
             </Paper>
           </Grid>
         </Grid>
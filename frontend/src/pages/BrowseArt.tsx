@@ -17,7 +17,7 @@ import {
   Slider,
   Paper
 } from '@mui/material';
-import { fetchArtworks } from '../services/api';
+import { fetchArtworks, searchArtworks } from '../services/api';
 import LoadingSpinner from '../components/LoadingSpinner';
 import { useDispatch } from 'react-redux';
 import { addToCart } from '../store/slices/cartSlice';
@@ -31,42 +31,69 @@ interface Artwork {
   image_url: string;
   artist_name: string;
   status: string;
+  created_at: string;
 }
 
 function BrowseArt() {
   const dispatch = useDispatch();
   const [artworks, setArtworks] = useState<Artwork[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Where the next page starts: a catalog cursor, or a search page number
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [nextSearchPage, setNextSearchPage] = useState<number | null>(null);
   const [error, setError] = useState('');
   const [searchTerm, setSearchTerm] = useState('');
   const [sortBy, setSortBy] = useState('newest');
   const [priceRange, setPriceRange] = useState<number[]>([0, 10000]);
 
   useEffect(() => {
-    loadArtworks();
-  }, []);
+    // Search and the price filter run on the server; wait until the user stops typing or dragging
+    const timer = setTimeout(() => {
+      loadArtworks(searchTerm.trim());
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm, priceRange]);
 
-  const loadArtworks = async () => {
+  // The catalog comes one page at a time, later pages are appended by "Load more"
+  const loadArtworks = async (query: string, more = false) => {
     try {
-      const data = await fetchArtworks();
-      setArtworks(data);
+      let data: Artwork[];
+      if (query) {
+        const page = more && nextSearchPage ? nextSearchPage : 1;
+        const result = await searchArtworks(query, page);
+        data = result.results;
+        setNextSearchPage(result.has_more ? page + 1 : null);
+        setNextCursor(null);
+      } else {
+        const result = await fetchArtworks({
+          cursor: more && nextCursor ? nextCursor : undefined,
+          min_price: priceRange[0],
+          max_price: priceRange[1],
+        });
+        data = result.artworks;
+        setNextCursor(result.nextCursor);
+        setNextSearchPage(null);
+      }
+      setArtworks(previous => (more ? [...previous, ...data] : data));
+      setError('');
     } catch (err: any) {
       setError('Failed to load artworks');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  const handleLoadMore = () => {
+    setLoadingMore(true);
+    loadArtworks(searchTerm.trim(), true);
+  };
+
   const filteredAndSortedArtworks = () => {
     return artworks
-      .filter(artwork => 
-        // Filter by search term
-        artwork.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        artwork.description.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        artwork.artist_name.toLowerCase().includes(searchTerm.toLowerCase())
-      )
       .filter(artwork =>
-        // Filter by price range
+        // The catalog is already filtered by price on the server, search results are not
         artwork.price >= priceRange[0] && artwork.price <= priceRange[1]
       )
       .sort((a, b) => {
@@ -200,6 +227,14 @@ function BrowseArt() {
           ))}
         </Grid>
 
+        {(nextCursor || nextSearchPage) && (
+          <Box sx={{ display: 'flex', justifyContent: 'center', mt: 4 }}>
+            <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </Box>
+        )}
+
         {filteredAndSortedArtworks().length === 0 && (
           <Typography textAlign="center" sx={{ mt: 4 }}>
             No artworks found matching your criteria.
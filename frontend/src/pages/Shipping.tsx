@@ -119,7 +119,8 @@ const Shipping: React.FC = () => {
       });
     } catch (err: any) {
       console.error('Shipping error:', err);
-      setError(err.message || 'Failed to save shipping information');
+      // the API explains a 409 (an artwork sold to someone else first) in its message
+      setError(err.response?.data?.message || err.message || 'Failed to save shipping information');
     } finally {
       setLoading(false);
     }
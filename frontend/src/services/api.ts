@@ -40,8 +40,38 @@ export const signup = async (userData: SignupData): Promise<SignUpResponse> => {
 };
 
 // Artwork APIs
-export const fetchArtworks = async (): Promise<Artwork[]> => {
-  const response = await api.get<Artwork[]>('/artworks');
+export interface ArtworkPageParams {
+  cursor?: string;
+  limit?: number;
+  min_price?: number;
+  max_price?: number;
+  artist_id?: number;
+  q?: string;
+}
+
+export interface ArtworkPage {
+  artworks: Artwork[];
+  // Cursor for the next page, null on the last page
+  nextCursor: string | null;
+}
+
+// The catalog is paged: pass the nextCursor of a page to get the one after it
+export const fetchArtworks = async (params: ArtworkPageParams = {}): Promise<ArtworkPage> => {
+  const response = await api.get<Artwork[]>('/artworks', { params });
+  return {
+    artworks: response.data,
+    nextCursor: response.headers['x-next-cursor'] ?? null,
+  };
+};
+
+export interface ArtworkSearchResponse {
+  results: Artwork[];
+  page: number;
+  has_more: boolean;
+}
+
+export const searchArtworks = async (q: string, page = 1): Promise<ArtworkSearchResponse> => {
+  const response = await api.get<ArtworkSearchResponse>('/artworks/search', { params: { q, page } });
   return response.data;
 };
 